@@ -0,0 +1,91 @@
+from typing import Sequence
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for batched evaluation
+    np = None
+
+from board import PATHS, SAFE_CELLS
+from compact_state import (CAPTURE_OPPORTUNITY, DONE_POSITION, HOME, HOME_PENALTY,
+                           NEAR_HOME_BONUS, OPPONENT_WEIGHT, PIECE_VALUE, PIECES_PER_PLAYER,
+                           PROGRESS_WEIGHT, RISK_PENALTY, SAFE_SPOT_BONUS, TRACK_SQUARES,
+                           WINNING_BONUS)
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError("batched evaluation needs numpy: pip install numpy")
+
+
+def encode_positions(states) -> 'np.ndarray':
+    """Stack the `positions` of CompactStates into a (states, pieces) int array"""
+    require_numpy()
+    return np.array([state.positions for state in states], dtype=np.int16).reshape(len(states), -1)
+
+
+def evaluate_batch(positions, colors: Sequence, seat: int) -> 'np.ndarray':
+    """CompactState.evaluate(seat) for every row of `positions` at once.
+
+    `positions` is (states, 4 * seats) in the CompactState layout and every
+    row shares the seat `colors`. Matches the scalar evaluation to float
+    rounding; the nearest-first threat count of the scalar loop becomes a
+    cumulative sum over each piece's sorted opponent distances.
+    """
+    require_numpy()
+    positions = np.asarray(positions, dtype=np.int64)
+    if positions.shape[0] == 0:
+        return np.zeros(0)
+    seats = len(colors)
+    pieces = positions.reshape(positions.shape[0], seats, PIECES_PER_PLAYER)
+    done_positions = np.array([DONE_POSITION[color] for color in colors])
+    done = pieces == done_positions[None, :, None]
+    home = pieces == HOME
+    winning = done.all(axis=2)
+
+    color = colors[seat]
+    path = PATHS[color]
+    mine = pieces[:, seat, :]
+    mine_done = done[:, seat, :]
+    mine_home = home[:, seat, :]
+    mine_active = ~mine_done & ~mine_home
+    mine_on_track = mine_active & (mine < TRACK_SQUARES)
+
+    others = [s for s in range(seats) if s != seat]
+    opponents = pieces[:, others, :].reshape(positions.shape[0], -1)
+    opponents_on_track = (opponents != HOME) & (opponents < TRACK_SQUARES)
+    opponents_done = done[:, others, :].reshape(positions.shape[0], -1).sum(axis=1)
+
+    in_home_column = mine >= path["home_start"]
+    home_progress = (mine - path["home_start"]) / 5.0
+    total_distance = (path["end"] - path["start"]) % 52
+    progress = ((mine - path["start"]) % 52) / total_distance
+    piece_scores = np.where(in_home_column,
+                            NEAR_HOME_BONUS + home_progress * PIECE_VALUE,
+                            progress * PIECE_VALUE * PROGRESS_WEIGHT)
+    safe = np.isin(mine, list(SAFE_CELLS))
+    piece_scores = piece_scores + np.where(safe, SAFE_SPOT_BONUS, 0.0)
+
+    # distance[b, i, j]: how far opponent piece j is ahead of my piece i
+    distance = (opponents[:, None, :] - mine[:, :, None]) % 52
+    in_reach = (distance >= 1) & (distance <= 6) & opponents_on_track[:, None, :] & mine_on_track[:, :, None]
+
+    nearest = np.sort(np.where(in_reach, distance, 7), axis=2)
+    threatened = (nearest <= 6) & ~safe[:, :, None]
+    threats = np.cumsum(threatened, axis=2)
+    risk = np.where(threatened,
+                    (7 - nearest) * RISK_PENALTY / np.maximum(threats, 2)
+                    + np.where(nearest <= 3, CAPTURE_OPPORTUNITY / 2, 0.0),
+                    0.0)
+    piece_scores = piece_scores + risk.sum(axis=2)
+
+    piece_scores = np.where(mine_active, piece_scores, 0.0)
+    piece_scores = np.where(mine_done, PIECE_VALUE * 2 + WINNING_BONUS * 0.2, piece_scores)
+    piece_scores = np.where(mine_home, HOME_PENALTY, piece_scores)
+    scores = piece_scores.sum(axis=1)
+
+    scores = scores - PIECE_VALUE * OPPONENT_WEIGHT * opponents_done
+    scores = scores + np.where(in_reach, CAPTURE_OPPORTUNITY * (7 - distance) / 6, 0.0).sum(axis=(1, 2))
+
+    opponent_won = winning[:, others].any(axis=1)
+    scores = np.where(opponent_won, -WINNING_BONUS, scores)
+    return np.where(winning[:, seat], WINNING_BONUS, scores)
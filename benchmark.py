@@ -0,0 +1,951 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from board import PATHS, SAFE_CELLS, Board, next_position
+from color import Color
+from compact_state import HOME, PIECES_PER_PLAYER, CompactState
+from expectiminimax import Expectiminimax, Move
+from state import State, StateManager
+
+
+def sample_positions(count: int, seed: int = 0, colors=(Color.BLUE, Color.GREEN),
+                     min_moves: int = 2) -> list:
+    """Decision positions reached by random play, each with at least `min_moves` choices"""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        state = CompactState.create((-1,) * 4 * len(colors), colors, 0)
+        for _ in range(rng.randint(10, 300)):
+            state = state.apply_dice_roll(rng.randint(1, 6))
+            moves = state.valid_moves()
+            state = state.apply_move(rng.choice(moves)) if moves else state.pass_turn()
+            if state.is_terminal():
+                break
+        if state.is_terminal():
+            continue
+        state = state.apply_dice_roll(rng.randint(1, 6))
+        if len(state.valid_moves()) >= min_moves:
+            positions.append(state)
+    return positions
+
+
+def bench_chance_pruning(depth: int, count: int, seed: int, tt_size: int):
+    positions = sample_positions(count, seed)
+    print(f"Chance-node pruning, depth {depth}, {len(positions)} positions")
+    baseline = None
+    for mode in Expectiminimax.CHANCE_PRUNING:
+        engine = Expectiminimax(depth=depth, tt_size=tt_size, chance_pruning=mode)
+        nodes = 0
+        results = []
+        start = time.perf_counter()
+        for position in positions:
+            results.append(engine.score_moves(position))
+            nodes += engine.nodes_visited
+        elapsed = time.perf_counter() - start
+
+        if baseline is None:
+            baseline = results
+        max_diff = max(abs(scores[slot] - reference[slot])
+                       for scores, reference in zip(results, baseline) for slot in scores)
+        same_moves = sum(max(scores, key=scores.get) == max(reference, key=reference.get)
+                         for scores, reference in zip(results, baseline))
+        print(f"{mode:>6}: {nodes:>9} nodes  {elapsed:7.2f}s  "
+              f"same best move {same_moves}/{len(positions)}  max score diff {max_diff:.2e}")
+
+
+def bench_parallel(depth: int, count: int, seed: int, max_workers: int, split_chance: bool):
+    positions = sample_positions(count, seed)
+    print(f"Parallel root search, depth {depth}, {len(positions)} positions, "
+          f"split chance {'on' if split_chance else 'off'}")
+    baseline = None
+    serial_time = None
+    for workers in range(1, max_workers + 1):
+        engine = Expectiminimax(depth=depth, workers=workers, split_chance=split_chance)
+        if workers > 1:
+            engine.score_moves(positions[0], depth=1)  # start the pool outside the timing
+        start = time.perf_counter()
+        results = [engine.score_moves(position) for position in positions]
+        elapsed = time.perf_counter() - start
+        engine.close()
+
+        if baseline is None:
+            baseline, serial_time = results, elapsed
+        identical = all(scores == reference for scores, reference in zip(results, baseline))
+        print(f"{workers:>3} workers: {elapsed:7.2f}s  speedup {serial_time / elapsed:5.2f}x  "
+              f"identical to serial: {'yes' if identical else 'NO'}")
+
+
+def _step_walk_valid_moves(state: CompactState) -> tuple:
+    """Move generation as it was before MOVE_TABLE: one next_position call per step"""
+    if state.dice_value == 6 and state.sixes >= 2:
+        return ()
+    occupants = {}
+    for slot, position in enumerate(state.positions):
+        if position != HOME:
+            occupants.setdefault(position, []).append(slot // PIECES_PER_PLAYER)
+    moves = []
+    for slot in state.seat_slots(state.turn):
+        color = state.colors[state.turn]
+        position = state.positions[slot]
+        if position == HOME:
+            if state.dice_value == 6:
+                moves.append(slot)
+            continue
+        target = next_position(position, state.dice_value, color)
+        if target == -1:
+            continue
+        allowed = True
+        current = position
+        while current != target:
+            current = next_position(current, 1, color)
+            seats = occupants.get(current)
+            if seats and len(seats) >= 2 and all(s == seats[0] for s in seats):
+                allowed = seats[0] == state.turn
+                break
+        if allowed:
+            moves.append(slot)
+    return tuple(moves)
+
+
+def bench_move_generation(count: int, seed: int, repeat: int):
+    positions = [position.apply_dice_roll(dice_value)
+                 for position in sample_positions(count, seed, min_moves=1)
+                 for dice_value in range(1, 7)]
+    print(f"Move generation, {len(positions)} positions x {repeat}")
+    reference = [_step_walk_valid_moves(position) for position in positions]
+    assert reference == [position.valid_moves() for position in positions]
+    for name, generate in (("step walk", _step_walk_valid_moves),
+                           ("move table", CompactState.valid_moves)):
+        generated = 0
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for position in positions:
+                generated += len(generate(position))
+        elapsed = time.perf_counter() - start
+        print(f"{name:>10}: {generated / elapsed:12,.0f} moves/s  "
+              f"{len(positions) * repeat / elapsed:12,.0f} positions/s")
+
+
+def bench_batch_evaluation(depth: int, count: int, seed: int):
+    import numpy as np
+    from batch_eval import encode_positions, evaluate_batch
+
+    positions = sample_positions(count, seed)
+    leaves = [position.apply_move(slot) for position in positions for slot in position.valid_moves()]
+    print(f"Leaf evaluation, {len(leaves)} leaves")
+    start = time.perf_counter()
+    scalar = [leaf.evaluate(0) for leaf in leaves]
+    scalar_time = time.perf_counter() - start
+    print(f"    scalar: {len(leaves) / scalar_time:12,.0f} leaves/s")
+    for batch_size in (6, 24, 256, len(leaves)):
+        start = time.perf_counter()
+        batched = []
+        for offset in range(0, len(leaves), batch_size):
+            chunk = encode_positions(leaves[offset:offset + batch_size])
+            batched.extend(evaluate_batch(chunk, leaves[0].colors, 0).tolist())
+        elapsed = time.perf_counter() - start
+        max_diff = float(np.max(np.abs(np.array(batched) - np.array(scalar))))
+        print(f"batch {batch_size:>4}: {len(leaves) / elapsed:12,.0f} leaves/s  "
+              f"max diff {max_diff:.1e}")
+
+    print(f"Search with batched leaves, depth {depth}, {len(positions)} positions")
+    reference = None
+    for batch_depth in (0, 1, 2):
+        engine = Expectiminimax(depth=depth, leaf_batch_depth=batch_depth, eval_cache_size=0)
+        start = time.perf_counter()
+        results = [engine.score_moves(position) for position in positions]
+        elapsed = time.perf_counter() - start
+        reference = reference or results
+        max_diff = max(abs(scores[slot] - ref[slot])
+                       for scores, ref in zip(results, reference) for slot in scores)
+        print(f"leaf_batch_depth {batch_depth}: {elapsed:7.2f}s  max score diff {max_diff:.1e}")
+
+
+def bench_multiplayer(depth: int, count: int, seed: int, players: int):
+    colors = (Color.BLUE, Color.RED, Color.GREEN, Color.YELLOW)[:players]
+    positions = sample_positions(count, seed, colors=colors)
+    print(f"{players}-player search, depth {depth}, {len(positions)} positions")
+    for multiplayer in Expectiminimax.MULTIPLAYER:
+        engine = Expectiminimax(depth=depth, multiplayer=multiplayer)
+        nodes = 0
+        start = time.perf_counter()
+        for position in positions:
+            engine.score_moves(position)
+            nodes += engine.nodes_visited
+        elapsed = time.perf_counter() - start
+        print(f"{multiplayer:>9}: {nodes:>9} nodes  {elapsed:7.2f}s  "
+              f"{nodes / elapsed:10,.0f} nodes/s  {elapsed / len(positions) * 1000:7.1f} ms/move")
+
+
+def _play_state_game(turns: int, seed: int, state_manager: StateManager, keep_parents: bool):
+    """Random play through State objects, saving every state like Game does.
+
+    A finished game is followed by a fresh one so the history always spans `turns`.
+    """
+    rng = random.Random(seed)
+    board = Board([Color.BLUE, Color.GREEN], [True, True])
+    state = State(board, board.current_player)
+    for _ in range(turns):
+        if state.is_terminal():
+            state = State(board, board.current_player, parent=state)
+        rolled = state.apply_dice_roll(rng.randint(1, 6))
+        moves = rolled.get_valid_moves()
+        if moves:
+            piece, steps = rng.choice(moves)
+            state = rolled.apply_move(Move(piece, steps, 0))
+        else:
+            state = rolled
+            state.switch_player()
+            state.dice_value = None
+        if keep_parents:
+            # what every state carried before the roll history: its whole ancestry
+            state.parent = rolled
+            rolled.parent = state_manager.get_last_state()
+        state_manager.save_state(state)
+
+
+def bench_history(turns: int, seed: int, retention: int, parent_chain_turns: int):
+    print(f"State history memory, up to {turns} turns")
+    # copying the ancestry makes every turn cost as much as the game so far,
+    # so the parent chain only gets a shorter game
+    setups = (("parent chain", None, True, parent_chain_turns),
+              ("roll history", None, False, turns),
+              (f"retention {retention}", retention, False, turns))
+    for name, max_states, keep_parents, limit in setups:
+        state_manager = StateManager(max_states)
+        tracemalloc.start()
+        start = time.perf_counter()
+        _play_state_game(limit, seed, state_manager, keep_parents)
+        elapsed = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name:>14}: {limit} turns  {elapsed:6.2f}s  retained {current / 2**20:7.2f} MiB  "
+              f"peak {peak / 2**20:7.2f} MiB  {len(state_manager.states)} states kept")
+
+
+def bench_opening_book(path: str, depth: int, games: int, seed: int, rolls: int):
+    from opening_book import OpeningBook
+    from simulation import ExpectiminimaxAgent, play_game
+
+    book = OpeningBook(path)
+    print(f"Opening book {path}: {len(book)} positions, depth {depth}, "
+          f"{games} games of {rolls} rolls")
+    for name, agent_book in (("search", None), ("book", book)):
+        agents = [ExpectiminimaxAgent(depth, book=agent_book) for _ in range(2)]
+        times = []
+        for game in range(games):
+            result = play_game(agents, seed * 1000003 + game, max_rolls=rolls)
+            times.extend(t for seat_times in result.move_times for t in seat_times)
+        line = f"{name:>6}: {len(times)} decisions  {sum(times) / len(times) * 1000:7.2f} ms/move"
+        if agent_book is not None:
+            line += f"  hit rate {book.hit_rate:.1%} ({book.hits} hits)"
+        print(line)
+    book.close()
+
+
+def _depth_first_leaves(state: CompactState, depth: int, leaves: list):
+    """Leaves of a full search tree in the order the search reaches them"""
+    if depth == 0 or state.is_terminal():
+        leaves.append(state)
+        return
+    if state.dice_value is None:
+        for dice_value in range(1, 7):
+            _depth_first_leaves(state.apply_dice_roll(dice_value), depth - 1, leaves)
+        return
+    moves = state.valid_moves()
+    for child in [state.apply_move(slot) for slot in moves] or [state.pass_turn()]:
+        _depth_first_leaves(child, depth - 1, leaves)
+
+
+def bench_incremental_evaluation(depth: int, count: int, seed: int, players: int):
+    from incremental_eval import IncrementalEvaluator
+
+    colors = (Color.BLUE, Color.RED, Color.GREEN, Color.YELLOW)[:players]
+    positions = sample_positions(count, seed, colors=colors)
+    leaves = []
+    for position in positions:
+        _depth_first_leaves(position, depth, leaves)
+    print(f"Leaf evaluation in search order, depth {depth}, {len(leaves)} leaves, {players} players")
+    start = time.perf_counter()
+    for leaf in leaves:
+        leaf.evaluate(0)
+    full_time = time.perf_counter() - start
+    evaluator = IncrementalEvaluator(leaves[0])
+    start = time.perf_counter()
+    for leaf in leaves:
+        evaluator.update(leaf).evaluate(0)
+    incremental_time = time.perf_counter() - start
+    print(f"       full: {len(leaves) / full_time:10,.0f} leaves/s")
+    print(f"incremental: {len(leaves) / incremental_time:10,.0f} leaves/s  "
+          f"{evaluator.updates / len(leaves):.2f} piece updates per leaf")
+    start = time.perf_counter()
+    for leaf in leaves:
+        [leaf.evaluate(seat) for seat in range(players)]
+    full_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for leaf in leaves:
+        evaluator.update(leaf).evaluate_all()
+    incremental_time = time.perf_counter() - start
+    print(f"all seats full: {len(leaves) / full_time:10,.0f} leaves/s  "
+          f"incremental: {len(leaves) / incremental_time:10,.0f} leaves/s")
+
+    for multiplayer in Expectiminimax.MULTIPLAYER:
+        for incremental in (False, True):
+            engine = Expectiminimax(depth=depth + 1, multiplayer=multiplayer,
+                                    incremental_eval=incremental, eval_cache_size=0)
+            start = time.perf_counter()
+            for position in positions:
+                engine.score_moves(position)
+            print(f"{multiplayer:>9} search, incremental {'on ' if incremental else 'off'}: "
+                  f"{time.perf_counter() - start:7.2f}s")
+
+
+def bench_mcts(opponent: str, iterations: list, games: int, seed: int, workers: int):
+    from simulation import run_simulation, summarize
+
+    print(f"MCTS self-play against {opponent}, {games} games per setting")
+    for count in iterations:
+        agent = f"mcts:{count}"
+        summary = summarize(run_simulation([agent, opponent], games, seed, workers))
+        mcts_stats = summary["agents"][agent]
+        other = summary["agents"][opponent]
+        print(f"{agent:>10}: win rate {mcts_stats['win_rate']:6.1%}  "
+              f"{mcts_stats['mean_move_ms']:8.2f} ms/move  "
+              f"opponent {other['mean_move_ms']:.2f} ms/move")
+
+
+def bench_playout(games: int, seed: int, players: int, batch_sizes: list):
+    from playout import play_random_games, random_playout
+
+    colors = (Color.BLUE, Color.RED, Color.GREEN, Color.YELLOW)[:players]
+    start_state = CompactState.create((HOME,) * PIECES_PER_PLAYER * players, colors, 0)
+    print(f"Random playouts to the end, {players} players")
+
+    rng = random.Random(seed)
+    moves = 0
+    start = time.perf_counter()
+    for _ in range(games):
+        state = start_state
+        while not state.is_terminal():
+            state = state.apply_dice_roll(int(rng.random() * 6) + 1)
+            legal = state.valid_moves()
+            if not legal:
+                state = state.pass_turn()
+                continue
+            state = state.apply_move(legal[int(rng.random() * len(legal))] if len(legal) > 1 else legal[0])
+            moves += 1
+    elapsed = time.perf_counter() - start
+    reference = state
+    print(f"  CompactState: {games} games  {moves / elapsed:12,.0f} moves/s")
+
+    rng = random.Random(seed)
+    moves = 0
+    start = time.perf_counter()
+    for _ in range(games):
+        result = random_playout(start_state, rng)
+        moves += result.moves
+    elapsed = time.perf_counter() - start
+    # both consume the generator the same way, so the last games must agree
+    assert result.positions == reference.positions
+    print(f"random_playout: {games} games  {moves / elapsed:12,.0f} moves/s")
+
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        result = play_random_games(batch_size, colors, seed)
+        elapsed = time.perf_counter() - start
+        print(f"  batch {batch_size:>6}: {int((result['winners'] >= 0).sum())} finished  "
+              f"{int(result['moves'].sum()) / elapsed:12,.0f} moves/s")
+
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_positions.json")
+CORPUS_CATEGORIES = ("opening", "midgame", "endgame", "six-streak", "four-player")
+
+
+def _corpus_category(state: CompactState, rolls: int) -> str:
+    """Which corpus category a decision position with two or more moves belongs to, if any"""
+    if len(state.colors) == 4:
+        return "four-player" if rolls >= 40 else None
+    if state.sixes > 0:
+        return "six-streak"
+    if rolls <= 12:
+        return "opening"
+    captures = any(
+        target not in SAFE_CELLS and any(position == target and other // PIECES_PER_PLAYER != state.turn
+                                         for other, position in enumerate(state.positions))
+        for target in (state.destination(slot) for slot in state.valid_moves()))
+    if state.walls() and captures:
+        return "midgame"
+    finishing = [sum(state.positions[slot] >= PATHS[state.colors[seat]]["home_start"]
+                     for slot in state.seat_slots(seat)) for seat in range(len(state.colors))]
+    if min(finishing) >= 2:
+        return "endgame"
+    return None
+
+
+def _three_sixes_positions(rng: random.Random) -> list:
+    """For 2, 3 and 4 players a decision after two sixes, then the same position with a third six"""
+    positions = []
+    for players in (2, 3, 4):
+        colors = (Color.BLUE, Color.GREEN) if players == 2 else \
+            (Color.BLUE, Color.RED, Color.GREEN, Color.YELLOW)[:players]
+        found = None
+        while found is None:
+            state = CompactState.create((HOME,) * PIECES_PER_PLAYER * players, colors, 0)
+            while found is None and not state.is_terminal():
+                state = state.apply_dice_roll(rng.randint(1, 6))
+                moves = state.valid_moves()
+                if state.sixes == 2 and state.dice_value != 6 and len(moves) >= 2:
+                    found = state
+                state = state.apply_move(rng.choice(moves)) if moves else state.pass_turn()
+        positions += [found, CompactState.create(found.positions, colors, found.turn, found.sixes, 6)]
+    return positions
+
+
+def build_corpus(per_category: int = 4, seed: int = 0) -> list:
+    """Decision positions of every CORPUS_CATEGORIES kind, found by random play.
+
+    "three-sixes" positions come last from their own random stream, so the
+    others do not change with them; every second one forfeits the turn.
+    """
+    rng = random.Random(seed)
+    found = {category: [] for category in CORPUS_CATEGORIES}
+    while any(len(states) < per_category for states in found.values()):
+        players = 4 if len(found["four-player"]) < per_category and rng.random() < 0.2 else 2
+        colors = (Color.BLUE, Color.RED, Color.GREEN, Color.YELLOW)[:players] if players == 4 \
+            else (Color.BLUE, Color.GREEN)
+        state = CompactState.create((HOME,) * PIECES_PER_PLAYER * players, colors, 0)
+        rolls = 0
+        while not state.is_terminal():
+            state = state.apply_dice_roll(rng.randint(1, 6))
+            rolls += 1
+            moves = state.valid_moves()
+            if len(moves) >= 2 and rng.random() < 0.2:
+                category = _corpus_category(state, rolls)
+                if category and len(found[category]) < per_category:
+                    found[category].append(state)
+            state = state.apply_move(rng.choice(moves)) if moves else state.pass_turn()
+    found["three-sixes"] = _three_sixes_positions(random.Random(seed + 1))
+    return [{"name": f"{category}-{index}", "category": category, "state": state.to_dict()}
+            for category, states in found.items() for index, state in enumerate(states)]
+
+
+def run_suite(corpus: list, depths: list, repeat: int = 3) -> list:
+    """Search every corpus position at every depth with a fresh engine.
+
+    Time is the best of `repeat` plain runs and peak memory comes from one
+    more run under tracemalloc, which would otherwise slow the timed ones down.
+    """
+    results = []
+    for entry in corpus:
+        state = CompactState.from_dict(entry["state"])
+        for depth in depths:
+            result = min((Expectiminimax(depth=depth).search(state) for _ in range(repeat)),
+                         key=lambda run: run.elapsed)
+            tracemalloc.start()
+            Expectiminimax(depth=depth).search(state)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results.append({"name": entry["name"], "depth": depth,
+                            "nodes": result.nodes_visited,
+                            "nodes_per_second": result.nodes_per_second,
+                            "elapsed": result.elapsed, "peak_memory": peak,
+                            "best_slot": result.best_slot})
+    return results
+
+
+def compare_to_baseline(results: list, baseline: list, tolerance: float,
+                        time_slack: float = 0.001) -> list:
+    """Regressions of `results` against `baseline`: slower (by more than `tolerance`
+    plus `time_slack` seconds) or bigger by more than `tolerance`, or a different
+    node count or chosen move"""
+    previous = {(run["name"], run["depth"]): run for run in baseline}
+    regressions = []
+    for run in results:
+        old = previous.get((run["name"], run["depth"]))
+        if old is None:
+            continue
+        label = f"{run['name']} depth {run['depth']}"
+        if run["elapsed"] > old["elapsed"] * (1 + tolerance) + time_slack:
+            regressions.append(f"{label}: {old['elapsed'] * 1000:.1f} -> {run['elapsed'] * 1000:.1f} ms")
+        if run["peak_memory"] > old["peak_memory"] * (1 + tolerance):
+            regressions.append(f"{label}: peak memory {old['peak_memory']} -> {run['peak_memory']} bytes")
+        if run["nodes"] != old["nodes"]:
+            regressions.append(f"{label}: nodes {old['nodes']} -> {run['nodes']}")
+        if run["best_slot"] != old["best_slot"]:
+            regressions.append(f"{label}: best move {old['best_slot']} -> {run['best_slot']}")
+    return regressions
+
+
+def bench_suite(depths: list, corpus_path: str, save: str, baseline: str, tolerance: float,
+                write_corpus: bool, repeat: int):
+    if write_corpus:
+        with open(corpus_path, "w") as corpus_file:
+            json.dump(build_corpus(), corpus_file, indent=1)
+    with open(corpus_path) as corpus_file:
+        corpus = json.load(corpus_file)
+    print(f"Search suite, {len(corpus)} positions, depths {', '.join(map(str, depths))}")
+    results = run_suite(corpus, depths, repeat)
+    for run in results:
+        print(f"{run['name']:>14} d{run['depth']}: {run['nodes']:>8} nodes  "
+              f"{run['nodes_per_second']:10,.0f} nodes/s  {run['elapsed'] * 1000:8.1f} ms  "
+              f"peak {run['peak_memory'] / 1024:8.1f} KiB  best slot {run['best_slot']}")
+    print(f"Total: {sum(run['elapsed'] for run in results):.2f}s, "
+          f"{sum(run['nodes'] for run in results)} nodes")
+    if save:
+        with open(save, "w") as save_file:
+            json.dump(results, save_file, indent=1)
+    if baseline:
+        with open(baseline) as baseline_file:
+            regressions = compare_to_baseline(results, json.load(baseline_file), tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        print(f"{len(regressions)} regressions against {baseline}")
+        if regressions:
+            sys.exit(1)
+
+
+def bench_game_records(games: int, seed: int, path: str):
+    from serialization import GameRecordReader, decode_position, encode_position
+    from simulation import run_simulation
+
+    if os.path.exists(path):
+        os.remove(path)
+    start = time.perf_counter()
+    results = run_simulation(["random", "random"], games, seed, record=path)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(path)
+    rolls = sum(result.rolls for result in results)
+    print(f"Recorded {games} random games, {rolls} rolls: {size / games:.0f} bytes/game "
+          f"({size / rolls:.2f} bytes/roll), {elapsed:.2f}s including play")
+
+    reader = GameRecordReader(path)
+    start = time.perf_counter()
+    records = list(reader)
+    print(f"    scan: {len(records) / (time.perf_counter() - start):12,.0f} games/s")
+    start = time.perf_counter()
+    positions = 0
+    for record, result in zip(records, results):
+        for state in record.replay():
+            positions += 1
+        assert state.is_winning(result.winner) if result.winner is not None else True
+    elapsed = time.perf_counter() - start
+    print(f"  replay: {len(records) / elapsed:12,.0f} games/s  {positions / elapsed:12,.0f} positions/s")
+
+    states = [state for record in records[:20] for state in record.replay()]
+    start = time.perf_counter()
+    encoded = [encode_position(state) for state in states]
+    encode_time = time.perf_counter() - start
+    start = time.perf_counter()
+    decoded = [decode_position(data) for data in encoded]
+    decode_time = time.perf_counter() - start
+    assert decoded == states
+    print(f"positions: {len(states)} round trips, {len(encoded[0])} bytes each, "
+          f"encode {len(states) / encode_time:,.0f}/s, decode {len(states) / decode_time:,.0f}/s")
+    reader.close()
+
+
+
+def _random_decisions(games: int, plies: int, seed: int, colors) -> list:
+    """Positions with a choice of moves from the first `plies` decisions of random games"""
+    rng = random.Random(seed)
+    positions = []
+    for _ in range(games):
+        state = CompactState.create((HOME,) * PIECES_PER_PLAYER * len(colors), colors, 0)
+        decisions = 0
+        while decisions < plies and not state.is_terminal():
+            state = state.apply_dice_roll(rng.randint(1, 6))
+            moves = state.valid_moves()
+            if len(moves) > 1:
+                decisions += 1
+                positions.append(state)
+            state = state.apply_move(rng.choice(moves)) if moves else state.pass_turn()
+    return positions
+
+
+def bench_symmetry(depth: int, games: int, plies: int, seed: int, players: int, book_games: int):
+    from opening_book import book_key
+
+    colors = (Color.BLUE, Color.GREEN) if players == 2 else \
+        (Color.BLUE, Color.RED, Color.GREEN, Color.YELLOW)[:players]
+    positions = _random_decisions(games, plies, seed, colors)
+    print(f"Symmetry, {players} players: {len(positions)} positions from {games} games, "
+          f"depth {depth}, table kept between moves")
+    baseline = None
+    for symmetry in (False, True):
+        engine = Expectiminimax(depth=depth, tt_size=1 << 18, symmetry=symmetry)
+        hits = probes = nodes = 0
+        scores = []
+        start = time.perf_counter()
+        for position in positions:
+            result = engine.search(position, use_book=False)
+            scores.append(result.move_scores)
+            hits += result.tt_hits
+            probes += result.tt_hits + result.tt_misses
+            nodes += result.nodes_visited
+        elapsed = time.perf_counter() - start
+        baseline = baseline or scores
+        same = sum(result == reference for result, reference in zip(scores, baseline))
+        print(f"  {'canonical' if symmetry else 'plain':>9} keys: {nodes:>9} nodes  {elapsed:7.2f}s  "
+              f"TT hit rate {hits / probes:6.1%}  same scores {same}/{len(positions)}")
+
+    # book coverage: positions of one set of games looked up in a book of another
+    book_positions = _random_decisions(book_games, plies, seed + 1, colors)
+    probes = _random_decisions(book_games, plies, seed + 2, colors)
+    for name, key in (("plain", lambda state: (state.key, state.dice_value)),
+                      ("canonical", lambda state: (book_key(state), state.dice_value))):
+        keys = {key(state) for state in book_positions}
+        covered = sum(key(state) in keys for state in probes)
+        print(f"  {name:>9} book: {len(keys):>6} entries for {len(book_positions)} positions  "
+              f"hit rate {covered / len(probes):6.1%} on {len(probes)} new ones")
+
+
+def bench_eval_cache(depth: int, count: int, seed: int, players: int, capacities: list):
+    colors = (Color.BLUE, Color.GREEN) if players == 2 else \
+        (Color.BLUE, Color.RED, Color.GREEN, Color.YELLOW)[:players]
+    positions = sample_positions(count, seed, colors=colors)
+    print(f"Evaluation cache, depth {depth}, {len(positions)} positions, {players} players")
+    baseline = None
+    for capacity in capacities:
+        engine = Expectiminimax(depth=depth, eval_cache_size=capacity)
+        hits = misses = evictions = leaves = 0
+        scores = []
+        start = time.perf_counter()
+        for position in positions:
+            result = engine.search(position, use_book=False)
+            scores.append(result.move_scores)
+            hits += result.eval_hits
+            misses += result.eval_misses
+            evictions += result.eval_evictions
+            leaves += result.leaf_nodes
+        elapsed = time.perf_counter() - start
+        baseline = baseline or scores
+        same = sum(result == reference for result, reference in zip(scores, baseline))
+        rate = hits / (hits + misses) if hits + misses else 0.0
+        print(f"  capacity {capacity:>7}: {leaves:>8} leaves  {elapsed:7.2f}s  hit rate {rate:6.1%}  "
+              f"{evictions:>8} evictions  same scores {same}/{len(positions)}")
+
+
+def bench_race(path: str, max_distance: int, count: int, depth: int, seed: int):
+    from race import RaceTable, race_position, solve_races, write_race_table
+
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        configurations, values = solve_races(max_distance)
+        write_race_table(path, max_distance, values)
+        print(f"Solved {len(values)} races in {time.perf_counter() - start:.1f}s")
+    table = RaceTable(path)
+    print(f"Race table {path}: distance {table.max_distance}, {table.size} configurations per seat, "
+          f"{os.path.getsize(path) / 1024:.0f} KiB")
+
+    rng = random.Random(seed)
+    colors = (Color.BLUE, Color.GREEN)
+    kinds = {"no sixes": [], "sixes": [], "rolled": []}
+    while any(len(positions) < count for positions in kinds.values()):
+        remaining = [rng.randint(0, table.max_distance) for _ in range(2 * PIECES_PER_PLAYER)]
+        if not any(remaining[:PIECES_PER_PLAYER]) or not any(remaining[PIECES_PER_PLAYER:]):
+            continue
+        sixes = rng.choice((0, 0, 1, 2))
+        dice_value = rng.choice((None, rng.randint(1, 6)))
+        kind = "rolled" if dice_value is not None else "sixes" if sixes else "no sixes"
+        if len(kinds[kind]) < count:
+            kinds[kind].append(race_position(colors, remaining, rng.randint(0, 1), sixes, dice_value))
+
+    for kind, positions in kinds.items():
+        table.lookups = 0
+        start = time.perf_counter()
+        for position in positions:
+            table.win_probability(position, 0)
+        elapsed = time.perf_counter() - start
+        print(f"  lookup, {kind:>8}: {elapsed / len(positions) * 1e6:8.1f} us  "
+              f"{table.lookups / len(positions):5.1f} table reads")
+
+    decisions = [position for position in kinds["rolled"] if len(position.valid_moves()) > 1]
+    exact = [table.best_slot(position) for position in decisions]
+    print(f"Depth {depth} search of {len(decisions)} race decisions")
+    for name, race_table in (("heuristic", None), ("table", table)):
+        engine = Expectiminimax(depth=depth, race_table=race_table)
+        nodes = best = 0
+        start = time.perf_counter()
+        for position, slot in zip(decisions, exact):
+            result = engine.search(position, use_book=False)
+            nodes += result.nodes_visited
+            best += result.best_slot == slot
+        elapsed = time.perf_counter() - start
+        print(f"  {name:>9}: {nodes:>8} nodes  {elapsed:7.2f}s  best move {best}/{len(decisions)}")
+    table.close()
+
+
+def bench_analysis(depth: int, games: int, plies: int, seed: int, players: int, workers: int):
+    colors = (Color.BLUE, Color.GREEN) if players == 2 else \
+        (Color.BLUE, Color.RED, Color.GREEN, Color.YELLOW)[:players]
+    positions = _random_decisions(games, plies, seed, colors)
+    print(f"Batch analysis of {len(positions)} decisions from {games} games, depth {depth}")
+
+    start = time.perf_counter()
+    reference = [Expectiminimax(depth=depth, symmetry=True).search(position, use_book=False)
+                 for position in positions]
+    elapsed = time.perf_counter() - start
+    nodes = sum(result.nodes_visited for result in reference)
+    print(f"  {'fresh engine per position':<26} {elapsed:7.2f}s  {len(positions) / elapsed:8.1f} positions/s  "
+          f"{nodes:>9} nodes")
+
+    for pool in sorted({1, workers}):
+        engine = Expectiminimax(depth=depth, symmetry=True, workers=pool)
+        start = time.perf_counter()
+        results = list(engine.analyze(((position, None) for position in positions), use_book=False))
+        elapsed = time.perf_counter() - start
+        engine.close()
+        nodes = sum(result.nodes_visited for result in results)
+        tt_hits = sum(result.tt_hits for result in results)
+        tt_probes = tt_hits + sum(result.tt_misses for result in results)
+        eval_hits = sum(result.eval_hits for result in results)
+        eval_probes = eval_hits + sum(result.eval_misses for result in results)
+        same = sum(result.move_scores == expected.move_scores
+                   for result, expected in zip(results, reference))
+        label = f"analyze, {pool} worker" + ("s" if pool > 1 else "")
+        print(f"  {label:<26} {elapsed:7.2f}s  "
+              f"{len(positions) / elapsed:8.1f} positions/s  {nodes:>9} nodes  "
+              f"TT hits {tt_hits / max(tt_probes, 1):6.1%}  eval hits {eval_hits / max(eval_probes, 1):6.1%}  "
+              f"same scores {same}/{len(positions)}")
+
+
+def bench_move_ordering(depths: list, corpus_path: str):
+    with open(corpus_path) as corpus_file:
+        corpus = [CompactState.from_dict(entry["state"]) for entry in json.load(corpus_file)]
+    print(f"Move ordering on {len(corpus)} corpus positions")
+    for depth in depths:
+        for mode in ("star1", "star2"):
+            runs = []
+            for ordering in (False, True):
+                nodes = 0
+                scores = []
+                start = time.perf_counter()
+                for state in corpus:
+                    engine = Expectiminimax(depth=depth, chance_pruning=mode, symmetry=True,
+                                            move_ordering=ordering)
+                    result = engine.search(state, use_book=False)
+                    nodes += result.nodes_visited
+                    scores.append(result.move_scores)
+                runs.append((nodes, time.perf_counter() - start, scores))
+            (plain, plain_time, plain_scores), (ordered, ordered_time, ordered_scores) = runs
+            same = sum(a == b for a, b in zip(plain_scores, ordered_scores))
+            print(f"  depth {depth} {mode}: {plain:>8} -> {ordered:>8} nodes ({ordered / plain - 1:+6.1%})  "
+                  f"{plain_time:6.2f}s -> {ordered_time:6.2f}s  same scores {same}/{len(corpus)}")
+
+
+def bench_dice(depth: int, count: int, seed: int, repeat: int):
+    import math
+    from dice import MAX_SIXES, DiceRules, dice_table
+
+    variants = {"standard": DiceRules(),
+                "no forfeit": DiceRules(three_sixes_forfeit=False),
+                "capture bonus": DiceRules(capture_bonus=True)}
+    print("Roll distributions by six streak (probability sum, expected roll)")
+    for name, rules in variants.items():
+        table = dice_table(rules)
+        sums = [math.fsum(p for _, p in table.distribution[sixes]) for sixes in range(MAX_SIXES + 1)]
+        expected = [math.fsum(v * p for v, p in table.distribution[sixes]) for sixes in range(MAX_SIXES + 1)]
+        assert all(total == 1.0 for total in sums), sums
+        forfeits = [sum(outcome.forfeit for outcome in row) for row in table.outcomes]
+        print(f"  {name:>13}: sums {sums}  expected {expected}  forfeiting faces {forfeits}")
+
+    table = dice_table(DiceRules())
+    streaks = [sixes for _ in range(repeat) for sixes in range(MAX_SIXES + 1)]
+    start = time.perf_counter()
+    for sixes in streaks:
+        for _ in list({value: 1 / 6 for value in range(1, 7)}.items()):
+            pass
+    per_dict = (time.perf_counter() - start) / len(streaks)
+    start = time.perf_counter()
+    for sixes in streaks:
+        for _ in table.distribution[sixes]:
+            pass
+    per_table = (time.perf_counter() - start) / len(streaks)
+    print(f"Chance node distribution: new dict {per_dict * 1e9:6.0f} ns, table {per_table * 1e9:6.0f} ns")
+
+    positions = sample_positions(count, seed)
+    print(f"Depth {depth} search of {len(positions)} positions")
+    reference = None
+    for name, rules in variants.items():
+        engine = Expectiminimax(depth=depth, dice_rules=rules)
+        nodes = 0
+        moves = []
+        start = time.perf_counter()
+        for position in positions:
+            result = engine.search(position, use_book=False)
+            nodes += result.nodes_visited
+            moves.append(result.best_slot)
+        elapsed = time.perf_counter() - start
+        reference = reference or moves
+        same = sum(a == b for a, b in zip(moves, reference))
+        print(f"  {name:>13}: {nodes:>8} nodes  {elapsed:6.2f}s  same best move as standard {same}/{len(positions)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    pruning = subparsers.add_parser("pruning", help="compare chance-node pruning modes")
+    pruning.add_argument("--depth", type=int, default=4)
+    pruning.add_argument("--positions", type=int, default=20)
+    pruning.add_argument("--seed", type=int, default=0)
+    pruning.add_argument("--tt-size", type=int, default=0)
+
+    parallel = subparsers.add_parser("parallel", help="scale the root search over worker processes")
+    parallel.add_argument("--depth", type=int, default=4)
+    parallel.add_argument("--positions", type=int, default=10)
+    parallel.add_argument("--seed", type=int, default=0)
+    parallel.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parallel.add_argument("--split-chance", action="store_true")
+
+    movegen = subparsers.add_parser("movegen", help="moves per second of move generation")
+    movegen.add_argument("--positions", type=int, default=200)
+    movegen.add_argument("--seed", type=int, default=0)
+    movegen.add_argument("--repeat", type=int, default=20)
+
+    batch_eval = subparsers.add_parser("batch-eval", help="NumPy batched leaf evaluation")
+    batch_eval.add_argument("--depth", type=int, default=4)
+    batch_eval.add_argument("--positions", type=int, default=20)
+    batch_eval.add_argument("--seed", type=int, default=0)
+
+    multiplayer = subparsers.add_parser("multiplayer", help="paranoid vs max-n with 3-4 players")
+    multiplayer.add_argument("--depth", type=int, default=3)
+    multiplayer.add_argument("--positions", type=int, default=20)
+    multiplayer.add_argument("--seed", type=int, default=0)
+    multiplayer.add_argument("--players", type=int, default=4, choices=(2, 3, 4))
+
+    history = subparsers.add_parser("history", help="memory of State history over a long game")
+    history.add_argument("--turns", type=int, default=500)
+    history.add_argument("--seed", type=int, default=0)
+    history.add_argument("--retention", type=int, default=64)
+    history.add_argument("--parent-chain-turns", type=int, default=40)
+
+    opening = subparsers.add_parser("book", help="hit rate and move time with an opening book")
+    opening.add_argument("path")
+    opening.add_argument("--depth", type=int, default=4)
+    opening.add_argument("--games", type=int, default=20)
+    opening.add_argument("--seed", type=int, default=1)
+    opening.add_argument("--rolls", type=int, default=40)
+
+    incremental = subparsers.add_parser("incremental", help="incremental vs full leaf evaluation")
+    incremental.add_argument("--depth", type=int, default=3)
+    incremental.add_argument("--positions", type=int, default=20)
+    incremental.add_argument("--seed", type=int, default=0)
+    incremental.add_argument("--players", type=int, default=2, choices=(2, 3, 4))
+
+    mcts = subparsers.add_parser("mcts", help="MCTS strength against a fixed opponent")
+    mcts.add_argument("--opponent", default="expectiminimax:2")
+    mcts.add_argument("--iterations", type=int, nargs="+", default=[100, 300, 1000])
+    mcts.add_argument("--games", type=int, default=20)
+    mcts.add_argument("--seed", type=int, default=0)
+    mcts.add_argument("--workers", type=int, default=1)
+
+    playout = subparsers.add_parser("playout", help="random playout throughput")
+    playout.add_argument("--games", type=int, default=200)
+    playout.add_argument("--seed", type=int, default=0)
+    playout.add_argument("--players", type=int, default=2, choices=(2, 3, 4))
+    playout.add_argument("--batch-sizes", type=int, nargs="+", default=[100, 1000, 10000])
+
+    suite = subparsers.add_parser("suite", help="fixed position corpus with baseline comparison")
+    suite.add_argument("--depths", type=int, nargs="+", default=[2, 4, 6])
+    suite.add_argument("--corpus", default=CORPUS_PATH)
+    suite.add_argument("--write-corpus", action="store_true", help="regenerate the corpus first")
+    suite.add_argument("--save", help="write the results to this JSON file")
+    suite.add_argument("--baseline", help="compare against results saved with --save")
+    suite.add_argument("--tolerance", type=float, default=0.15)
+    suite.add_argument("--repeat", type=int, default=3)
+
+    records = subparsers.add_parser("records", help="game record file size and replay speed")
+    records.add_argument("--games", type=int, default=500)
+    records.add_argument("--seed", type=int, default=0)
+    records.add_argument("--path", default=os.path.join(tempfile.gettempdir(), "benchmark_games.rec"))
+
+    symmetry = subparsers.add_parser("symmetry", help="TT and book hit rates with canonical keys")
+    symmetry.add_argument("--depth", type=int, default=4)
+    symmetry.add_argument("--games", type=int, default=4)
+    symmetry.add_argument("--plies", type=int, default=30, help="decisions per game")
+    symmetry.add_argument("--seed", type=int, default=0)
+    symmetry.add_argument("--players", type=int, default=2, choices=(2, 3, 4))
+    symmetry.add_argument("--book-games", type=int, default=2000)
+
+    eval_cache = subparsers.add_parser("eval-cache", help="leaf evaluation cache capacities")
+    eval_cache.add_argument("--depth", type=int, default=4)
+    eval_cache.add_argument("--positions", type=int, default=20)
+    eval_cache.add_argument("--seed", type=int, default=0)
+    eval_cache.add_argument("--players", type=int, default=2, choices=(2, 3, 4))
+    eval_cache.add_argument("--capacities", type=int, nargs="+", default=[0, 256, 4096, 1 << 16])
+
+    race = subparsers.add_parser("race", help="race table lookups and search with exact race values")
+    race.add_argument("--path", default=os.path.join(tempfile.gettempdir(), "race_table.bin"),
+                      help="race table, solved first if missing")
+    race.add_argument("--max-distance", type=int, default=7)
+    race.add_argument("--positions", type=int, default=200, help="positions of each kind")
+    race.add_argument("--depth", type=int, default=4)
+    race.add_argument("--seed", type=int, default=0)
+
+    analysis = subparsers.add_parser("analyze", help="batch analysis with shared tables and workers")
+    analysis.add_argument("--depth", type=int, default=4)
+    analysis.add_argument("--games", type=int, default=4)
+    analysis.add_argument("--plies", type=int, default=30, help="decisions per game")
+    analysis.add_argument("--seed", type=int, default=0)
+    analysis.add_argument("--players", type=int, default=2, choices=(2, 3, 4))
+    analysis.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+
+    ordering = subparsers.add_parser("ordering", help="node counts with and without move ordering")
+    ordering.add_argument("--depths", type=int, nargs="+", default=[4, 5, 6])
+    ordering.add_argument("--corpus", default=CORPUS_PATH)
+
+    dice = subparsers.add_parser("dice", help="roll tables by six streak and dice rule variants")
+    dice.add_argument("--depth", type=int, default=4)
+    dice.add_argument("--positions", type=int, default=20)
+    dice.add_argument("--seed", type=int, default=0)
+    dice.add_argument("--repeat", type=int, default=100000)
+
+    args = parser.parse_args()
+    if args.benchmark == "pruning":
+        bench_chance_pruning(args.depth, args.positions, args.seed, args.tt_size)
+    elif args.benchmark == "parallel":
+        bench_parallel(args.depth, args.positions, args.seed, args.workers, args.split_chance)
+    elif args.benchmark == "movegen":
+        bench_move_generation(args.positions, args.seed, args.repeat)
+    elif args.benchmark == "batch-eval":
+        bench_batch_evaluation(args.depth, args.positions, args.seed)
+    elif args.benchmark == "multiplayer":
+        bench_multiplayer(args.depth, args.positions, args.seed, args.players)
+    elif args.benchmark == "history":
+        bench_history(args.turns, args.seed, args.retention, args.parent_chain_turns)
+    elif args.benchmark == "book":
+        bench_opening_book(args.path, args.depth, args.games, args.seed, args.rolls)
+    elif args.benchmark == "incremental":
+        bench_incremental_evaluation(args.depth, args.positions, args.seed, args.players)
+    elif args.benchmark == "mcts":
+        bench_mcts(args.opponent, args.iterations, args.games, args.seed, args.workers)
+    elif args.benchmark == "playout":
+        bench_playout(args.games, args.seed, args.players, args.batch_sizes)
+    elif args.benchmark == "suite":
+        bench_suite(args.depths, args.corpus, args.save, args.baseline, args.tolerance,
+                    args.write_corpus, args.repeat)
+    elif args.benchmark == "records":
+        bench_game_records(args.games, args.seed, args.path)
+    elif args.benchmark == "symmetry":
+        bench_symmetry(args.depth, args.games, args.plies, args.seed, args.players, args.book_games)
+    elif args.benchmark == "eval-cache":
+        bench_eval_cache(args.depth, args.positions, args.seed, args.players, args.capacities)
+    elif args.benchmark == "race":
+        bench_race(args.path, args.max_distance, args.positions, args.depth, args.seed)
+    elif args.benchmark == "analyze":
+        bench_analysis(args.depth, args.games, args.plies, args.seed, args.players, args.workers)
+    elif args.benchmark == "ordering":
+        bench_move_ordering(args.depths, args.corpus)
+    elif args.benchmark == "dice":
+        bench_dice(args.depth, args.positions, args.seed, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,74 @@ from cell import Cell
 from color import Color
 from player import Player
 
+PATHS = {
+    Color.BLUE: {"start": 0, "end": 50, "home_start": 52},
+    Color.RED: {"start": 13, "end": 11, "home_start": 58},
+    Color.GREEN: {"start": 26, "end": 24, "home_start": 64},
+    Color.YELLOW: {"start": 39, "end": 37, "home_start": 70}
+}
+
+SAFE_CELLS = frozenset(path["start"] for path in PATHS.values())
+
+
+def next_position(current_pos: int, steps: int, color: Color) -> int:
+    """Calculate next position considering home path"""
+    path = PATHS[color]
+    
+    if current_pos == -1:
+        if steps == 6:
+            return path["start"]
+        return -1
+    
+    new_pos = current_pos + steps
+    if current_pos >= path["home_start"]:
+        home_end = path["home_start"] + 5
+        if new_pos <= home_end:
+            return new_pos
+        return -1
+    if new_pos > path["end"] and current_pos <= path["end"]:
+        overflow = new_pos - path["end"] - 1
+        home_pos = path["home_start"] + overflow
+        if home_pos <= path["home_start"] + 5:
+            return home_pos
+        return -1
+    if new_pos > 51:
+        new_pos = new_pos - 52
+
+    return new_pos
+
+
+def _build_move_table():
+    """(position, steps) -> (destination, squares walked through) for every colour.
+
+    Indexed as MOVE_TABLE[color][position + 1][steps]; the destination is -1
+    for an illegal move and the squares include the destination itself.
+    Leaving the home yard walks through no squares, like Piece.can_move.
+    """
+    table = {}
+    for color in PATHS:
+        rows = []
+        for position in range(-1, 76):
+            row = [(-1, ())]
+            for steps in range(1, 7):
+                target = next_position(position, steps, color)
+                squares = []
+                if target != -1 and position != -1:
+                    current = position
+                    while current != target:
+                        current = next_position(current, 1, color)
+                        squares.append(current)
+                row.append((target, tuple(squares)))
+            rows.append(row)
+        table[color] = rows
+    return table
+
+
+MOVE_TABLE = _build_move_table()
+
+
 class Board:
-    def __init__(self, player_color: Color, computer_color: Color, is_computer_list):
+    def __init__(self, player_colors, is_computer_list, verbose: bool = False):
         self.cells = [Cell(Color.WHITE) for _ in range(76)]
         for i in range(52, 58):
             self.cells[i].color = Color.BLUE
@@ -14,12 +80,7 @@ class Board:
         for i in range(70, 76):
             self.cells[i].color = Color.YELLOW
         
-        self.paths = {
-            Color.BLUE: {"start": 0, "end": 50, "home_start": 52},
-            Color.RED: {"start": 13, "end": 11, "home_start": 58},
-            Color.GREEN: {"start": 26, "end": 24, "home_start": 64},
-            Color.YELLOW: {"start": 39, "end": 37, "home_start": 70}
-        }
+        self.paths = PATHS
         
         '''
         #TODO 
@@ -28,10 +89,11 @@ class Board:
         
         
       
-        self.player1 = Player(player_color, is_computer_list[0])
-        self.player2 = Player(computer_color, is_computer_list[1])
+        self.players = [Player(color, is_computer)
+                        for color, is_computer in zip(player_colors, is_computer_list)]
         
-        self.current_player = self.player1
+        self.current_player = self.players[0]
+        self.verbose = verbose
         
         self._initialize_board()
     
@@ -41,6 +103,14 @@ class Board:
             self.cells[start_pos].color = color
             self.cells[start_pos].is_safe = True
     
+    @property
+    def player1(self) -> Player:
+        return self.players[0]
+
+    @property
+    def player2(self) -> Player:
+        return self.players[1]
+
     def get_cell(self, position: int) -> Cell:
         """Get the cell at the specified position"""
         if 0 <= position < 76:  
@@ -49,29 +119,13 @@ class Board:
 
     def get_next_position(self, current_pos: int, steps: int, color: Color) -> int:
         """Calculate next position considering home path"""
-        path = self.paths[color]
-        
-        if current_pos == -1:
-            if steps == 6:
-                return path["start"]
-            return -1
-        
-        new_pos = current_pos + steps
-        if current_pos >= path["home_start"]:
-            home_end = path["home_start"] + 5
-            if new_pos <= home_end:
-                return new_pos
-            return -1
-        if new_pos > path["end"] and current_pos <= path["end"]:
-            overflow = new_pos - path["end"] - 1
-            home_pos = path["home_start"] + overflow
-            if home_pos <= path["home_start"] + 5:
-                return home_pos
-            return -1
-        if new_pos > 51:
-            new_pos = new_pos - 52
-
-        return new_pos
+        if -1 <= current_pos < 76 and 1 <= steps <= 6:
+            return MOVE_TABLE[color][current_pos + 1][steps][0]
+        return next_position(current_pos, steps, color)
+
+    def get_move_path(self, current_pos: int, steps: int, color: Color) -> tuple:
+        """Destination and the squares walked through on the way, from MOVE_TABLE"""
+        return MOVE_TABLE[color][current_pos + 1][steps]
 
     def print_board(self):
         """Enhanced board printing with home paths"""
@@ -170,7 +224,7 @@ class Board:
         
         
         print("\nPieces in home:")
-        for player in [self.player1, self.player2]:
+        for player in self.players:
             home_pieces = [p for p in player.pieces if p.is_home]
             if home_pieces:
                 print(f"{COLORS[player.color]}{player.color.value}: " + 
@@ -178,15 +232,18 @@ class Board:
                       f"{COLORS['RESET']}")
 
     def switch_player(self):
-        self.current_player = self.player2 if self.current_player == self.player1 else self.player1
+        index = self.players.index(self.current_player)
+        self.current_player = self.players[(index + 1) % len(self.players)]
 
     def move_piece(self, piece, steps):
-        print(f"piece position {piece.position}")
+        if self.verbose:
+            print(f"piece position {piece.position}")
         next_pos = self.get_next_position(piece.position, steps, piece.color)
         path = self.paths[piece.color]
         
         if not piece.can_move(steps, self):
-            print('piece cantmove')
+            if self.verbose:
+                print('piece cantmove')
             return False
         old_pos = piece.position
         new_cell = self.get_cell(next_pos)
@@ -194,7 +251,8 @@ class Board:
 
         
         if not new_cell:
-            print('not cell')
+            if self.verbose:
+                print('not cell')
             return False
         
         captured_opponent = False
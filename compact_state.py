@@ -0,0 +1,274 @@
+import math
+from typing import NamedTuple, Optional, Tuple
+from board import MOVE_TABLE, PATHS, SAFE_CELLS
+from color import Color
+from dice import STANDARD_DICE, DiceTable
+from zobrist import DICE_KEYS, SIXES_KEYS, TURN_KEYS, hash_position, piece_key, seating_key
+
+HOME = -1
+# Squares 0-51 are the shared track; the home columns start at 52.
+TRACK_SQUARES = 52
+PIECES_PER_PLAYER = 4
+
+PIECE_VALUE = 25.0
+PROGRESS_WEIGHT = 0.8
+SAFE_SPOT_BONUS = 15.0
+WINNING_BONUS = 500.0
+HOME_PENALTY = -10.0
+CAPTURE_OPPORTUNITY = 20.0
+NEAR_HOME_BONUS = 35.0
+RISK_PENALTY = -12.0
+OPPONENT_WEIGHT = 0.7
+
+DONE_POSITION = {color: path["home_start"] + 5 for color, path in PATHS.items()}
+
+
+class CompactState(NamedTuple):
+    """Immutable search state: one board position per piece, no object graph.
+
+    `positions` holds 4 entries per seat in seat order (-1 is the home yard,
+    `home_start + 5` is done), `colors` the colour of each seat, `turn` the
+    seat to move and `sixes` how many sixes that seat already rolled this
+    turn. `dice_value` is None at chance nodes. `key` is the Zobrist hash of
+    all of the above, updated incrementally by the successor methods, which
+    follow the forfeit and extra-roll rules of the DiceTable they are given.
+    """
+    positions: Tuple[int, ...]
+    colors: Tuple[Color, ...]
+    turn: int
+    sixes: int = 0
+    dice_value: Optional[int] = None
+    key: int = 0
+
+    @classmethod
+    def from_players(cls, players, current_player, dice_value=None, sixes=0) -> 'CompactState':
+        positions = tuple(piece.position for player in players for piece in player.pieces)
+        colors = tuple(player.color for player in players)
+        turn = colors.index(current_player.color)
+        return cls.create(positions, colors, turn, sixes, dice_value)
+
+    @classmethod
+    def create(cls, positions, colors, turn: int, sixes: int = 0, dice_value=None) -> 'CompactState':
+        positions = tuple(positions)
+        colors = tuple(colors)
+        key = hash_position(positions, colors, turn, sixes, dice_value)
+        return cls(positions, colors, turn, sixes, dice_value, key)
+
+    @classmethod
+    def from_state(cls, state) -> 'CompactState':
+        # sixes rolled before the current roll, or before the next one if none is showing
+        rolls = state.get_last_n_dice_values(3)
+        sixes = min(len(rolls) - (state.dice_value is not None), 2)
+        return cls.from_players(state.players, state.current_player, state.dice_value, sixes)
+
+    @classmethod
+    def from_board(cls, board, dice_value=None, sixes=0) -> 'CompactState':
+        return cls.from_players(board.players, board.current_player, dice_value, sixes)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'CompactState':
+        return cls.create(data["positions"], [Color(color) for color in data["colors"]],
+                          data["turn"], data.get("sixes", 0), data.get("dice_value"))
+
+    def to_dict(self) -> dict:
+        """JSON-friendly form without the key, which from_dict recomputes"""
+        return {"positions": list(self.positions), "colors": [color.value for color in self.colors],
+                "turn": self.turn, "sixes": self.sixes, "dice_value": self.dice_value}
+
+    def placement_key(self) -> int:
+        """Zobrist key of the piece positions alone, without seat order, turn, six streak or dice"""
+        return (self.key ^ seating_key(self.colors) ^ TURN_KEYS[self.colors[self.turn]]
+                ^ SIXES_KEYS[self.sixes] ^ DICE_KEYS[self.dice_value or 0])
+
+    def seat_slots(self, seat: int) -> range:
+        return range(seat * PIECES_PER_PLAYER, (seat + 1) * PIECES_PER_PLAYER)
+
+    def is_piece_done(self, slot: int) -> bool:
+        return self.positions[slot] == DONE_POSITION[self.colors[slot // PIECES_PER_PLAYER]]
+
+    def is_winning(self, seat: int) -> bool:
+        done = DONE_POSITION[self.colors[seat]]
+        return all(self.positions[i] == done for i in self.seat_slots(seat))
+
+    def is_terminal(self) -> bool:
+        return any(self.is_winning(seat) for seat in range(len(self.colors)))
+
+    def walls(self) -> dict:
+        """Squares blocked by two or more pieces of one seat, mapped to that seat"""
+        occupied = [position for position in self.positions if position != HOME]
+        if len(set(occupied)) == len(occupied):
+            return {}
+        occupants = {}
+        for slot, position in enumerate(self.positions):
+            if position != HOME:
+                occupants.setdefault(position, []).append(slot // PIECES_PER_PLAYER)
+        return {position: seats[0] for position, seats in occupants.items()
+                if len(seats) >= 2 and seats.count(seats[0]) == len(seats)}
+
+    def destination(self, slot: int, walls: Optional[dict] = None) -> int:
+        """Target square of a piece for the current dice value, -1 if it cannot move"""
+        seat = slot // PIECES_PER_PLAYER
+        target, squares = MOVE_TABLE[self.colors[seat]][self.positions[slot] + 1][self.dice_value]
+        if target == -1:
+            return -1
+        if walls is None:
+            walls = self.walls()
+        if walls:
+            for square in squares:
+                owner = walls.get(square)
+                if owner is not None:
+                    return target if owner == seat else -1
+        return target
+
+    def valid_moves(self, dice: DiceTable = STANDARD_DICE) -> Tuple[int, ...]:
+        """Slots of the pieces the side to move can play with `dice_value`"""
+        if dice.outcomes[self.sixes][self.dice_value - 1].forfeit:
+            return ()
+        walls = self.walls()
+        if walls:
+            return tuple(slot for slot in self.seat_slots(self.turn)
+                         if self.destination(slot, walls) != -1)
+        rows = MOVE_TABLE[self.colors[self.turn]]
+        positions = self.positions
+        dice_value = self.dice_value
+        return tuple(slot for slot in self.seat_slots(self.turn)
+                     if rows[positions[slot] + 1][dice_value][0] != -1)
+
+    def apply_dice_roll(self, value: int) -> 'CompactState':
+        return self._replace(dice_value=value, key=self.key ^ DICE_KEYS[value])
+
+    def apply_move(self, slot: int, dice: DiceTable = STANDARD_DICE) -> 'CompactState':
+        target = self.destination(slot)
+        colors = self.colors
+        positions = list(self.positions)
+        seat = slot // PIECES_PER_PLAYER
+        key = self.key
+        captured = False
+        if target not in SAFE_CELLS:
+            for other, other_position in enumerate(positions):
+                if other_position == target and other // PIECES_PER_PLAYER != seat:
+                    color = colors[other // PIECES_PER_PLAYER]
+                    number = other % PIECES_PER_PLAYER
+                    key ^= piece_key(color, number, target) ^ piece_key(color, number, HOME)
+                    positions[other] = HOME
+                    captured = True
+        number = slot % PIECES_PER_PLAYER
+        key ^= piece_key(colors[seat], number, positions[slot]) ^ piece_key(colors[seat], number, target)
+        positions[slot] = target
+        return self._end_move(tuple(positions), key, dice, captured)
+
+    def pass_turn(self, dice: DiceTable = STANDARD_DICE) -> 'CompactState':
+        return self._end_move(self.positions, self.key, dice)
+
+    def _end_move(self, positions, key: int, dice: DiceTable, captured: bool = False) -> 'CompactState':
+        key ^= DICE_KEYS[self.dice_value] ^ SIXES_KEYS[self.sixes]
+        outcome = dice.outcomes[self.sixes][self.dice_value - 1]
+        if outcome.extra_roll or (captured and dice.rules.capture_bonus):
+            sixes = outcome.next_sixes
+            return CompactState(positions, self.colors, self.turn, sixes, None,
+                                key ^ SIXES_KEYS[sixes])
+        turn = (self.turn + 1) % len(self.colors)
+        key ^= TURN_KEYS[self.colors[self.turn]] ^ TURN_KEYS[self.colors[turn]]
+        return CompactState(positions, self.colors, turn, 0, None, key)
+
+    def evaluate(self, seat: int) -> float:
+        """The engine's heuristic score of the position for `seat`; State.evaluate uses it too.
+
+        A win or loss scores +-WINNING_BONUS. Otherwise each of the seat's
+        pieces adds its own term: a bonus once done, HOME_PENALTY in the
+        yard, NEAR_HOME_BONUS plus progress in the home column, and on the
+        track its progress, SAFE_SPOT_BONUS on a safe square or else
+        RISK_PENALTY and half CAPTURE_OPPORTUNITY per opponent 1-6 squares
+        ahead. Finished opponent pieces count against the seat, and each
+        opponent 1-6 squares ahead of a track piece adds a capture chance
+        weighted by its distance.
+
+        Only pieces on the shared track threaten each other, threats to a
+        piece count nearest first and the terms are summed exactly, so the
+        score does not change under colour rotation or with the order of a
+        seat's pieces (see symmetry.py).
+        """
+        if self.is_winning(seat):
+            return WINNING_BONUS
+        opponents = [s for s in range(len(self.colors)) if s != seat]
+        if any(self.is_winning(s) for s in opponents):
+            return -WINNING_BONUS
+
+        color = self.colors[seat]
+        path = PATHS[color]
+        done = DONE_POSITION[color]
+        mine = [self.positions[i] for i in self.seat_slots(seat)]
+        track_opponents = []
+        opponents_done = 0
+        for s in opponents:
+            opponent_done = DONE_POSITION[self.colors[s]]
+            for i in self.seat_slots(s):
+                position = self.positions[i]
+                if position == opponent_done:
+                    opponents_done += 1
+                elif position != HOME and position < TRACK_SQUARES:
+                    track_opponents.append(position)
+
+        terms = []
+        track_mine = []
+        for position in mine:
+            if position == done:
+                terms.append(PIECE_VALUE * 2 + WINNING_BONUS * 0.2)
+                continue
+
+            if position == HOME:
+                terms.append(HOME_PENALTY)
+                continue
+
+            if position >= path["home_start"]:
+                home_progress = (position - path["home_start"]) / 5.0
+                terms.append(NEAR_HOME_BONUS + (home_progress * PIECE_VALUE))
+                continue
+
+            track_mine.append(position)
+            total_distance = (path["end"] - path["start"]) % 52
+            current_distance = (position - path["start"]) % 52
+            progress = current_distance / total_distance
+            terms.append(progress * PIECE_VALUE * PROGRESS_WEIGHT)
+
+            if position in SAFE_CELLS:
+                terms.append(SAFE_SPOT_BONUS)
+            else:
+                distances = sorted(distance for distance in
+                                   ((opponent_position - position) % 52
+                                    for opponent_position in track_opponents)
+                                   if 1 <= distance <= 6)
+                for threats, distance in enumerate(distances, 1):
+                    terms.append((7 - distance) * RISK_PENALTY / max(threats, 2))
+                    if distance <= 3:
+                        terms.append(CAPTURE_OPPORTUNITY / 2)
+
+        terms.append(-PIECE_VALUE * OPPONENT_WEIGHT * opponents_done)
+        for opponent_position in track_opponents:
+            for position in track_mine:
+                distance = (opponent_position - position) % 52
+                if 1 <= distance <= 6:
+                    terms.append(CAPTURE_OPPORTUNITY * (7 - distance) / 6)
+
+        return math.fsum(terms)
+
+
+def evaluation_bounds(num_players: int) -> Tuple[float, float]:
+    """Lower and upper bound of CompactState.evaluate for a game with `num_players` seats"""
+    opponent_pieces = PIECES_PER_PLAYER * (num_players - 1)
+    done_value = PIECE_VALUE * 2 + WINNING_BONUS * 0.2
+    best_piece = (NEAR_HOME_BONUS + PIECE_VALUE * 4 / 5.0
+                  + CAPTURE_OPPORTUNITY * opponent_pieces)
+    upper = max(done * done_value + (PIECES_PER_PLAYER - done) * best_piece
+                for done in range(PIECES_PER_PLAYER))
+
+    worst_piece = sum(
+        min((7 - distance) * RISK_PENALTY / max(threats, 2)
+            + (CAPTURE_OPPORTUNITY / 2 if distance <= 3 else 0.0)
+            for distance in range(1, 7))
+        for threats in range(1, opponent_pieces + 1))
+    worst_piece = min(worst_piece, HOME_PENALTY)
+    opponents_done = (PIECES_PER_PLAYER - 1) * (num_players - 1)
+    lower = (PIECES_PER_PLAYER * worst_piece
+             - PIECE_VALUE * OPPONENT_WEIGHT * opponents_done)
+    return min(lower, -WINNING_BONUS), max(upper, WINNING_BONUS)
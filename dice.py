@@ -1,38 +1,80 @@
+import functools
 import random
+from types import MappingProxyType
+from typing import NamedTuple
+
+FACES = 6
+# Six streaks are counted up to this; without the three-sixes forfeit longer streaks share it.
+MAX_SIXES = 2
+
+
+class DiceRules(NamedTuple):
+    """Turn rules that depend on the roll"""
+    three_sixes_forfeit: bool = True   # a six after two sixes ends the turn without a move
+    capture_bonus: bool = False        # capturing a piece earns another roll
+
+
+STANDARD_RULES = DiceRules()
+
+
+class RollOutcome(NamedTuple):
+    value: int
+    probability: float
+    forfeit: bool       # the turn ends without a move
+    extra_roll: bool    # the same seat rolls again after playing it
+    next_sixes: int     # six streak of that roll
+
+
+class DiceTable:
+    """The next roll for every six streak under one set of rules, computed once.
+
+    `outcomes[sixes]` holds a RollOutcome per face and `distribution[sixes]`
+    the same rolls as (value, probability) pairs, which is what chance nodes
+    iterate; `probabilities[sixes]` is a read-only {value: probability}.
+    All of them are shared tuples and mappings, so nothing is allocated per
+    chance node. Use `dice_table` to get the shared table for a DiceRules.
+    """
+
+    def __init__(self, rules: DiceRules = STANDARD_RULES):
+        self.rules = rules
+        outcomes = []
+        for sixes in range(MAX_SIXES + 1):
+            row = []
+            for value in range(1, FACES + 1):
+                forfeit = rules.three_sixes_forfeit and value == 6 and sixes >= MAX_SIXES
+                extra_roll = value == 6 and not forfeit
+                next_sixes = min(sixes + 1, MAX_SIXES) if extra_roll else 0
+                row.append(RollOutcome(value, 1 / FACES, forfeit, extra_roll, next_sixes))
+            outcomes.append(tuple(row))
+        self.outcomes = tuple(outcomes)
+        self.distribution = tuple(tuple((outcome.value, outcome.probability) for outcome in row)
+                                  for row in outcomes)
+        self.probabilities = tuple(MappingProxyType(dict(row)) for row in self.distribution)
+
+
+@functools.lru_cache(maxsize=None)
+def dice_table(rules: DiceRules = STANDARD_RULES) -> DiceTable:
+    return DiceTable(rules)
+
+
+STANDARD_DICE = dice_table(STANDARD_RULES)
+
 
 class Dice:
-    def __init__(self):
+    def __init__(self, seed=None, rules: DiceRules = STANDARD_RULES):
         self.current_value = None
-        self._calculate_probabilities()
-        
-    def _calculate_probabilities(self):
-        self.probabilities = {}
-        for value in range(1, 6):
-            self.probabilities[(value,)] = 1/6
-        self.probabilities[(6,)] = 1/6
-        for second in range(1, 6):
-            self.probabilities[(6, second)] = 1/36
-        self.probabilities[(6, 6)] = 1/36
-        for third in range(1, 7):
-            self.probabilities[(6, 6, third)] = 1/216
-    
+        self.rng = random.Random(seed)
+        self.table = dice_table(rules)
+
     def get_probabilities(self, current_sequence=None):
-        if not current_sequence:
-            return {i: 1/6 for i in range(1, 7)}
-            
-        if len(current_sequence) == 1:
-            if current_sequence[0] == 6:
-                return {i: 1/6 for i in range(1, 7)}
-            else:
-                return {}
-                
-        if len(current_sequence) == 2:
-            if all(x == 6 for x in current_sequence):
-                return {i: 1/6 for i in range(1, 7)}
-            else:
-                return {}
-        return {}
-    
+        """Distribution of the next roll after `current_sequence`, the turn's rolls so far"""
+        sixes = 0
+        for value in reversed(current_sequence or ()):
+            if value != 6:
+                break
+            sixes += 1
+        return self.table.probabilities[min(sixes, MAX_SIXES)]
+
     def roll(self):
-        self.current_value = random.randint(1, 6)
-        return self.current_value 
\ No newline at end of file
+        self.current_value = self.rng.randint(1, 6)
+        return self.current_value
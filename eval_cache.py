@@ -0,0 +1,51 @@
+from collections import OrderedDict
+from typing import Optional
+
+
+class EvaluationCache:
+    """Leaf evaluations by position key, evicting the least recently used entry.
+
+    The key is expected to cover only what the evaluation reads: the piece
+    placement and the seat it is scored for (CompactState.placement_key or
+    symmetry.canonical_placement_key), so placements reached through
+    different dice orders share one entry. A capacity of 0 disables the cache.
+    """
+
+    def __init__(self, capacity: int = 1 << 16):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def clear(self):
+        self.entries.clear()
+        self.reset_stats()
+
+    @property
+    def hit_rate(self) -> float:
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def probe(self, key: int) -> Optional[float]:
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def store(self, key: int, value: float):
+        if self.capacity <= 0:
+            return
+        self.entries[key] = value
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self.entries)
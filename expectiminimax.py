@@ -1,11 +1,22 @@
-from dice import Dice
-from piece import Piece
+from dice import STANDARD_RULES, Dice, DiceRules, dice_table
 from state import State
+from board import SAFE_CELLS
+from compact_state import (TRACK_SQUARES, WINNING_BONUS, CompactState, PIECES_PER_PLAYER,
+                           evaluation_bounds)
 from player import Player
-from typing import Optional, List, Tuple
+from transposition import Bound, TranspositionTable
+from batch_eval import evaluate_batch, require_numpy
+from eval_cache import EvaluationCache
+from incremental_eval import IncrementalEvaluator
+from race import RaceTable
+from symmetry import canonical_key, canonical_placement_key, mover_rotation
+from zobrist import PERSPECTIVE_KEYS
+from typing import Dict, Iterable, Iterator, Optional, List, Tuple
 from dataclasses import dataclass
-import copy
 from enum import Enum
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+import time
 
 @dataclass(frozen=True)
 class Move:
@@ -13,15 +24,116 @@ class Move:
     steps: int
     score: float = 0.0
 
+@dataclass
+class SearchResult:
+    """Outcome and statistics of one Expectiminimax.search call.
+
+    `move_scores` maps the piece slot of every searched root move to its
+    expected value, in search order; `best_slot` is None without legal moves.
+    A `book_hit` result holds only the opening book move and no search.
+    The `eval_*` counters are the leaf evaluation cache statistics.
+    """
+    best_slot: Optional[int]
+    move_scores: Dict[int, float]
+    depth_reached: int
+    nodes_visited: int
+    max_nodes: int
+    min_nodes: int
+    chance_nodes: int
+    leaf_nodes: int
+    tt_hits: int
+    tt_misses: int
+    tt_collisions: int
+    elapsed: float
+    book_hit: bool = False
+    eval_hits: int = 0
+    eval_misses: int = 0
+    eval_evictions: int = 0
+
+    @property
+    def best_score(self) -> Optional[float]:
+        return None if self.best_slot is None else self.move_scores[self.best_slot]
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes_visited / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the iterative-deepening deadline passes"""
+
+
 class NodeType(Enum):
     MAX = 1
     MIN = 2
     CHANCE = 3
 
 class Expectiminimax:
-    def __init__(self, depth: int = 3, player: Player = None):
+    """Depth-limited expectiminimax over CompactState with explicit chance nodes.
+
+    With `multiplayer` "paranoid" every other seat minimises the searching
+    seat's score; with "maxn" each seat maximises its own. `chance_pruning`
+    "star1" or "star2" cuts chance nodes off using the evaluation bounds.
+    Results are kept in a transposition table of `tt_size` entries, keyed
+    by canonical position when `symmetry` is set. `time_budget_ms` on a
+    search deepens iteratively instead of using `depth`.
+
+    `move_ordering` tries the transposition table's move, captures, killer
+    moves and history first at MAX and MIN nodes. Ordering only pays off
+    where a node can be cut off, which needs a pruning window, so it has
+    no effect with `chance_pruning` "none" (the default).
+    """
+
+    CHANCE_PRUNING = ("none", "star1", "star2")
+    MULTIPLAYER = ("paranoid", "maxn")
+    MAX_ITERATIVE_DEPTH = 64
+    DEADLINE_CHECK_INTERVAL = 256
+    ANALYSIS_PREFETCH = 4
+
+    def __init__(self, depth: int = 3, player: Player = None,
+                 tt_size: int = 1 << 16, tt_replacement: str = "depth",
+                 chance_pruning: str = "none", workers: int = 1,
+                 split_chance: bool = False, reporter=None, leaf_batch_depth: int = 0,
+                 multiplayer: str = "paranoid", book=None, incremental_eval: bool = False,
+                 symmetry: bool = False, eval_cache_size: int = 1 << 16, race_table=None,
+                 move_ordering: bool = True, dice_rules: DiceRules = STANDARD_RULES):
+        if chance_pruning not in self.CHANCE_PRUNING:
+            raise ValueError(f"Unknown chance pruning mode: {chance_pruning}")
+        if multiplayer not in self.MULTIPLAYER:
+            raise ValueError(f"Unknown multiplayer search: {multiplayer}")
+        if dice_rules != STANDARD_RULES and (book is not None or race_table is not None):
+            raise ValueError("opening books and race tables are built for the standard dice rules")
+        self.multiplayer = multiplayer
         self.depth = depth
-        self.dice = Dice()
+        self.chance_pruning = chance_pruning
+        self.tt_size = tt_size
+        self.tt_replacement = tt_replacement
+        self.workers = workers
+        self.split_chance = split_chance
+        self._executor = None
+        if leaf_batch_depth > 0:
+            require_numpy()
+        self.leaf_batch_depth = leaf_batch_depth
+        self.incremental_eval = incremental_eval
+        self.symmetry = symmetry
+        self.eval_cache_size = eval_cache_size
+        self.eval_cache = EvaluationCache(eval_cache_size) if eval_cache_size > 0 else None
+        self.evaluator = None
+        if isinstance(race_table, str):
+            race_table = RaceTable(race_table)
+        self.race_table = race_table
+        self.move_ordering = move_ordering
+        # without chance pruning every MAX/MIN node gets the full window and cannot cut off
+        self._order_nodes = move_ordering and chance_pruning != "none"
+        # (colour, from, to) -> cutoff score, and per remaining depth the last two cutoff moves
+        self.history = {}
+        self.killers = {}
+        self.reporter = reporter
+        self.book = book
+        self.last_result = None
+        self.dice_rules = dice_rules
+        self.dice_table = dice_table(dice_rules)
+        self.dice = Dice(rules=dice_rules)
         self.nodes_visited = 0
         self.max_nodes = 0
         self.min_nodes = 0
@@ -32,6 +144,13 @@ class Expectiminimax:
         self.max_score = float('inf')
         self.min_score = float('-inf')
         self.player = player
+        self.root_seat = 0
+        self.perspective_key = 0
+        self.eval_bounds = (self.MIN_SCORE, self.MAX_SCORE)
+        self.deadline = None
+        self.depth_reached = 0
+        self.transposition_table = (TranspositionTable(tt_size, tt_replacement)
+                                    if tt_size > 0 else None)
         self.indent = 0
         self.verbose = False
         self.node_details = []
@@ -45,152 +164,641 @@ class Expectiminimax:
         self.min_nodes = 0
         self.chance_nodes = 0
         self.leaf_nodes = 0
+        if self.transposition_table is not None:
+            self.transposition_table.reset_stats()
+        if self.eval_cache is not None:
+            self.eval_cache.reset_stats()
 
-    def find_best_move(self, state: State) -> Optional[Move]:
-        dice_history = state.get_last_n_dice_values(3)
-        dice_history.reverse()
-        
-        print("\n=== Current Game State ===")
-        print(f"Current roll: {state.dice_value}")
-        if dice_history:
-            print(f"Roll sequence: {' → '.join(str(x) for x in dice_history + [state.dice_value])}")
-        
-        print("\n=== Piece Positions ===")
-        for piece in state.current_player.pieces:
-            position_type = "Home" if piece.is_home else "Done" if piece.is_done else str(piece.position)
-            cell = state.board.get_cell(piece.position) if not piece.is_home and not piece.is_done else None
-            safety_status = "Safe" if cell and cell.is_safe else "Vulnerable"
-            
-            print(f"Piece {piece.number}: {position_type} ({safety_status})")
-        
+    def _counters(self) -> tuple:
+        return (self.nodes_visited, self.max_nodes, self.min_nodes, self.chance_nodes,
+                self.leaf_nodes, self.tt_hits, self.tt_misses, self.tt_collisions,
+                self._eval_stats())
+
+    def _eval_stats(self) -> Tuple[int, int, int]:
+        cache = self.eval_cache
+        return (cache.hits, cache.misses, cache.evictions) if cache is not None else (0, 0, 0)
+
+    def _add_counters(self, counters: tuple):
+        (nodes, max_nodes, min_nodes, chance_nodes, leaf_nodes,
+         hits, misses, collisions, eval_stats) = counters
+        self.nodes_visited += nodes
+        self.max_nodes += max_nodes
+        self.min_nodes += min_nodes
+        self.chance_nodes += chance_nodes
+        self.leaf_nodes += leaf_nodes
+        if self.transposition_table is not None:
+            self.transposition_table.hits += hits
+            self.transposition_table.misses += misses
+            self.transposition_table.collisions += collisions
+        if self.eval_cache is not None:
+            self.eval_cache.hits += eval_stats[0]
+            self.eval_cache.misses += eval_stats[1]
+            self.eval_cache.evictions += eval_stats[2]
+
+    def close(self):
+        """Shut down the worker pool used when `workers` > 1"""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    @property
+    def tt_hits(self) -> int:
+        return self.transposition_table.hits if self.transposition_table is not None else 0
+
+    @property
+    def tt_misses(self) -> int:
+        return self.transposition_table.misses if self.transposition_table is not None else 0
+
+    @property
+    def tt_collisions(self) -> int:
+        return self.transposition_table.collisions if self.transposition_table is not None else 0
+
+    def find_best_move(self, state: State, time_budget_ms: Optional[int] = None) -> Optional[Move]:
+        """Pick a move for the side to move in `state`.
+
+        With `time_budget_ms` the search deepens one ply at a time and
+        returns the scores of the deepest iteration that finished in time;
+        otherwise it searches to the fixed `depth`. The full SearchResult is
+        kept in `last_result` and handed to `reporter`, if one is set.
+        """
+        result = self.search(state, time_budget_ms)
+        if self.reporter is not None:
+            self.reporter.report(state, result)
+        if result.best_slot is None:
+            return None
+        piece = state.current_player.pieces[result.best_slot % PIECES_PER_PLAYER]
+        return Move(piece=piece, steps=state.dice_value)
+
+    def search(self, state, time_budget_ms: Optional[int] = None,
+               depth: Optional[int] = None, use_book: bool = True) -> 'SearchResult':
+        """Search a State or CompactState without any output.
+
+        The opening `book`, if set, is probed first unless `use_book` is False.
+        """
+        start = time.perf_counter()
+        root = state if isinstance(state, CompactState) else CompactState.from_state(state)
         self._reset_counters()
-        
-        valid_moves = state.get_valid_moves()
-        if not valid_moves:
-            print("\n=== Search Statistics ===")
-            print("No valid moves available")
-            print(f"Nodes visited: {self.nodes_visited}")
+        if use_book and self.book is not None:
+            result = self._book_result(root, start)
+            if result is not None:
+                self.last_result = result
+                return result
+        self._prepare_root(root)
+        slots = self._order_slots(root, list(root.valid_moves(self.dice_table)))
+
+        slot_scores = {}
+        self.depth_reached = 0
+        if slots and time_budget_ms is None:
+            self.depth_reached = self.depth if depth is None else depth
+            slot_scores = self._score_moves_at(root, slots, self.depth_reached)
+        elif slots:
+            slot_scores = self._iterative_deepening(root, slots, time_budget_ms)
+
+        best_slot = max(slot_scores, key=slot_scores.get) if slot_scores else None
+        eval_hits, eval_misses, eval_evictions = self._eval_stats()
+        result = SearchResult(
+            best_slot=best_slot,
+            move_scores={slot: slot_scores[slot] for slot in slots if slot in slot_scores},
+            depth_reached=self.depth_reached,
+            nodes_visited=self.nodes_visited,
+            max_nodes=self.max_nodes,
+            min_nodes=self.min_nodes,
+            chance_nodes=self.chance_nodes,
+            leaf_nodes=self.leaf_nodes,
+            tt_hits=self.tt_hits,
+            tt_misses=self.tt_misses,
+            tt_collisions=self.tt_collisions,
+            elapsed=time.perf_counter() - start,
+            eval_hits=eval_hits,
+            eval_misses=eval_misses,
+            eval_evictions=eval_evictions,
+        )
+        self.last_result = result
+        return result
+
+    def _book_result(self, root: CompactState, start: float) -> Optional['SearchResult']:
+        book_move = self.book.probe(root)
+        if book_move is None:
             return None
-        
-        print("\n=== Move Analysis ===")
-        move_scores = {}
-        for piece, steps in self._order_moves(valid_moves):
-            move = Move(piece=piece, steps=steps)
-            new_state = state.apply_move(move)
-            score = self._expectiminimax(new_state, self.depth - 1, NodeType.CHANCE, 
-                                       self.MIN_SCORE, self.MAX_SCORE)
-            move_scores[move] = score
-            
-            next_pos = state.board.get_next_position(piece.position, steps, piece.color)
-            target_cell = state.board.get_cell(next_pos)
-            
-            print(f"\nMove Option: Piece {piece.number} → {steps} steps")
-            print(f"  Position: {piece.position if not piece.is_home else 'Home'} → {next_pos}")
-            print(f"  Score: {score:.2f}")
-            
-            if piece.is_home and steps == 6:
-                print("  Strategy: Getting new piece out")
-            elif target_cell:
-                if target_cell.is_safe:
-                    print("  Strategy: Moving to safe spot")
-                if target_cell.pieces and target_cell.pieces[0].color != piece.color:
-                    print("  Strategy: Capture opportunity")
-                
-                threats = []
-                for opp_piece in state.opponent.pieces:
-                    if not opp_piece.is_home and not opp_piece.is_done:
-                        distance = (opp_piece.position - next_pos) % 52
-                        if 1 <= distance <= 6:
-                            threats.append(f"Piece {opp_piece.number} at distance {distance}")
-                if threats:
-                    print(f"  Risks: Threatened by {', '.join(threats)}")
-        
-        best_move = max(move_scores.items(), key=lambda x: x[1])[0]
-        print("\n=== Selected Move ===")
-        print(f"Moving Piece {best_move.piece.number} by {best_move.steps} steps")
-        print(f"Expected Value: {move_scores[best_move]:.2f}")
-        
-        print("\n=== Search Statistics ===")
-        print(f"Total nodes visited: {self.nodes_visited}")
-        print(f"├── MAX nodes: {self.max_nodes}")
-        print(f"├── MIN nodes: {self.min_nodes}")
-        print(f"├── CHANCE nodes: {self.chance_nodes}")
-        print(f"└── Leaf nodes: {self.leaf_nodes}")
-        print(f"\nSearch depth: {self.depth}")
-        print(f"Best move score: {move_scores[best_move]:.2f}")
-        
-        return best_move
-    
-    def _order_moves(self, moves: List[Tuple['Piece', int]]) -> List[Tuple['Piece', int]]:
-        def move_score(move):
-            piece, steps = move
-            if piece.is_done:
-                return -1
-            if piece.is_home and steps == 6:
-                return 100
-            if piece.position + steps >= 56:
-                return 90
-            return 56 - (piece.position + steps)
-            
-        return sorted(moves, key=move_score, reverse=True)
+        slot, score = book_move
+        return SearchResult(slot, {slot: score}, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+                            time.perf_counter() - start, book_hit=True)
+
+    def analyze(self, positions: Iterable[Tuple[object, Optional[int]]],
+                time_budget_ms: Optional[int] = None, depth: Optional[int] = None,
+                use_book: bool = True) -> Iterator['SearchResult']:
+        """Search many positions, yielding one SearchResult per position in input order.
+
+        `positions` holds (State or CompactState, dice value) pairs; a dice
+        value of None keeps the position's own roll. The input is read
+        lazily, so it can be a generator over a large game log. The
+        transposition table and evaluation cache are kept across the batch;
+        their keys hold the seat order, so games with different seatings
+        can be mixed.
+        With `workers` > 1 whole positions are searched in parallel, each
+        worker process keeping its own tables, and up to
+        `ANALYSIS_PREFETCH` positions per worker are in flight.
+        """
+        roots = (self._analysis_root(position, dice_value) for position, dice_value in positions)
+        if self.workers <= 1:
+            for root in roots:
+                yield self.search(root, time_budget_ms, depth, use_book)
+            return
+
+        executor = self._pool()
+        pending = deque()
+        try:
+            for root in roots:
+                result = None
+                if use_book and self.book is not None:
+                    result = self._book_result(root, time.perf_counter())
+                if result is None:
+                    pending.append(executor.submit(_analysis_task, root, time_budget_ms, depth))
+                else:
+                    pending.append(result)
+                if len(pending) >= self.ANALYSIS_PREFETCH * self.workers:
+                    yield self._analysis_result(pending.popleft())
+            while pending:
+                yield self._analysis_result(pending.popleft())
+        finally:
+            for future in pending:
+                if isinstance(future, Future):
+                    future.cancel()
+
+    @staticmethod
+    def _analysis_root(position, dice_value: Optional[int]) -> CompactState:
+        root = position if isinstance(position, CompactState) else CompactState.from_state(position)
+        if dice_value is None or dice_value == root.dice_value:
+            return root
+        return CompactState.create(root.positions, root.colors, root.turn, root.sixes, dice_value)
+
+    @staticmethod
+    def _analysis_result(pending) -> 'SearchResult':
+        return pending.result() if isinstance(pending, Future) else pending
+
+    def score_moves(self, root: CompactState, depth: Optional[int] = None) -> dict:
+        """Search every legal move of `root` and return its value keyed by piece slot"""
+        return self.search(root, depth=depth, use_book=False).move_scores
+
+    def _iterative_deepening(self, root: CompactState, slots: List[int],
+                             time_budget_ms: int) -> dict:
+        deadline = time.perf_counter() + time_budget_ms / 1000.0
+        best_scores = None
+        order = list(slots)
+        for depth in range(1, self.MAX_ITERATIVE_DEPTH + 1):
+            # The first iteration always completes so there is a move to return.
+            self.deadline = deadline if best_scores is not None else None
+            try:
+                scores = self._score_moves_at(root, order, depth)
+            except SearchTimeout:
+                break
+            finally:
+                self.deadline = None
+            best_scores = scores
+            self.depth_reached = depth
+            best_slot = max(order, key=scores.get)
+            order.remove(best_slot)
+            order.insert(0, best_slot)
+            if time.perf_counter() >= deadline:
+                break
+        return best_scores
+
+    def _score_moves_at(self, root: CompactState, slots: List[int], depth: int) -> dict:
+        if self.workers > 1:
+            return self._parallel_scores(root, slots, depth)
+        return {slot: self._score_move(root, slot, depth) for slot in slots}
+
+    def _pool(self) -> ProcessPoolExecutor:
+        """The worker pool; every worker keeps one engine with this engine's settings"""
+        if self._executor is None:
+            config = {"depth": self.depth, "tt_size": self.tt_size,
+                      "tt_replacement": self.tt_replacement,
+                      "chance_pruning": self.chance_pruning,
+                      "leaf_batch_depth": self.leaf_batch_depth,
+                      "multiplayer": self.multiplayer,
+                      "incremental_eval": self.incremental_eval,
+                      "symmetry": self.symmetry,
+                      "eval_cache_size": self.eval_cache_size,
+                      "move_ordering": self.move_ordering,
+                      "dice_rules": self.dice_rules,
+                      "race_table": self.race_table.path if self.race_table is not None else None}
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 initializer=_init_worker,
+                                                 initargs=(config,))
+        return self._executor
+
+    def _parallel_scores(self, root: CompactState, slots: List[int], depth: int) -> dict:
+        """Search root moves, or with `split_chance` each of their dice children, in the pool.
+
+        Every task gets the full score window, so the values that come back
+        are exact and combine into the same scores as the serial search.
+        """
+        executor = self._pool()
+        remaining = None
+        if self.deadline is not None:
+            remaining = max(0.0, self.deadline - time.perf_counter())
+
+        tasks = []
+        for slot in slots:
+            child = root.apply_move(slot, self.dice_table)
+            if self.split_chance and depth > 1 and not child.is_terminal():
+                tasks.append((slot, self._roll_distribution(child)))
+            else:
+                tasks.append((slot, None))
+
+        futures = []
+        for slot, probabilities in tasks:
+            dice_values = [None] if probabilities is None else [d for d, _ in probabilities]
+            futures.append([executor.submit(_search_task, root, slot, dice_value,
+                                            depth, remaining)
+                            for dice_value in dice_values])
+        try:
+            results = [[future.result() for future in group] for group in futures]
+        except SearchTimeout:
+            for group in futures:
+                for future in group:
+                    future.cancel()
+            raise
+
+        scores = {}
+        for (slot, probabilities), group in zip(tasks, results):
+            for _, counters in group:
+                self._add_counters(counters)
+            if probabilities is None:
+                scores[slot] = group[0][0]
+                continue
+            self.nodes_visited += 1
+            self.chance_nodes += 1
+            value = 0.0
+            for (_, prob), (score, _) in zip(probabilities, group):
+                value += prob * score
+            scores[slot] = max(min(value, self.MAX_SCORE), self.MIN_SCORE)
+        return scores
+
+    def _root_chance_window(self) -> Tuple[float, float]:
+        """Window the dice children of a root move get from a full-window chance node"""
+        if self.chance_pruning == "none":
+            return self.MIN_SCORE, self.MAX_SCORE
+        return self.eval_bounds
+
+    def _prepare_root(self, root: CompactState):
+        self.root_seat = root.turn
+        self.perspective_key = PERSPECTIVE_KEYS[root.colors[root.turn]]
+        self.eval_bounds = evaluation_bounds(len(root.colors))
+        self.history.clear()
+        self.killers.clear()
+        if self.incremental_eval:
+            self.evaluator = IncrementalEvaluator(root)
+
+    def _score_move(self, root: CompactState, slot: int, depth: int) -> float:
+        if self.multiplayer == "maxn":
+            return self._maxn(root.apply_move(slot, self.dice_table), depth - 1,
+                              NodeType.CHANCE)[self.root_seat]
+        return self._expectiminimax(root.apply_move(slot, self.dice_table), depth - 1, NodeType.CHANCE,
+                                    self.MIN_SCORE, self.MAX_SCORE)
+
+    def _order_slots(self, root: CompactState, slots: List[int]) -> List[int]:
+        return sorted(slots, key=self._move_priority(root, 0), reverse=True)
+
+    def _move_priority(self, state: CompactState, depth: int, tt_move: Optional[int] = None):
+        """Sort key for the side to move's slots, best first with reverse=True.
+
+        The transposition table's move comes first, then captures, killer
+        moves at this depth, landings on safe squares or in the home column,
+        and the rest by history score.
+        """
+        color = state.colors[state.turn]
+        positions = state.positions
+        walls = state.walls()
+        opponents = {position for slot, position in enumerate(positions)
+                     if slot // PIECES_PER_PLAYER != state.turn}
+        killers = self.killers.get(depth, ())
+        rotation = mover_rotation(state) if self.symmetry else None
+        history = self.history
+
+        def priority(slot):
+            position = positions[slot]
+            target = state.destination(slot, walls)
+            move = (color, position, target)
+            safe = target in SAFE_CELLS or target >= TRACK_SQUARES
+            square = rotation[position + 1] if rotation is not None else position
+            return (square == tt_move, target in opponents and not safe, move in killers, safe,
+                    history.get(move, 0))
+        return priority
+
+    def _move_key(self, state: CompactState, slot: int) -> int:
+        """How the transposition table stores a move: the moving piece's square, rotated like the key"""
+        position = state.positions[slot]
+        return mover_rotation(state)[position + 1] if self.symmetry else position
+
+    def _ordered_moves(self, state: CompactState, depth: int,
+                       tt_move: Optional[int] = None) -> Tuple[int, ...]:
+        """The side to move's slots in the order _ordered_children plays them"""
+        moves = state.valid_moves(self.dice_table)
+        if self._order_nodes and len(moves) > 1:
+            moves = sorted(moves, key=self._move_priority(state, depth, tt_move), reverse=True)
+        return moves
+
+    def _ordered_children(self, state: CompactState, depth: int, tt_move: Optional[int] = None):
+        """(slot, child) pairs in move order, slot None for a pass; children are made lazily"""
+        moves = self._ordered_moves(state, depth, tt_move)
+        if not moves:
+            yield None, state.pass_turn(self.dice_table)
+            return
+        for slot in moves:
+            yield slot, state.apply_move(slot, self.dice_table)
+
+    def _record_cutoff(self, state: CompactState, slot: Optional[int], depth: int):
+        if slot is None or not self._order_nodes:
+            return
+        move = (state.colors[state.turn], state.positions[slot], state.destination(slot))
+        self.history[move] = self.history.get(move, 0) + depth * depth
+        killers = self.killers.setdefault(depth, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
     
-    def _expectiminimax(self, state: State, depth: int, node_type: NodeType, 
+    def _roll_distribution(self, state: CompactState) -> Tuple[Tuple[int, float], ...]:
+        """(dice value, probability) of every roll at a chance node, shared by all nodes"""
+        return self.dice_table.distribution[state.sixes]
+
+    def _node_type(self, state: CompactState) -> NodeType:
+        return NodeType.MAX if state.turn == self.root_seat else NodeType.MIN
+
+    def _children(self, state: CompactState) -> List[CompactState]:
+        moves = state.valid_moves(self.dice_table)
+        if not moves:
+            return [state.pass_turn(self.dice_table)]
+        return [state.apply_move(slot, self.dice_table) for slot in moves]
+
+    def _check_deadline(self):
+        if (self.deadline is not None
+                and self.nodes_visited % self.DEADLINE_CHECK_INTERVAL == 0
+                and time.perf_counter() > self.deadline):
+            raise SearchTimeout()
+
+    def _expectiminimax(self, state: CompactState, depth: int, node_type: NodeType, 
                        alpha: float, beta: float) -> float:
+        """Paranoid search: the root player maximises, every other seat minimises"""
         self.nodes_visited += 1
+        self._check_deadline()
         
         if alpha < self.MIN_SCORE:
             alpha = self.MIN_SCORE
         if beta > self.MAX_SCORE:
             beta = self.MAX_SCORE
+
+        if self.race_table is not None:
+            probability = self.race_table.win_probability(state, self.root_seat)
+            if probability is not None:
+                self.leaf_nodes += 1
+                return (2.0 * probability - 1.0) * WINNING_BONUS
             
-        if depth == 0 or state.current_player.is_winning():
+        if depth == 0 or state.is_terminal():
             self.leaf_nodes += 1
-            score = state.evaluate()
+            score = self._leaf_value(state, self.root_seat)
             return max(min(score, self.MAX_SCORE), self.MIN_SCORE)
+
+        if self.symmetry:
+            key = canonical_key(state, self.root_seat)
+        else:
+            key = state.key ^ self.perspective_key
+        tt_move = None
+        if self.transposition_table is not None:
+            entry = self.transposition_table.probe(key, depth)
+            if entry is not None:
+                if entry.bound is Bound.EXACT:
+                    return entry.value
+                if entry.bound is Bound.LOWER and entry.value >= beta:
+                    return entry.value
+                if entry.bound is Bound.UPPER and entry.value <= alpha:
+                    return entry.value
+            if self._order_nodes and node_type != NodeType.CHANCE:
+                tt_move = entry.move if entry is not None else self.transposition_table.probe_move(key)
+        alpha_orig, beta_orig = alpha, beta
+        best_slot = None
             
-        if node_type == NodeType.MAX:
+        if depth <= self.leaf_batch_depth:
+            value = self._batched_value(state, depth, node_type)
+
+        elif node_type == NodeType.MAX:
             self.max_nodes += 1
             value = self.MIN_SCORE
-            valid_moves = state.get_valid_moves()
-            for piece, steps in valid_moves:
-                move = Move(piece=piece, steps=steps)
-                new_state = state.apply_move(move)
+            for slot, new_state in self._ordered_children(state, depth, tt_move):
                 score = self._expectiminimax(new_state, depth - 1, NodeType.CHANCE, 
                                            alpha, beta)
-                value = max(value, score)
+                if best_slot is None or score > value:
+                    value = max(value, score)
+                    best_slot = slot
                 alpha = max(alpha, value)
                 if beta <= alpha:
+                    self._record_cutoff(state, slot, depth)
                     break
-            return value
             
         elif node_type == NodeType.MIN:
             self.min_nodes += 1
             value = self.MAX_SCORE
-            valid_moves = state.get_valid_moves()
-            for piece, steps in valid_moves:
-                move = Move(piece=piece, steps=steps)
-                new_state = state.apply_move(move)
+            for slot, new_state in self._ordered_children(state, depth, tt_move):
                 score = self._expectiminimax(new_state, depth - 1, NodeType.CHANCE, 
                                            alpha, beta)
-                value = min(value, score)
+                if best_slot is None or score < value:
+                    value = min(value, score)
+                    best_slot = slot
                 beta = min(beta, value)
                 if beta <= alpha:
+                    self._record_cutoff(state, slot, depth)
                     break
-            return value
             
         else:
             self.chance_nodes += 1
+            value = self._chance_value(state, depth, alpha, beta)
+            value = max(min(value, self.MAX_SCORE), self.MIN_SCORE)
+
+        if self.transposition_table is not None:
+            if value <= alpha_orig:
+                bound = Bound.UPPER
+            elif value >= beta_orig:
+                bound = Bound.LOWER
+            else:
+                bound = Bound.EXACT
+            move = self._move_key(state, best_slot) if best_slot is not None else None
+            self.transposition_table.store(key, depth, bound, value, move)
+        return value
+    
+    def _leaf_value(self, state: CompactState, seat: int) -> float:
+        """state.evaluate(seat), through the evaluation cache and incremental evaluator if enabled"""
+        cache = self.eval_cache
+        if cache is not None:
+            if self.symmetry:
+                key = canonical_placement_key(state, seat)
+            else:
+                key = state.placement_key() ^ PERSPECTIVE_KEYS[state.colors[seat]]
+            value = cache.probe(key)
+            if value is not None:
+                return value
+        if self.evaluator is not None:
+            value = self.evaluator.update(state).evaluate(seat)
+        else:
+            value = state.evaluate(seat)
+        if cache is not None:
+            cache.store(key, value)
+        return value
+
+    def _maxn(self, state: CompactState, depth: int, node_type: NodeType) -> Tuple[float, ...]:
+        """Max-n search: every seat maximises its own entry of the evaluation vector"""
+        self.nodes_visited += 1
+        self._check_deadline()
+
+        if depth == 0 or state.is_terminal():
+            self.leaf_nodes += 1
+            scores = [self._leaf_value(state, seat) for seat in range(len(state.colors))]
+            return tuple(max(min(score, self.MAX_SCORE), self.MIN_SCORE) for score in scores)
+
+        if node_type == NodeType.CHANCE:
+            self.chance_nodes += 1
+            values = [0.0] * len(state.colors)
+            for dice_value, prob in self._roll_distribution(state):
+                new_state = state.apply_dice_roll(dice_value)
+                child_values = self._maxn(new_state, depth - 1, self._node_type(new_state))
+                for seat, score in enumerate(child_values):
+                    values[seat] += prob * score
+            return tuple(values)
+
+        if node_type == NodeType.MAX:
+            self.max_nodes += 1
+        else:
+            self.min_nodes += 1
+        best = None
+        for new_state in self._children(state):
+            child_values = self._maxn(new_state, depth - 1, NodeType.CHANCE)
+            if best is None or child_values[state.turn] > best[state.turn]:
+                best = child_values
+        return best
+
+    def _batched_value(self, state: CompactState, depth: int, node_type: NodeType) -> float:
+        """Value of a subtree whose leaves are all evaluated in one evaluate_batch call.
+
+        The subtree is expanded without pruning, so the value is exact.
+        """
+        leaves = []
+        tree = self._collect_frontier(state, depth, node_type, leaves)
+        values = evaluate_batch(leaves, state.colors, self.root_seat)
+        values = values.clip(self.MIN_SCORE, self.MAX_SCORE).tolist()
+        return self._back_up(tree, values)
+
+    def _collect_frontier(self, state: CompactState, depth: int, node_type: NodeType,
+                          leaves: list):
+        if depth == 0 or state.is_terminal():
+            self.leaf_nodes += 1
+            leaves.append(state.positions)
+            return len(leaves) - 1
+
+        if node_type == NodeType.CHANCE:
+            self.chance_nodes += 1
+            branches = []
+            for dice_value, prob in self._roll_distribution(state):
+                new_state = state.apply_dice_roll(dice_value)
+                self.nodes_visited += 1
+                self._check_deadline()
+                branches.append((prob, self._collect_frontier(new_state, depth - 1,
+                                                              self._node_type(new_state), leaves)))
+            return node_type, branches
+
+        if node_type == NodeType.MAX:
+            self.max_nodes += 1
+        else:
+            self.min_nodes += 1
+        branches = []
+        for new_state in self._children(state):
+            self.nodes_visited += 1
+            self._check_deadline()
+            branches.append((1.0, self._collect_frontier(new_state, depth - 1,
+                                                         NodeType.CHANCE, leaves)))
+        return node_type, branches
+
+    def _back_up(self, tree, values: List[float]) -> float:
+        if isinstance(tree, int):
+            return values[tree]
+        node_type, branches = tree
+        if node_type == NodeType.MAX:
+            return max(self._back_up(branch, values) for _, branch in branches)
+        if node_type == NodeType.MIN:
+            return min(self._back_up(branch, values) for _, branch in branches)
+        value = 0.0
+        for prob, branch in branches:
+            value += prob * self._back_up(branch, values)
+        return max(min(value, self.MAX_SCORE), self.MIN_SCORE)
+
+    def _chance_value(self, state: CompactState, depth: int,
+                      alpha: float, beta: float) -> float:
+        probabilities = self._roll_distribution(state)
+        children = [state.apply_dice_roll(dice_value) for dice_value, _ in probabilities]
+
+        if self.chance_pruning == "none":
             value = 0.0
-            probabilities = self.dice.get_probabilities(state.get_last_n_dice_values(2))
-            for dice_value, prob in probabilities.items():
-                new_state = copy.deepcopy(state)
-                new_state.dice_value = dice_value
-                score = self._expectiminimax(new_state, depth - 1, 
-                                           NodeType.MAX if dice_value == 6 else NodeType.MIN,
-                                           alpha, beta)
+            for (dice_value, prob), new_state in zip(probabilities, children):
+                score = self._expectiminimax(new_state, depth - 1,
+                                           self._node_type(new_state),
+                                           self.MIN_SCORE, self.MAX_SCORE)
                 value += prob * score
-            return max(min(value, self.MAX_SCORE), self.MIN_SCORE)
-    
+            return value
+
+        lower, upper = self.eval_bounds
+        weights = [prob for _, prob in probabilities]
+        child_lower = [lower] * len(children)
+        child_upper = [upper] * len(children)
+        if self.chance_pruning == "star2" and depth > 1:
+            cutoff = self._probe_children(children, weights, child_lower, child_upper,
+                                          depth, alpha, beta)
+            if cutoff is not None:
+                return cutoff
+
+        value = 0.0
+        for i, new_state in enumerate(children):
+            rest_upper = sum(w * u for w, u in zip(weights[i + 1:], child_upper[i + 1:]))
+            rest_lower = sum(w * l for w, l in zip(weights[i + 1:], child_lower[i + 1:]))
+            window_low = (alpha - value - rest_upper) / weights[i]
+            window_high = (beta - value - rest_lower) / weights[i]
+            score = self._expectiminimax(new_state, depth - 1, self._node_type(new_state),
+                                         max(lower, window_low), min(upper, window_high))
+            if score <= window_low:
+                return alpha
+            if score >= window_high:
+                return beta
+            value += weights[i] * score
+        return value
+
+    def _probe_children(self, children: List[CompactState], weights: List[float],
+                        child_lower: List[float], child_upper: List[float],
+                        depth: int, alpha: float, beta: float) -> Optional[float]:
+        """Star2 probing: search only the first move of each dice child.
+
+        A MAX child is worth at least its first move and a MIN child at most,
+        so the probe tightens one side of the child bounds in place and can
+        cut the whole chance node before any child is fully searched.
+        """
+        lower, upper = self.eval_bounds
+        for i, new_state in enumerate(children):
+            if new_state.is_terminal():
+                continue
+            node_type = self._node_type(new_state)
+            others_upper = sum(w * u for j, (w, u) in enumerate(zip(weights, child_upper)) if j != i)
+            others_lower = sum(w * l for j, (w, l) in enumerate(zip(weights, child_lower)) if j != i)
+            window_low = max(lower, (alpha - others_upper) / weights[i])
+            window_high = min(upper, (beta - others_lower) / weights[i])
+            _, first_move = next(self._ordered_children(new_state, depth - 1))
+            score = self._expectiminimax(first_move, depth - 2, NodeType.CHANCE,
+                                         window_low, window_high)
+            if node_type == NodeType.MAX and score > window_low:
+                child_lower[i] = max(child_lower[i], score)
+                if sum(w * l for w, l in zip(weights, child_lower)) >= beta:
+                    return beta
+            elif node_type == NodeType.MIN and score < window_high:
+                child_upper[i] = min(child_upper[i], score)
+                if sum(w * u for w, u in zip(weights, child_upper)) <= alpha:
+                    return alpha
+        return None
+
     def _evaluate(self, state: State) -> float:
         score = 0.0
         current_player = state.current_player
@@ -245,4 +853,39 @@ class Expectiminimax:
         
         return threat_score
 
-  
\ No newline at end of file
+
+_worker_engine = None
+
+
+def _init_worker(config: dict):
+    global _worker_engine
+    _worker_engine = Expectiminimax(**config)
+
+
+def _analysis_task(root: CompactState, time_budget_ms: Optional[int],
+                   depth: Optional[int]) -> 'SearchResult':
+    """Worker side of Expectiminimax.analyze; the engine's tables persist per worker"""
+    return _worker_engine.search(root, time_budget_ms, depth, use_book=False)
+
+
+def _search_task(root: CompactState, slot: int, dice_value: Optional[int], depth: int,
+                 remaining: Optional[float]) -> Tuple[float, tuple]:
+    """Worker side of Expectiminimax._parallel_scores; the engine's table persists per worker"""
+    engine = _worker_engine
+    engine._reset_counters()
+    engine._prepare_root(root)
+    engine.deadline = None if remaining is None else time.perf_counter() + remaining
+    try:
+        if dice_value is None:
+            value = engine._score_move(root, slot, depth)
+        else:
+            child = root.apply_move(slot, engine.dice_table).apply_dice_roll(dice_value)
+            if engine.multiplayer == "maxn":
+                value = engine._maxn(child, depth - 2, engine._node_type(child))[engine.root_seat]
+            else:
+                low, high = engine._root_chance_window()
+                value = engine._expectiminimax(child, depth - 2, engine._node_type(child),
+                                               low, high)
+    finally:
+        engine.deadline = None
+    return value, engine._counters()
@@ -1,17 +1,30 @@
 from board import Board
 from dice import Dice
 from expectiminimax import Expectiminimax, Move
+from mcts import MCTS
 from player import Player
+from reporting import TextReporter
 from state import State, StateManager
 import copy
 
 
 class Game:
-    def __init__(self, player_colors, is_computer):
-        self.board = Board(player_colors[0], player_colors[1], is_computer)
+    AI = ("expectiminimax", "mcts")
+
+    def __init__(self, player_colors, is_computer, search_time_ms=None, verbose=True,
+                 book=None, ai="expectiminimax"):
+        if ai not in self.AI:
+            raise ValueError(f"Unknown computer player: {ai}")
+        self.board = Board(player_colors, is_computer, verbose=verbose)
         self.state_manager = StateManager()
         self.dice = Dice()
-        self.expectiminimax = Expectiminimax(depth=4, player=self.board.current_player)
+        reporter = TextReporter() if verbose else None
+        if ai == "mcts":
+            self.ai = MCTS(iterations=2000, reporter=reporter)
+        else:
+            self.ai = Expectiminimax(depth=4, player=self.board.current_player,
+                                     reporter=reporter, book=book, symmetry=True)
+        self.search_time_ms = search_time_ms
     
     def switch_player(self):
         self.board.switch_player()
@@ -32,7 +45,7 @@ class Game:
             print("Computer has no valid moves available.")
             return
         
-        best_move = self.expectiminimax.find_best_move(current_state)
+        best_move = self.ai.find_best_move(current_state, time_budget_ms=self.search_time_ms)
         
         if best_move is None:
             print("Using first valid move as fallback")
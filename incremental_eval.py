@@ -0,0 +1,129 @@
+from typing import List
+
+from board import PATHS, SAFE_CELLS
+from compact_state import (CAPTURE_OPPORTUNITY, DONE_POSITION, HOME, HOME_PENALTY,
+                           NEAR_HOME_BONUS, OPPONENT_WEIGHT, PIECE_VALUE, PIECES_PER_PLAYER,
+                           PROGRESS_WEIGHT, RISK_PENALTY, SAFE_SPOT_BONUS, TRACK_SQUARES,
+                           WINNING_BONUS, CompactState)
+
+
+def _piece_value(color, position: int) -> float:
+    """The part of CompactState.evaluate that depends on a single piece"""
+    path = PATHS[color]
+    if position == DONE_POSITION[color]:
+        return PIECE_VALUE * 2 + WINNING_BONUS * 0.2
+    if position == HOME:
+        return HOME_PENALTY
+    if position >= path["home_start"]:
+        value = NEAR_HOME_BONUS + (position - path["home_start"]) / 5.0 * PIECE_VALUE
+    else:
+        progress = ((position - path["start"]) % 52) / ((path["end"] - path["start"]) % 52)
+        value = progress * PIECE_VALUE * PROGRESS_WEIGHT
+    if position in SAFE_CELLS:
+        value += SAFE_SPOT_BONUS
+    return value
+
+
+PIECE_VALUES = {color: [_piece_value(color, position) for position in range(HOME, 76)]
+                for color in PATHS}
+
+
+class IncrementalEvaluator:
+    """CompactState.evaluate for every seat, kept up to date one piece at a time.
+
+    `reach[i * pieces + j]` is how far piece j is ahead of piece i when both
+    are on the shared track, belong to different seats and j is 1-6 squares ahead,
+    otherwise 0. A move rewrites the row and column of the moved piece and
+    rescores only the pieces whose row changed, so `evaluate` is a sum of
+    cached per-piece terms. Every term is recomputed from the matrix rather
+    than adjusted, so the result depends only on the current positions and
+    matches the full evaluation to float rounding.
+    """
+
+    def __init__(self, state: CompactState):
+        self.colors = state.colors
+        self.size = len(state.positions)
+        self.seats = [slot // PIECES_PER_PLAYER for slot in range(self.size)]
+        self.done_positions = [DONE_POSITION[self.colors[seat]] for seat in self.seats]
+        self.values = [PIECE_VALUES[self.colors[seat]] for seat in self.seats]
+        self.positions = list(state.positions)
+        self.synced = state.positions
+        self.reach = [0] * (self.size * self.size)
+        self.terms = [0.0] * self.size
+        self.updates = 0
+        for slot in range(self.size):
+            for other in range(self.size):
+                self.reach[slot * self.size + other] = self._distance(slot, other)
+        for slot in range(self.size):
+            self._score_piece(slot)
+
+    def _on_track(self, slot: int) -> bool:
+        position = self.positions[slot]
+        return position != HOME and position < TRACK_SQUARES
+
+    def _distance(self, slot: int, other: int) -> int:
+        if self.seats[slot] == self.seats[other] or not (self._on_track(slot) and self._on_track(other)):
+            return 0
+        distance = (self.positions[other] - self.positions[slot]) % 52
+        return distance if 1 <= distance <= 6 else 0
+
+    def _score_piece(self, slot: int):
+        position = self.positions[slot]
+        term = self.values[slot][position + 1]
+        row = slot * self.size
+        distances = sorted(distance for distance in self.reach[row:row + self.size] if distance)
+        safe = position in SAFE_CELLS
+        for threats, distance in enumerate(distances, 1):
+            term += CAPTURE_OPPORTUNITY * (7 - distance) / 6
+            if not safe:
+                term += (7 - distance) * RISK_PENALTY / max(threats, 2)
+                if distance <= 3:
+                    term += CAPTURE_OPPORTUNITY / 2
+        self.terms[slot] = term
+
+    def move_piece(self, slot: int, position: int):
+        """Make (or unmake) a single piece move"""
+        self.updates += 1
+        self.positions[slot] = position
+        size = self.size
+        reach = self.reach
+        rescore = [slot]
+        for other in range(size):
+            if self.seats[other] == self.seats[slot]:
+                continue
+            reach[slot * size + other] = self._distance(slot, other)
+            distance = self._distance(other, slot)
+            if reach[other * size + slot] != distance:
+                reach[other * size + slot] = distance
+                rescore.append(other)
+        for piece in rescore:
+            self._score_piece(piece)
+
+    def update(self, state: CompactState) -> 'IncrementalEvaluator':
+        """Move every piece whose position differs from `state`.
+
+        Consecutive leaves of a depth-first search differ by the few pieces
+        moved in between, so this is the make/unmake of the search.
+        """
+        positions = state.positions
+        if positions != self.synced:
+            for slot, position in enumerate(positions):
+                if self.positions[slot] != position:
+                    self.move_piece(slot, position)
+            self.synced = positions
+        return self
+
+    def evaluate(self, seat: int) -> float:
+        done = [sum(self.positions[slot] == self.done_positions[slot]
+                    for slot in range(s * PIECES_PER_PLAYER, (s + 1) * PIECES_PER_PLAYER))
+                for s in range(len(self.colors))]
+        if done[seat] == PIECES_PER_PLAYER:
+            return WINNING_BONUS
+        if PIECES_PER_PLAYER in done:
+            return -WINNING_BONUS
+        first = seat * PIECES_PER_PLAYER
+        score = sum(self.terms[first:first + PIECES_PER_PLAYER])
+        return score - PIECE_VALUE * OPPONENT_WEIGHT * (sum(done) - done[seat])
+
+    def evaluate_all(self) -> List[float]:
+        return [self.evaluate(seat) for seat in range(len(self.colors))]
@@ -0,0 +1,173 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List, Optional
+
+from server import GameServer, start_server
+
+
+class Client:
+    """One JSON-lines connection; `request` returns the response, `move` also times it"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                 latencies: List[float]):
+        self.reader = reader
+        self.writer = writer
+        self.latencies = latencies
+        self.next_id = 0
+
+    @classmethod
+    async def connect(cls, host: str, port: int, unix_path: Optional[str],
+                      latencies: List[float]) -> 'Client':
+        if unix_path is not None:
+            reader, writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer, latencies)
+
+    async def move(self, game: int, slot: int) -> dict:
+        start = time.perf_counter()
+        response = await self.request(op="move", game=game, slot=slot)
+        self.latencies.append(time.perf_counter() - start)
+        return response
+
+    async def request(self, **request) -> dict:
+        self.next_id += 1
+        request["id"] = self.next_id
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        await self.writer.drain()
+        response = json.loads(await self.reader.readline())
+        if not response["ok"]:
+            raise RuntimeError(f"server error: {response['error']}")
+        return response
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def play_game(client: Client, rng: random.Random, colors: List[str], depth: int,
+                    max_moves: int, seed: int) -> bool:
+    """Play seat 0 with random moves against the server's engine; True if the game finished"""
+    response = await client.request(op="new_game", colors=colors, humans=[0], depth=depth,
+                                    seed=seed)
+    moves = 0
+    while response["moves"] and moves < max_moves:
+        response = await client.move(response["game"], rng.choice(response["moves"]))
+        moves += 1
+    await client.request(op="close", game=response["game"])
+    return response["winner"] is not None
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """The `fraction` quantile of `values`, None if there are none"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summary(report: dict, depth: int) -> str:
+    """The printed report; a run where no move completed still gets one"""
+    latencies = report["latencies"]
+    lines = [f"{report['games']} games ({report['finished']} played to the end, "
+             f"{report['failed']} failed), {report['connections']} connections, depth {depth}: "
+             f"{report['moves']} moves in {report['elapsed']:.2f}s "
+             f"({report['moves'] / report['elapsed'] if report['elapsed'] > 0 else 0.0:,.0f}/s)"]
+    if latencies:
+        lines.append("Move latency: " + "  ".join(
+            f"p{round(fraction * 100)} {percentile(latencies, fraction) * 1000:.1f} ms"
+            for fraction in (0.5, 0.9, 0.99)) + f"  max {max(latencies) * 1000:.1f} ms")
+    else:
+        lines.append("Move latency: no moves completed")
+    if report["errors"]:
+        lines.append(f"First error: {report['errors'][0]}")
+    return "\n".join(lines)
+
+
+async def run_load_test(games: int, concurrency: int, depth: int, players: int, max_moves: int,
+                        seed: int, host: str, port: int, unix_path: Optional[str],
+                        workers: Optional[int]) -> dict:
+    """Play `games` games over `concurrency` connections, starting a server if no address is given"""
+    game_server = server = None
+    if port == 0 and unix_path is None:
+        game_server = GameServer(workers)
+        server = await start_server(game_server, host, 0)
+        port = server.sockets[0].getsockname()[1]
+
+    colors = ["blue", "red", "green", "yellow"] if players > 2 else ["blue", "green"]
+    colors = colors[:players]
+    latencies = []
+    queue = list(range(games))
+    finished = 0
+    errors = []
+
+    async def connection(number: int):
+        nonlocal finished
+        rng = random.Random(seed * 1000003 + number)
+        try:
+            client = await Client.connect(host, port, unix_path, latencies)
+        except OSError as error:
+            errors.append(f"connect: {error}")
+            return
+        try:
+            while queue:
+                game = queue.pop()
+                try:
+                    won = await play_game(client, rng, colors, depth, max_moves, seed + game)
+                except RuntimeError as error:
+                    errors.append(str(error))
+                    continue
+                except (ConnectionError, json.JSONDecodeError) as error:
+                    # the connection is gone; its remaining games are left to the others
+                    errors.append(f"connection lost: {error}")
+                    break
+                finished += won
+        finally:
+            await client.close()
+
+    connections = min(concurrency, games)
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(connection(number) for number in range(connections)))
+    finally:
+        elapsed = time.perf_counter() - start
+        if server is not None:
+            while game_server.connections:
+                await asyncio.sleep(0.01)
+            server.close()
+            await server.wait_closed()
+            game_server.close()
+    return {"games": games, "finished": finished, "failed": len(errors), "errors": errors,
+            "connections": connections, "moves": len(latencies), "elapsed": elapsed,
+            "latencies": latencies}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many concurrent games against server.py")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=200, help="simultaneous connections")
+    parser.add_argument("--depth", type=int, default=2, help="search depth of the server's moves")
+    parser.add_argument("--players", type=int, default=2, choices=(2, 3, 4))
+    parser.add_argument("--max-moves", type=int, default=30, help="client moves before resigning")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 starts a server in this process")
+    parser.add_argument("--unix", help="connect to a server on this Unix socket")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="search processes of the built-in server")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load_test(args.games, args.concurrency, args.depth, args.players,
+                                       args.max_moves, args.seed, args.host, args.port,
+                                       args.unix, args.workers))
+    print(summary(report, args.depth))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+import math
+import random
+import time
+from collections import deque
+from typing import List, Optional
+
+from compact_state import PIECES_PER_PLAYER, CompactState, evaluation_bounds
+from expectiminimax import Move, SearchResult
+from playout import random_playout
+
+PASS = -1
+
+
+class MCTSNode:
+    """A tree node; chance nodes (dice_value None) have one child per dice value,
+    decision nodes one per piece slot, or a single PASS child without moves"""
+
+    __slots__ = ("state", "children", "untried", "visits", "rewards")
+
+    def __init__(self, state: CompactState):
+        self.state = state
+        self.children = {}
+        self.untried = None
+        self.visits = 0
+        self.rewards = [0.0] * len(state.colors)
+
+    def is_chance(self) -> bool:
+        return self.state.dice_value is None
+
+    def expand_moves(self) -> List[int]:
+        if self.untried is None:
+            self.untried = list(self.state.valid_moves()) or [PASS]
+            self.untried.reverse()
+        return self.untried
+
+
+class MCTS:
+    """Monte Carlo tree search with explicit chance nodes for the dice.
+
+    Decision nodes pick children by UCT on the reward of the seat to move;
+    chance nodes sample a dice value, so every roll is visited in proportion
+    to its probability. Rollouts play `rollout` moves ("random" or "greedy")
+    for at most `max_rollout_rolls` rolls; an unfinished rollout rewards each
+    seat with its evaluation scaled into [0, 1], a finished one rewards the
+    winner with 1. With `reuse_tree` the subtree of the position reached
+    after the previous search is kept for the next one.
+    """
+
+    ROLLOUT_POLICIES = ("random", "greedy")
+    REUSE_SEARCH_DEPTH = 12
+
+    def __init__(self, iterations: int = 1000, exploration: float = 1.4,
+                 rollout: str = "random", max_rollout_rolls: int = 40,
+                 reuse_tree: bool = True, seed=None, reporter=None):
+        if rollout not in self.ROLLOUT_POLICIES:
+            raise ValueError(f"Unknown rollout policy: {rollout}")
+        self.iterations = iterations
+        self.exploration = exploration
+        self.rollout = rollout
+        self.max_rollout_rolls = max_rollout_rolls
+        self.reuse_tree = reuse_tree
+        self.rng = random.Random(seed)
+        self.reporter = reporter
+        self.root = None
+        self.bounds = None
+        self.reused_visits = 0
+        self.last_result = None
+
+    def find_best_move(self, state, time_budget_ms: Optional[int] = None) -> Optional[Move]:
+        """Same contract as Expectiminimax.find_best_move"""
+        result = self.search(state, time_budget_ms)
+        if self.reporter is not None:
+            self.reporter.report(state, result)
+        if result.best_slot is None:
+            return None
+        piece = state.current_player.pieces[result.best_slot % PIECES_PER_PLAYER]
+        return Move(piece=piece, steps=state.dice_value)
+
+    def search(self, state, time_budget_ms: Optional[int] = None) -> SearchResult:
+        """Run `iterations` playouts, or as many as fit in `time_budget_ms`"""
+        start = time.perf_counter()
+        root = state if isinstance(state, CompactState) else CompactState.from_state(state)
+        self.root = self._find_root(root)
+        self.reused_visits = self.root.visits
+        self.bounds = evaluation_bounds(len(root.colors))
+        counts = {"nodes": 0, "max": 0, "min": 0, "chance": 0, "rollouts": 0, "depth": 0}
+
+        slots = list(root.valid_moves())
+        if len(slots) > 1:
+            deadline = None if time_budget_ms is None else start + time_budget_ms / 1000.0
+            iteration = 0
+            while True:
+                if deadline is None and iteration >= self.iterations:
+                    break
+                if deadline is not None and iteration > 0 and time.perf_counter() >= deadline:
+                    break
+                self._iterate(root.turn, counts)
+                iteration += 1
+
+        move_scores = {}
+        for slot in slots:
+            child = self.root.children.get(slot)
+            move_scores[slot] = child.rewards[root.turn] / child.visits if child and child.visits else 0.0
+        best_slot = None
+        if slots:
+            best_slot = max(slots, key=lambda slot: (self.root.children[slot].visits
+                                                     if slot in self.root.children else 0))
+            if self.reuse_tree and best_slot in self.root.children:
+                self.root = self.root.children[best_slot]
+        result = SearchResult(
+            best_slot=best_slot,
+            move_scores=move_scores,
+            depth_reached=counts["depth"],
+            nodes_visited=counts["nodes"],
+            max_nodes=counts["max"],
+            min_nodes=counts["min"],
+            chance_nodes=counts["chance"],
+            leaf_nodes=counts["rollouts"],
+            tt_hits=0,
+            tt_misses=0,
+            tt_collisions=0,
+            elapsed=time.perf_counter() - start,
+        )
+        self.last_result = result
+        return result
+
+    def _find_root(self, state: CompactState) -> MCTSNode:
+        """The node for `state` under the previous root, or a fresh one"""
+        if self.reuse_tree and self.root is not None:
+            queue = deque([(self.root, 0)])
+            while queue:
+                node, depth = queue.popleft()
+                if node.state.key == state.key and node.state == state:
+                    return node
+                if depth < self.REUSE_SEARCH_DEPTH:
+                    queue.extend((child, depth + 1) for child in node.children.values())
+        return MCTSNode(state)
+
+    def _iterate(self, root_seat: int, counts: dict):
+        node = self.root
+        path = [node]
+        while not node.state.is_terminal():
+            counts["nodes"] += 1
+            if node.is_chance():
+                dice_value = self.rng.randint(1, 6)
+                child = node.children.get(dice_value)
+                if child is None:
+                    counts["chance"] += 1
+                    child = node.children[dice_value] = MCTSNode(node.state.apply_dice_roll(dice_value))
+                node = child
+                path.append(node)
+                continue
+
+            untried = node.expand_moves()
+            if untried:
+                slot = untried.pop()
+                counts["max" if node.state.turn == root_seat else "min"] += 1
+                after = node.state.pass_turn() if slot == PASS else node.state.apply_move(slot)
+                child = node.children[slot] = MCTSNode(after)
+                path.append(child)
+                node = child
+                break
+            node = self._select(node)
+            path.append(node)
+
+        counts["depth"] = max(counts["depth"], len(path) - 1)
+        counts["rollouts"] += 1
+        rewards = self._rollout(node.state)
+        for visited in path:
+            visited.visits += 1
+            for seat, reward in enumerate(rewards):
+                visited.rewards[seat] += reward
+
+    def _select(self, node: MCTSNode) -> MCTSNode:
+        seat = node.state.turn
+        log_visits = math.log(node.visits)
+        best, best_value = None, -math.inf
+        for child in node.children.values():
+            value = (child.rewards[seat] / child.visits
+                     + self.exploration * math.sqrt(log_visits / child.visits))
+            if value > best_value:
+                best, best_value = child, value
+        return best
+
+    def _rollout(self, state: CompactState) -> List[float]:
+        if self.rollout == "random":
+            result = random_playout(state, self.rng, self.max_rollout_rolls)
+            if result.winner is None:
+                return self._scaled_evaluation(result.to_state(state.colors))
+            return [float(seat == result.winner) for seat in range(len(state.colors))]
+
+        rolls = 0
+        while not state.is_terminal():
+            if rolls >= self.max_rollout_rolls:
+                return self._scaled_evaluation(state)
+            if state.dice_value is None:
+                state = state.apply_dice_roll(self.rng.randint(1, 6))
+                rolls += 1
+            moves = state.valid_moves()
+            if not moves:
+                state = state.pass_turn()
+            elif len(moves) > 1:
+                seat = state.turn
+                state = max((state.apply_move(slot) for slot in moves),
+                            key=lambda child: child.evaluate(seat))
+            else:
+                state = state.apply_move(moves[0])
+        return [1.0 if state.is_winning(seat) else 0.0 for seat in range(len(state.colors))]
+
+    def _scaled_evaluation(self, state: CompactState) -> List[float]:
+        low, high = self.bounds
+        return [(state.evaluate(seat) - low) / (high - low) for seat in range(len(state.colors))]
@@ -0,0 +1,150 @@
+import argparse
+import mmap
+import struct
+import time
+from typing import Dict, Optional, Tuple
+
+from color import Color
+from compact_state import PIECES_PER_PLAYER, CompactState
+from dice import Dice
+from expectiminimax import Expectiminimax
+from symmetry import canonical_form, canonical_key
+from zobrist import DICE_KEYS
+
+BOOK_MAGIC = b"LUDOBOOK"
+BOOK_VERSION = 3
+# magic, version, number of entries
+HEADER = struct.Struct("<8sII")
+# canonical position hash, dice value, canonical piece number, score; sorted by (hash, dice)
+ENTRY = struct.Struct("<QBBf")
+
+
+def book_key(state: CompactState) -> int:
+    """Canonical hash of the position without the dice roll, which the book stores next to it.
+
+    Positions that are colour rotations of each other or differ only in the
+    order of a seat's pieces share one entry (see symmetry.py); the piece is
+    stored by its number in the canonical form, where the mover is seat 0.
+    """
+    return canonical_key(state) ^ DICE_KEYS[state.dice_value or 0]
+
+
+def write_book(path: str, entries: Dict[Tuple[int, int], Tuple[int, float]]):
+    """Write {(book_key, dice value): (piece number, score)} to `path`"""
+    with open(path, "wb") as book_file:
+        book_file.write(HEADER.pack(BOOK_MAGIC, BOOK_VERSION, len(entries)))
+        for (key, dice_value), (piece, score) in sorted(entries.items()):
+            book_file.write(ENTRY.pack(key, dice_value, piece, score))
+
+
+class OpeningBook:
+    """Read-only book file, memory-mapped and binary searched on every probe.
+
+    A book move is only returned if it is legal in the probed position, so a
+    hash collision costs a search rather than an illegal move.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as book_file:
+            self._map = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size = HEADER.unpack_from(self._map, 0)
+        if magic != BOOK_MAGIC or version != BOOK_VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a version {BOOK_VERSION} opening book")
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def hit_rate(self) -> float:
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self._map.close()
+
+    def _entry(self, index: int) -> tuple:
+        return ENTRY.unpack_from(self._map, HEADER.size + index * ENTRY.size)
+
+    def probe(self, state: CompactState) -> Optional[Tuple[int, float]]:
+        """(slot, score) of the book move for `state`, or None"""
+        target = (book_key(state), state.dice_value)
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self._entry(middle)[:2] < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.size:
+            key, dice_value, piece, score = self._entry(low)
+            if (key, dice_value) == target:
+                slot = canonical_form(state).slots[piece]
+                if slot in state.valid_moves():
+                    self.hits += 1
+                    return slot, score
+        self.misses += 1
+        return None
+
+
+def generate_book(games: int, plies: int, depth: int, seed: int = 0,
+                  colors=(Color.BLUE, Color.GREEN), workers: int = 1) -> dict:
+    """Search the first `plies` decisions of self-play games and keep the results.
+
+    Each game plays the searched move, so the book covers the lines the
+    engine itself reaches; the dice make every game different.
+    """
+    engine = Expectiminimax(depth=depth, tt_size=1 << 18, workers=workers, symmetry=True)
+    entries = {}
+    try:
+        for game in range(games):
+            dice = Dice(seed * 1000003 + game)
+            state = CompactState.create((-1,) * PIECES_PER_PLAYER * len(colors), colors, 0)
+            decisions = 0
+            while decisions < plies and not state.is_terminal():
+                state = state.apply_dice_roll(dice.roll())
+                valid_moves = state.valid_moves()
+                if not valid_moves:
+                    state = state.pass_turn()
+                    continue
+                if len(valid_moves) == 1:
+                    state = state.apply_move(valid_moves[0])
+                    continue
+                decisions += 1
+                entry_key = (book_key(state), state.dice_value)
+                slots = canonical_form(state).slots
+                if entry_key not in entries:
+                    result = engine.search(state, use_book=False)
+                    entries[entry_key] = (slots.index(result.best_slot), result.best_score)
+                piece = entries[entry_key][0]
+                state = state.apply_move(slots[piece])
+    finally:
+        engine.close()
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an opening book from self-play")
+    parser.add_argument("--output", default="opening_book.bin")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--plies", type=int, default=12, help="decisions searched per game")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    entries = generate_book(args.games, args.plies, args.depth, args.seed, workers=args.workers)
+    write_book(args.output, entries)
+    print(f"Wrote {len(entries)} positions to {args.output} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -36,19 +36,13 @@ class Piece:
         if self.is_home:
             return steps == 6  
         
-        next_pos = board.get_next_position(self.position, steps, self.color)
+        next_pos, squares = board.get_move_path(self.position, steps, self.color)
         if next_pos == -1:
             return False  
         
-        target_cell = board.get_cell(next_pos)
-        if not target_cell:
-            return False
-        
-        current_pos = self.position
-        while current_pos != next_pos:
-            current_pos = board.get_next_position(current_pos, 1, self.color)
-            cell = board.get_cell(current_pos)
-            if cell and cell.is_wall():
+        for square in squares:
+            cell = board.get_cell(square)
+            if cell.is_wall():
                 return cell.pieces[0].color == self.color
 
         
@@ -0,0 +1,221 @@
+import random
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for play_random_games
+    np = None
+
+from board import MOVE_TABLE, SAFE_CELLS
+from compact_state import DONE_POSITION, HOME, PIECES_PER_PLAYER, CompactState
+from batch_eval import require_numpy
+
+ROWS = len(next(iter(MOVE_TABLE.values())))
+# Padding square for paths shorter than six steps; it never holds a wall.
+NO_SQUARE = ROWS - 1
+
+# Flat per-colour tables: index (position + 1) * 7 + steps.
+TARGETS = {color: [target for row in rows for target, _ in row]
+           for color, rows in MOVE_TABLE.items()}
+SQUARES = {color: [squares for row in rows for _, squares in row]
+           for color, rows in MOVE_TABLE.items()}
+
+
+class PlayoutResult(NamedTuple):
+    positions: Tuple[int, ...]
+    turn: int
+    sixes: int
+    winner: Optional[int]
+    rolls: int
+    moves: int
+
+    def to_state(self, colors) -> CompactState:
+        return CompactState.create(self.positions, colors, self.turn, self.sixes)
+
+
+def random_playout(state: CompactState, rng: random.Random, max_rolls: int = 10000) -> PlayoutResult:
+    """Play uniformly random moves from `state` on a flat position list.
+
+    Same rules as CompactState (walls, captures, extra roll on a six, the
+    third six forfeits) without building a state per move. The i-th roll
+    takes one dice value and, with more than one legal move, one random()
+    draw, so a game can be replayed move by move from the same generator.
+    """
+    colors = state.colors
+    if state.is_terminal():
+        winner = next(seat for seat in range(len(colors)) if state.is_winning(seat))
+        return PlayoutResult(state.positions, state.turn, state.sixes, winner, 0, 0)
+    seats = len(colors)
+    targets = [TARGETS[color] for color in colors]
+    squares = [SQUARES[color] for color in colors]
+    done = [DONE_POSITION[color] for color in colors]
+    positions = list(state.positions)
+    turn = state.turn
+    sixes = state.sixes
+    dice_value = state.dice_value
+    uniform = rng.random
+    rolls = 0
+    moves = 0
+    winner = None
+    while True:
+        if dice_value is None:
+            if rolls >= max_rolls:
+                break
+            dice_value = int(uniform() * 6) + 1
+            rolls += 1
+        first = turn * PIECES_PER_PLAYER
+        legal = []
+        if dice_value != 6 or sixes < 2:
+            table = targets[turn]
+            occupied = [position for position in positions if position != HOME]
+            walls = None
+            if len(set(occupied)) != len(occupied):
+                walls = {}
+                for slot, position in enumerate(positions):
+                    if position != HOME:
+                        walls.setdefault(position, []).append(slot // PIECES_PER_PLAYER)
+                walls = {position: owners[0] for position, owners in walls.items()
+                         if len(owners) >= 2 and owners.count(owners[0]) == len(owners)}
+            for slot in range(first, first + PIECES_PER_PLAYER):
+                index = (positions[slot] + 1) * 7 + dice_value
+                target = table[index]
+                if target == -1:
+                    continue
+                if walls:
+                    for square in squares[turn][index]:
+                        owner = walls.get(square)
+                        if owner is not None:
+                            if owner != turn:
+                                target = -1
+                            break
+                    if target == -1:
+                        continue
+                legal.append((slot, target))
+
+        if legal:
+            slot, target = legal[int(uniform() * len(legal))] if len(legal) > 1 else legal[0]
+            if target not in SAFE_CELLS:
+                for other, position in enumerate(positions):
+                    if position == target and not first <= other < first + PIECES_PER_PLAYER:
+                        positions[other] = HOME
+            positions[slot] = target
+            moves += 1
+            if target == done[turn] and all(positions[i] == target
+                                            for i in range(first, first + PIECES_PER_PLAYER)):
+                winner = turn
+                sixes = 0
+                dice_value = None
+                break
+
+        if dice_value == 6 and sixes < 2:
+            sixes += 1
+        else:
+            sixes = 0
+            turn = (turn + 1) % seats
+        dice_value = None
+    return PlayoutResult(tuple(positions), turn, sixes, winner, rolls, moves)
+
+
+def _seat_tables(colors: Sequence):
+    targets = np.full((len(colors), ROWS, 7), -1, dtype=np.int64)
+    squares = np.full((len(colors), ROWS, 7, 6), NO_SQUARE, dtype=np.int64)
+    for seat, color in enumerate(colors):
+        for row, cells in enumerate(MOVE_TABLE[color]):
+            for steps, (target, path) in enumerate(cells):
+                targets[seat, row, steps] = target
+                squares[seat, row, steps, :len(path)] = path
+    return targets, squares
+
+
+def play_random_games(games: int, colors: Sequence, seed: int = 0, max_rolls: int = 2000,
+                      start: Optional[CompactState] = None) -> dict:
+    """Play `games` random games at once, one roll of every unfinished game per step.
+
+    Positions, turns and six streaks live in (games, ...) integer arrays and
+    every rule is applied as an array operation across the games; dice and
+    move choices come from one generator seeded with `seed`. Returns the
+    final `positions`, `winners` (-1 when `max_rolls` ran out) and the
+    `rolls` and `moves` played per game.
+    """
+    require_numpy()
+    seats = len(colors)
+    pieces = seats * PIECES_PER_PLAYER
+    targets, squares = _seat_tables(colors)
+    done = np.array([DONE_POSITION[color] for color in colors])
+    safe = np.zeros(ROWS, dtype=bool)
+    safe[list(SAFE_CELLS)] = True
+    piece_seat = np.arange(pieces) // PIECES_PER_PLAYER
+
+    if start is None:
+        start = CompactState.create((HOME,) * pieces, colors, 0)
+    positions = np.tile(np.array(start.positions, dtype=np.int64), (games, 1))
+    turn = np.full(games, start.turn)
+    sixes = np.full(games, start.sixes)
+    rolls = np.zeros(games, dtype=np.int64)
+    moves = np.zeros(games, dtype=np.int64)
+    winners = np.full(games, -1)
+    rng = np.random.default_rng(seed)
+    rows = np.arange(games)
+    own = np.arange(PIECES_PER_PLAYER)
+
+    for _ in range(max_rolls):
+        playing = np.flatnonzero(winners < 0)
+        if playing.size == 0:
+            break
+        count = playing.size
+        board = positions[playing]
+        seat = turn[playing]
+        streak = sixes[playing]
+        dice = rng.integers(1, 7, count)
+        choice = rng.random(count)
+        rolls[playing] += 1
+        local = rows[:count]
+
+        slots = seat[:, None] * PIECES_PER_PLAYER + own
+        current = board[local[:, None], slots]
+        target = targets[seat[:, None], current + 1, dice[:, None]]
+        path = squares[seat[:, None], current + 1, dice[:, None]]
+
+        # a wall is two or more pieces of one seat alone on a square; only games
+        # with a shared square can have one and only the squares on the paths matter
+        ordered = np.sort(board, axis=1)
+        shared = ((ordered[:, 1:] == ordered[:, :-1]) & (ordered[:, 1:] != HOME)).any(axis=1)
+        blocked = np.zeros((count, PIECES_PER_PLAYER), dtype=bool)
+        walled = np.flatnonzero(shared)
+        if walled.size:
+            matches = (board[walled, None, None, :] == path[walled, ..., None]).reshape(
+                walled.size, PIECES_PER_PLAYER, 6, seats, PIECES_PER_PLAYER)
+            on_square = sum(matches[..., piece].astype(np.int8) for piece in own)
+            total = on_square.sum(axis=3)
+            wall = (total >= 2) & (on_square.max(axis=3) == total)
+            own_wall = wall & (on_square[local[:walled.size], :, :, seat[walled]] == total)
+            first_wall = wall.argmax(axis=2)[..., None]
+            blocked[walled] = (wall.any(axis=2)
+                               & ~np.take_along_axis(own_wall, first_wall, axis=2)[..., 0])
+        legal = (target != -1) & ~blocked
+        legal &= ~((dice == 6) & (streak >= 2))[:, None]
+
+        legal_count = legal.sum(axis=1)
+        moving = legal_count > 0
+        pick = np.minimum((choice * legal_count).astype(np.int64), np.maximum(legal_count - 1, 0))
+        chosen = (np.cumsum(legal, axis=1) > pick[:, None]).argmax(axis=1)
+        moved_slot = slots[local, chosen]
+        moved_target = target[local, chosen]
+
+        capture = (moving & ~safe[np.maximum(moved_target, 0)])[:, None] & \
+            (board == moved_target[:, None]) & (piece_seat[None, :] != seat[:, None])
+        board[capture] = HOME
+        board[local[moving], moved_slot[moving]] = moved_target[moving]
+        moves[playing] += moving
+
+        finished = (board.reshape(count, seats, PIECES_PER_PLAYER)
+                    == done[None, :, None]).all(axis=2)
+        won = finished[local, seat]
+        winners[playing[won]] = seat[won]
+
+        extra = (dice == 6) & (streak < 2) & ~won
+        sixes[playing] = np.where(extra, streak + 1, 0)
+        turn[playing] = np.where(extra | won, seat, (seat + 1) % seats)
+        positions[playing] = board
+
+    return {"positions": positions, "winners": winners, "rolls": rolls, "moves": moves}
@@ -0,0 +1,186 @@
+import json
+import time
+from typing import Dict, List, Optional
+
+from compact_state import CompactState
+
+# Engine methods timed by SearchProfiler.attach and the phase each one is reported as.
+ENGINE_PHASES = {
+    "search": "search",
+    "_expectiminimax": None,   # named after the node type, see _node_phase
+    "_maxn": None,
+    "_children": "expand",
+    "_roll_distribution": "dice",
+    "_ordered_moves": "expand",   # MAX/MIN nodes of the paranoid search; children follow lazily
+    "_leaf_value": "evaluate",
+    "_batched_value": "batch_eval",
+    "_iterate": "iteration",
+    "_select": "select",
+    "_rollout": "rollout",
+    "_scaled_evaluation": "evaluate",
+}
+# CompactState methods, timed for every engine while a profiler is enabled.
+STATE_PHASES = {
+    "valid_moves": "valid_moves",
+    "apply_move": "apply_move",
+    "apply_dice_roll": "apply_dice_roll",
+    "pass_turn": "pass_turn",
+    "evaluate": "heuristic",
+}
+
+_active = None
+
+
+def _node_phase(args) -> str:
+    """`max`, `min` or `chance` from a search call's node type, `leaf` at depth 0"""
+    _, depth, node_type = args[:3]
+    return "leaf" if depth == 0 else node_type.name.lower()
+
+
+class SearchProfiler:
+    """Cumulative wall time and call counts of search phases, kept per call stack.
+
+    Phases are the node types (max, min, chance, leaf), node expansion,
+    move generation and application, dice distributions, transposition
+    table probes and stores, and leaf evaluation. Timing works by wrapping
+    those methods while the profiler is enabled; disabling it puts the
+    originals back, so a disabled or detached profiler costs nothing.
+
+    Engines are added with `attach`. CompactState methods are wrapped for
+    the whole process, so only one profiler can be enabled at a time, and
+    searches running in worker processes are not seen.
+    """
+
+    def __init__(self):
+        self.engines = []
+        self.enabled = False
+        # call stack of phase names -> [calls, total seconds, seconds outside child phases]
+        self.stacks: Dict[tuple, List[float]] = {}
+        self._stack = []
+        self._child_time = []
+        self._patched = []
+
+    def __enter__(self) -> 'SearchProfiler':
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def attach(self, engine) -> 'SearchProfiler':
+        """Time this Expectiminimax or MCTS engine whenever the profiler is enabled"""
+        self.engines.append(engine)
+        if self.enabled:
+            self._patch_engine(engine)
+        return self
+
+    def enable(self):
+        global _active
+        if self.enabled:
+            return
+        if _active is not None:
+            raise RuntimeError("another SearchProfiler is already enabled")
+        _active = self
+        self.enabled = True
+        for method, phase in STATE_PHASES.items():
+            self._patch(CompactState, method, phase, instance=False)
+        for engine in self.engines:
+            self._patch_engine(engine)
+
+    def disable(self):
+        global _active
+        if not self.enabled:
+            return
+        for owner, method, original, instance in reversed(self._patched):
+            if instance:
+                del owner.__dict__[method]
+            else:
+                setattr(owner, method, original)
+        self._patched = []
+        self.enabled = False
+        _active = None
+
+    def reset(self):
+        self.stacks = {}
+
+    def _patch_engine(self, engine):
+        for method, phase in ENGINE_PHASES.items():
+            if hasattr(engine, method):
+                self._patch(engine, method, phase or _node_phase, instance=True)
+        table = getattr(engine, "transposition_table", None)
+        if table is not None:
+            self._patch(table, "probe", "tt_probe", instance=True)
+            self._patch(table, "store", "tt_store", instance=True)
+        race_table = getattr(engine, "race_table", None)
+        if race_table is not None:
+            self._patch(race_table, "win_probability", "race_table", instance=True)
+
+    def _patch(self, owner, method: str, phase, instance: bool):
+        original = getattr(owner, method)
+        profiler = self
+
+        def timed(*args, **kwargs):
+            name = phase if isinstance(phase, str) else phase(args)
+            profiler._stack.append(name)
+            profiler._child_time.append(0.0)
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                profiler._exit(time.perf_counter() - start)
+
+        setattr(owner, method, timed)
+        self._patched.append((owner, method, original, instance))
+
+    def _exit(self, elapsed: float):
+        key = tuple(self._stack)
+        children = self._child_time.pop()
+        self._stack.pop()
+        entry = self.stacks.get(key)
+        if entry is None:
+            entry = self.stacks[key] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] += elapsed - children
+        if self._child_time:
+            self._child_time[-1] += elapsed
+
+    def phases(self) -> Dict[str, dict]:
+        """Calls, total and self seconds per phase, most self time first.
+
+        A phase's total counts each outermost call only, so recursive node
+        phases are not counted twice.
+        """
+        phases = {}
+        for key, (calls, total, own) in self.stacks.items():
+            phase = phases.setdefault(key[-1], {"calls": 0, "total": 0.0, "self": 0.0})
+            phase["calls"] += calls
+            phase["self"] += own
+            if key[-1] not in key[:-1]:
+                phase["total"] += total
+        return dict(sorted(phases.items(), key=lambda item: item[1]["self"], reverse=True))
+
+    def to_json(self) -> dict:
+        return {"phases": self.phases(),
+                "stacks": [{"stack": ";".join(key), "calls": calls, "total": total, "self": own}
+                           for key, (calls, total, own) in self.stacks.items()]}
+
+    def write_json(self, path: str):
+        with open(path, "w") as output:
+            json.dump(self.to_json(), output, indent=2)
+
+    def write_collapsed(self, path: str):
+        """Self time in microseconds per stack, the input format of flamegraph.pl and speedscope"""
+        with open(path, "w") as output:
+            for key, (_, _, own) in sorted(self.stacks.items()):
+                microseconds = round(own * 1e6)
+                if microseconds > 0:
+                    output.write(f"{';'.join(key)} {microseconds}\n")
+
+    def print_report(self, limit: Optional[int] = None):
+        phases = list(self.phases().items())[:limit]
+        own_total = sum(phase["self"] for _, phase in phases) or 1.0
+        print(f"{'phase':>16} {'calls':>10} {'total s':>9} {'self s':>9} {'self %':>7} {'us/call':>8}")
+        for name, phase in phases:
+            print(f"{name:>16} {phase['calls']:>10} {phase['total']:9.3f} {phase['self']:9.3f} "
+                  f"{phase['self'] / own_total:7.1%} {phase['self'] / phase['calls'] * 1e6:8.2f}")
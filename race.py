@@ -0,0 +1,246 @@
+import argparse
+import itertools
+import mmap
+import struct
+import time
+from array import array
+from typing import List, Optional, Tuple
+
+from board import PATHS
+from compact_state import DONE_POSITION, HOME, PIECES_PER_PLAYER, TRACK_SQUARES, CompactState
+
+RACE_MAGIC = b"LUDORACE"
+RACE_VERSION = 1
+# magic, version, max distance, configurations per seat
+HEADER = struct.Struct("<8sIII")
+VALUE = struct.Struct("<f")
+
+# Steps from the last track square to done: one into the home column, five along it.
+HOME_STEPS = 6
+# Within 18 steps of done a piece has at most 13 track squares left, all
+# behind its own colour's last square; the next colour's start is 13
+# squares on, so pieces of different colours can never meet again.
+MAX_RACE_DISTANCE = 18
+
+
+def _remaining(color, position: int) -> Optional[int]:
+    path = PATHS[color]
+    if position == HOME:
+        return None
+    if position >= path["home_start"]:
+        return DONE_POSITION[color] - position
+    return (path["end"] - position) % TRACK_SQUARES + HOME_STEPS
+
+
+# REMAINING[color][position + 1]: steps a piece still has to walk, None in the yard
+REMAINING = {color: [_remaining(color, position) for position in range(HOME, 76)]
+             for color in PATHS}
+
+
+def race_position(colors, remaining, turn: int = 0, sixes: int = 0, dice_value=None) -> CompactState:
+    """The position whose pieces have `remaining` steps to go, 4 per seat in seat order"""
+    positions = []
+    for slot, steps in enumerate(remaining):
+        color = colors[slot // PIECES_PER_PLAYER]
+        if steps < HOME_STEPS:
+            positions.append(DONE_POSITION[color] - steps)
+        else:
+            positions.append((PATHS[color]["end"] - (steps - HOME_STEPS)) % TRACK_SQUARES)
+    return CompactState.create(positions, colors, turn, sixes, dice_value)
+
+
+def seat_configurations(max_distance: int) -> List[Tuple[int, ...]]:
+    """Every sorted tuple of remaining steps for one seat; index 0 is all pieces done"""
+    return list(itertools.combinations_with_replacement(range(max_distance + 1), PIECES_PER_PLAYER))
+
+
+def _successors(configurations, index) -> list:
+    """successors[i][d]: configurations reachable from i by moving one piece d steps"""
+    successors = []
+    for configuration in configurations:
+        row = [()]
+        for steps in range(1, 7):
+            reachable = set()
+            for piece, remaining in enumerate(configuration):
+                if remaining >= steps:
+                    moved = configuration[:piece] + (remaining - steps,) + configuration[piece + 1:]
+                    reachable.add(index[tuple(sorted(moved))])
+            row.append(tuple(sorted(reachable)))
+        successors.append(row)
+    return successors
+
+
+def solve_races(max_distance: int) -> Tuple[list, array]:
+    """Win probability of the side to roll, with no sixes yet, in every two-seat race.
+
+    Returns the seat configurations and a flat array whose entry
+    `i * len(configurations) + j` is the probability for configuration i to
+    move against j, both playing the move that maximises their own chance.
+    Every move shortens the race, so positions are solved in order of the
+    total remaining steps. Only passes and forfeited turns come back to the
+    same pieces; for the two sides of a pair of configurations they leave
+    two linear equations in the probabilities at zero sixes, solved
+    directly. The six streaks 1 and 2 are kept while solving but not
+    stored, since they follow from the stored values in one roll.
+    """
+    if not 0 < max_distance <= MAX_RACE_DISTANCE:
+        raise ValueError(f"max_distance must be between 1 and {MAX_RACE_DISTANCE}")
+    configurations = seat_configurations(max_distance)
+    size = len(configurations)
+    index = {configuration: i for i, configuration in enumerate(configurations)}
+    successors = _successors(configurations, index)
+    totals = [sum(configuration) for configuration in configurations]
+    win = [array("d", bytes(8 * size * size)) for _ in range(3)]
+    sixth = 1.0 / 6.0
+
+    def linear(a: int, b: int) -> list:
+        """(known, handover) per six streak: P(a wins) = known + handover * (1 - P(b wins))"""
+        coefficients = [None] * 3
+        for sixes in (2, 1, 0):
+            known = handover = again = 0.0
+            for steps in range(1, 7):
+                if steps == 6 and sixes == 2:
+                    handover += sixth
+                    continue
+                moves = successors[a][steps]
+                if not moves:
+                    if steps == 6:
+                        again = sixth
+                    else:
+                        handover += sixth
+                elif steps == 6:
+                    extra = win[sixes + 1]
+                    known += sixth * max(1.0 if move == 0 else extra[move * size + b] for move in moves)
+                else:
+                    known += sixth * max(1.0 if move == 0 else 1.0 - win[0][b * size + move]
+                                         for move in moves)
+            if again:
+                next_known, next_handover = coefficients[sixes + 1]
+                known += again * next_known
+                handover += again * next_handover
+            coefficients[sixes] = (known, handover)
+        return coefficients
+
+    for i in range(1, size):
+        for sixes in range(3):
+            win[sixes][i * size] = 1.0
+    pairs = sorted(((i, j) for i in range(1, size) for j in range(i, size)),
+                   key=lambda pair: totals[pair[0]] + totals[pair[1]])
+    for i, j in pairs:
+        x = linear(i, j)
+        y = linear(j, i)
+        (known_x, handover_x), (known_y, handover_y) = x[0], y[0]
+        x0 = ((known_x + handover_x - handover_x * (known_y + handover_y))
+              / (1.0 - handover_x * handover_y))
+        y0 = known_y + handover_y * (1.0 - x0)
+        for sixes in range(3):
+            win[sixes][i * size + j] = x[sixes][0] + x[sixes][1] * (1.0 - y0)
+            win[sixes][j * size + i] = y[sixes][0] + y[sixes][1] * (1.0 - x0)
+    return configurations, win[0]
+
+
+def write_race_table(path: str, max_distance: int, values: array):
+    configurations = len(seat_configurations(max_distance))
+    with open(path, "wb") as table_file:
+        table_file.write(HEADER.pack(RACE_MAGIC, RACE_VERSION, max_distance, configurations))
+        array("f", values).tofile(table_file)
+
+
+class RaceTable:
+    """Exact win probabilities for two-seat races, memory-mapped from a solve_races file.
+
+    A race is a position where no piece is in a yard and every piece is at
+    most `max_distance` steps from done, so nothing can be captured or
+    blocked any more. The stored values assume no sixes and no roll yet;
+    other six streaks and rolled dice are worked out from them in one roll.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as table_file:
+            self._map = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.max_distance, self.size = HEADER.unpack_from(self._map, 0)
+        if magic != RACE_MAGIC or version != RACE_VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a version {RACE_VERSION} race table")
+        configurations = seat_configurations(self.max_distance)
+        self.index = {configuration: i for i, configuration in enumerate(configurations)}
+        self.successors = _successors(configurations, self.index)
+        self.lookups = 0
+
+    def close(self):
+        self._map.close()
+
+    def configuration(self, state: CompactState, seat: int) -> Optional[int]:
+        """Index of the seat's pieces in the table, None if they are not in a race"""
+        table = REMAINING[state.colors[seat]]
+        first = seat * PIECES_PER_PLAYER
+        remaining = []
+        for position in state.positions[first:first + PIECES_PER_PLAYER]:
+            steps = table[position + 1]
+            if steps is None or steps > self.max_distance:
+                return None
+            remaining.append(steps)
+        return self.index[tuple(sorted(remaining))]
+
+    def _win(self, mover: int, other: int) -> float:
+        self.lookups += 1
+        return VALUE.unpack_from(self._map, HEADER.size + (mover * self.size + other) * VALUE.size)[0]
+
+    def _roll(self, mover: int, other: int, sixes: int) -> float:
+        if sixes == 0:
+            return self._win(mover, other)
+        return sum(self._move(mover, other, sixes, steps) for steps in range(1, 7)) / 6.0
+
+    def _move(self, mover: int, other: int, sixes: int, steps: int) -> float:
+        if steps == 6 and sixes >= 2:
+            return 1.0 - self._win(other, mover)
+        moves = self.successors[mover][steps]
+        if not moves:
+            return self._roll(mover, other, sixes + 1) if steps == 6 else 1.0 - self._win(other, mover)
+        if steps == 6:
+            return max(1.0 if move == 0 else self._roll(move, other, sixes + 1) for move in moves)
+        return max(1.0 if move == 0 else 1.0 - self._win(other, move) for move in moves)
+
+    def win_probability(self, state: CompactState, seat: int) -> Optional[float]:
+        """Chance that `seat` wins with best play by both sides, None if `state` is no race"""
+        if len(state.colors) != 2:
+            return None
+        mover = self.configuration(state, state.turn)
+        if mover is None:
+            return None
+        other = self.configuration(state, 1 - state.turn)
+        if other is None:
+            return None
+        if mover == 0 or other == 0:
+            probability = 1.0 if mover == 0 else 0.0
+        elif state.dice_value is None:
+            probability = self._roll(mover, other, state.sixes)
+        else:
+            probability = self._move(mover, other, state.sixes, state.dice_value)
+        return probability if seat == state.turn else 1.0 - probability
+
+    def best_slot(self, state: CompactState) -> Optional[int]:
+        """The legal move of a race position with the highest win probability"""
+        moves = state.valid_moves()
+        if not moves:
+            return None
+        return max(moves, key=lambda slot: self.win_probability(state.apply_move(slot), state.turn))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve two-player race endgames")
+    parser.add_argument("--output", default="race_table.bin")
+    parser.add_argument("--max-distance", type=int, default=9,
+                        help=f"steps from done of the furthest piece (at most {MAX_RACE_DISTANCE})")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    configurations, values = solve_races(args.max_distance)
+    write_race_table(args.output, args.max_distance, values)
+    print(f"Solved {len(values)} races ({len(configurations)} configurations per seat) "
+          f"in {time.perf_counter() - start:.1f}s, wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
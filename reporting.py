@@ -0,0 +1,83 @@
+class SearchReporter:
+    """Receives every SearchResult produced by Expectiminimax.find_best_move"""
+
+    def report(self, state, result):
+        raise NotImplementedError
+
+
+class TextReporter(SearchReporter):
+    """Prints the move analysis and search statistics to the terminal"""
+
+    def report(self, state, result):
+        dice_history = state.get_last_n_dice_values(3)
+        dice_history.reverse()
+
+        print("\n=== Current Game State ===")
+        print(f"Current roll: {state.dice_value}")
+        if dice_history:
+            print(f"Roll sequence: {' → '.join(str(x) for x in dice_history + [state.dice_value])}")
+
+        print("\n=== Piece Positions ===")
+        for piece in state.current_player.pieces:
+            position_type = "Home" if piece.is_home else "Done" if piece.is_done else str(piece.position)
+            cell = state.board.get_cell(piece.position) if not piece.is_home and not piece.is_done else None
+            safety_status = "Safe" if cell and cell.is_safe else "Vulnerable"
+
+            print(f"Piece {piece.number}: {position_type} ({safety_status})")
+
+        if result.best_slot is None:
+            print("\n=== Search Statistics ===")
+            print("No valid moves available")
+            print(f"Nodes visited: {result.nodes_visited}")
+            return
+
+        print("\n=== Move Analysis ===")
+        steps = state.dice_value
+        for slot, score in result.move_scores.items():
+            piece = state.current_player.pieces[slot % len(state.current_player.pieces)]
+            next_pos = state.board.get_next_position(piece.position, steps, piece.color)
+            target_cell = state.board.get_cell(next_pos)
+
+            print(f"\nMove Option: Piece {piece.number} → {steps} steps")
+            print(f"  Position: {piece.position if not piece.is_home else 'Home'} → {next_pos}")
+            print(f"  Score: {score:.2f}")
+
+            if piece.is_home and steps == 6:
+                print("  Strategy: Getting new piece out")
+            elif target_cell:
+                if target_cell.is_safe:
+                    print("  Strategy: Moving to safe spot")
+                if target_cell.pieces and target_cell.pieces[0].color != piece.color:
+                    print("  Strategy: Capture opportunity")
+
+                threats = []
+                for opponent in state.opponents:
+                    for opp_piece in opponent.pieces:
+                        if not opp_piece.is_home and not opp_piece.is_done:
+                            distance = (opp_piece.position - next_pos) % 52
+                            if 1 <= distance <= 6:
+                                threats.append(f"Piece {opp_piece.number} at distance {distance}")
+                if threats:
+                    print(f"  Risks: Threatened by {', '.join(threats)}")
+
+        best_piece = state.current_player.pieces[result.best_slot % len(state.current_player.pieces)]
+        print("\n=== Selected Move ===")
+        print(f"Moving Piece {best_piece.number} by {steps} steps")
+        print(f"Expected Value: {result.best_score:.2f}")
+
+        print("\n=== Search Statistics ===")
+        if result.book_hit:
+            print("Opening book move, no search")
+            return
+        print(f"Total nodes visited: {result.nodes_visited}")
+        print(f"├── MAX nodes: {result.max_nodes}")
+        print(f"├── MIN nodes: {result.min_nodes}")
+        print(f"├── CHANCE nodes: {result.chance_nodes}")
+        print(f"└── Leaf nodes: {result.leaf_nodes}")
+        print(f"Transposition table: {result.tt_hits} hits, {result.tt_misses} misses, "
+              f"{result.tt_collisions} collisions")
+        print(f"Evaluation cache: {result.eval_hits} hits, {result.eval_misses} misses, "
+              f"{result.eval_evictions} evictions")
+        print(f"\nSearch depth: {result.depth_reached}")
+        print(f"Search time: {result.elapsed * 1000:.1f} ms ({result.nodes_per_second:,.0f} nodes/s)")
+        print(f"Best move score: {result.best_score:.2f}")
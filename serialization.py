@@ -0,0 +1,156 @@
+import mmap
+import os
+import struct
+from typing import Iterator, NamedTuple, Optional
+
+from board import Board
+from compact_state import DONE_POSITION, HOME, PIECES_PER_PLAYER, CompactState
+from state import State
+from zobrist import COLOR_INDEX, PLAYER_COLORS
+
+# seats - 2 | turn << 2 | sixes << 4, dice value (0 for none), colour index of each seat
+POSITION_HEADER = struct.Struct("<BBB")
+
+RECORD_MAGIC = b"LUDOREC1"
+# A move byte holds the dice value in the high three bits, so it is never 0.
+END_OF_GAME = 0
+PASS_SLOT = 31
+
+
+def encode_position(state: CompactState) -> bytes:
+    """3 header bytes plus one byte per piece (position + 1): 11 bytes for two seats"""
+    seats = len(state.colors)
+    colors = 0
+    for seat, color in enumerate(state.colors):
+        colors |= COLOR_INDEX[color] << (2 * seat)
+    header = POSITION_HEADER.pack((seats - 2) | state.turn << 2 | state.sixes << 4,
+                                  state.dice_value or 0, colors)
+    return header + bytes(position + 1 for position in state.positions)
+
+
+def decode_position(data) -> CompactState:
+    flags, dice_value, color_bits = POSITION_HEADER.unpack_from(data, 0)
+    seats = (flags & 3) + 2
+    colors = [PLAYER_COLORS[(color_bits >> (2 * seat)) & 3] for seat in range(seats)]
+    start = POSITION_HEADER.size
+    positions = [value - 1 for value in data[start:start + seats * PIECES_PER_PLAYER]]
+    return CompactState.create(positions, colors, (flags >> 2) & 3, (flags >> 4) & 3,
+                               dice_value or None)
+
+
+def encode_board(board: Board, dice_value=None, sixes: int = 0) -> bytes:
+    return encode_position(CompactState.from_board(board, dice_value, sixes))
+
+
+def decode_board(data, is_computer=None) -> Board:
+    """A Board with the pieces, cells and current player of an encoded position"""
+    state = decode_position(data)
+    board = Board(list(state.colors), is_computer or [True] * len(state.colors))
+    for seat, player in enumerate(board.players):
+        done = DONE_POSITION[player.color]
+        for piece, slot in zip(player.pieces, state.seat_slots(seat)):
+            piece.position = state.positions[slot]
+            piece.is_home = piece.position == HOME
+            piece.is_done = piece.position == done
+            if not piece.is_home:
+                board.get_cell(piece.position).pieces.append(piece)
+    board.current_player = board.players[state.turn]
+    return board
+
+
+def encode_state(state: State) -> bytes:
+    return encode_position(CompactState.from_state(state))
+
+
+def decode_state(data, is_computer=None) -> State:
+    """A State for an encoded position; the six streak becomes its roll history"""
+    position = decode_position(data)
+    board = decode_board(data, is_computer)
+    state = State(board, board.current_player, dice_value=position.dice_value)
+    state.recent_rolls = (6,) * position.sixes
+    return state
+
+
+def encode_move(dice_value: int, slot: Optional[int]) -> int:
+    """One byte per roll: the dice value and the slot moved, or a pass"""
+    return dice_value << 5 | (PASS_SLOT if slot is None else slot)
+
+
+class GameRecordWriter:
+    """Appends games to a record file one roll at a time.
+
+    A game is its start position (length byte + encode_position) followed
+    by one encode_move byte per roll and an END_OF_GAME byte, so a file can
+    be extended while it is read and replayed without an index.
+    """
+
+    def __init__(self, path: str):
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(RECORD_MAGIC)
+        self.games = 0
+
+    def start_game(self, state: CompactState):
+        encoded = encode_position(state)
+        self.file.write(bytes((len(encoded),)) + encoded)
+
+    def record(self, dice_value: int, slot: Optional[int]):
+        self.file.write(bytes((encode_move(dice_value, slot),)))
+
+    def end_game(self):
+        self.file.write(bytes((END_OF_GAME,)))
+        self.games += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self) -> 'GameRecordWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class GameRecord(NamedTuple):
+    start: CompactState
+    moves: bytes
+
+    def replay(self) -> Iterator[CompactState]:
+        """Every decision state of the game after its roll, then the final position"""
+        state = self.start
+        for move in self.moves:
+            state = state.apply_dice_roll(move >> 5)
+            yield state
+            slot = move & 31
+            state = state.pass_turn() if slot == PASS_SLOT else state.apply_move(slot)
+        yield state
+
+
+class GameRecordReader:
+    """Memory-mapped reader over a file written by GameRecordWriter"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as record_file:
+            if os.fstat(record_file.fileno()).st_size <= len(RECORD_MAGIC):
+                self._map = b""
+            else:
+                self._map = mmap.mmap(record_file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._map and self._map[:len(RECORD_MAGIC)] != RECORD_MAGIC:
+                raise ValueError(f"{path} is not a game record file")
+
+    def close(self):
+        if self._map:
+            self._map.close()
+
+    def __iter__(self) -> Iterator[GameRecord]:
+        data = self._map
+        offset = len(RECORD_MAGIC)
+        while offset < len(data):
+            length = data[offset]
+            start = decode_position(data[offset + 1:offset + 1 + length])
+            moves_start = offset + 1 + length
+            end = data.find(bytes((END_OF_GAME,)), moves_start)
+            if end == -1:
+                break  # a game still being written
+            yield GameRecord(start, data[moves_start:end])
+            offset = end + 1
@@ -0,0 +1,267 @@
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from color import Color
+from compact_state import HOME, PIECES_PER_PLAYER, CompactState
+from dice import Dice
+from expectiminimax import Expectiminimax
+from zobrist import COLOR_INDEX
+
+DEFAULT_DEPTH = 2
+MAX_DEPTH = 6
+
+_engines = {}
+
+
+def _search_move(state: CompactState, depth: int) -> int:
+    """Worker side of GameServer.search; each process keeps one engine per depth"""
+    engine = _engines.get(depth)
+    if engine is None:
+        engine = _engines[depth] = Expectiminimax(depth=depth, symmetry=True)
+    return engine.search(state, use_book=False).best_slot
+
+
+class ProtocolError(Exception):
+    """A request the server rejects; the message goes back to the client"""
+
+
+def _is_number(value) -> bool:
+    """An integer in a request; JSON true and false decode to bools, which are ints too"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class Match:
+    """One hosted game: the position, the human seats and the dice.
+
+    Seats play in the order the colours were requested in. Computer seats
+    and forced passes are played by `advance`, which stops when a human
+    seat has to choose a move.
+    """
+
+    def __init__(self, game_id: int, colors, humans, depth: int, seed=None):
+        self.id = game_id
+        self.state = CompactState.create((HOME,) * PIECES_PER_PLAYER * len(colors), colors, 0)
+        self.humans = frozenset(humans)
+        self.depth = depth
+        self.dice = Dice(seed)
+        self.lock = asyncio.Lock()
+
+    def winner(self) -> Optional[int]:
+        return next((seat for seat in range(len(self.state.colors)) if self.state.is_winning(seat)),
+                    None)
+
+    def waiting_for_human(self) -> bool:
+        return (self.state.dice_value is not None and self.state.turn in self.humans
+                and not self.state.is_terminal())
+
+    def play(self, slot: Optional[int]) -> dict:
+        event = {"seat": self.state.turn, "dice": self.state.dice_value, "slot": slot}
+        self.state = self.state.pass_turn() if slot is None else self.state.apply_move(slot)
+        return event
+
+    async def advance(self, search) -> List[dict]:
+        """Roll and play until a human seat has a legal move or the game is over"""
+        events = []
+        while not self.state.is_terminal():
+            if self.state.dice_value is None:
+                self.state = self.state.apply_dice_roll(self.dice.roll())
+            moves = self.state.valid_moves()
+            if not moves:
+                events.append(self.play(None))
+            elif self.state.turn in self.humans:
+                break
+            elif len(moves) == 1:
+                events.append(self.play(moves[0]))
+            else:
+                events.append(self.play(await search(self.state, self.depth)))
+        return events
+
+    def message(self, events: List[dict]) -> dict:
+        waiting = self.waiting_for_human()
+        return {"game": self.id, "state": self.state.to_dict(), "events": events,
+                "moves": list(self.state.valid_moves()) if waiting else [],
+                "winner": self.winner()}
+
+
+class GameServer:
+    """Hosts matches for clients speaking JSON lines over TCP or a Unix socket.
+
+    Every request is one JSON object with an "op" and optional "id", which
+    the response echoes next to "ok" and either the result or "error":
+
+        {"op": "new_game", "colors": ["blue", "green"], "humans": [0], "depth": 2}
+        {"op": "move", "game": 1, "slot": 2}
+        {"op": "state", "game": 1}
+        {"op": "close", "game": 1}
+        {"op": "stats"}
+
+    Requests on one connection are answered in order; connections run
+    concurrently. Computer moves are searched in a process pool, so a slow
+    search only delays its own game. Games belong to the connection that
+    created them: only it can play, read or close them, and they are
+    dropped when it closes.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.games: Dict[int, Match] = {}
+        self.ids = itertools.count(1)
+        # workers start on demand; forked ones would inherit the open client sockets
+        self.executor = ProcessPoolExecutor(max_workers=workers,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        self.connections = 0
+        self.searches = 0
+        self.requests = 0
+
+    async def search(self, state: CompactState, depth: int) -> int:
+        self.searches += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, _search_move, state, depth)
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        owned = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await self.respond(line, owned)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            for game_id in owned:
+                self.games.pop(game_id, None)
+            writer.close()
+
+    async def respond(self, line: bytes, owned: set) -> dict:
+        self.requests += 1
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ProtocolError("request must be a JSON object")
+            request_id = request.get("id")
+            op = request.get("op")
+            if not isinstance(op, str) or op not in self.HANDLERS:
+                raise ProtocolError(f"unknown op: {op!r}")
+            result = await self.HANDLERS[op](self, request, owned)
+        except ProtocolError as error:
+            return {"id": request_id, "ok": False, "error": str(error)}
+        except json.JSONDecodeError as error:
+            return {"id": None, "ok": False, "error": f"invalid JSON: {error.msg}"}
+        except Exception as error:
+            # a bad request must not take the connection and its games down with it
+            return {"id": request_id, "ok": False, "error": f"internal error: {type(error).__name__}"}
+        return {"id": request_id, "ok": True, **result}
+
+    def _game(self, request: dict, owned: set) -> Match:
+        """The requested game, which must belong to this connection"""
+        game_id = request.get("game")
+        if not _is_number(game_id):
+            raise ProtocolError(f"game must be a game number: {game_id!r}")
+        match = self.games.get(game_id) if game_id in owned else None
+        if match is None:
+            raise ProtocolError(f"no such game: {game_id!r}")
+        return match
+
+    async def _new_game(self, request: dict, owned: set) -> dict:
+        names = request.get("colors", ["blue", "green"])
+        try:
+            colors = [Color(name) for name in names] if isinstance(names, list) else []
+        except (TypeError, ValueError):
+            colors = []
+        if (not 2 <= len(colors) <= len(COLOR_INDEX) or len(set(colors)) != len(colors)
+                or not set(colors) <= COLOR_INDEX.keys()):
+            raise ProtocolError("colors must name 2-4 different players: blue, red, green, yellow")
+        humans = request.get("humans", [0])
+        if not isinstance(humans, list) or not all(_is_number(seat) and 0 <= seat < len(colors)
+                                                   for seat in humans):
+            raise ProtocolError("humans must be a list of seat numbers")
+        depth = request.get("depth", DEFAULT_DEPTH)
+        if not _is_number(depth) or not 1 <= depth <= MAX_DEPTH:
+            raise ProtocolError(f"depth must be between 1 and {MAX_DEPTH}")
+        seed = request.get("seed")
+        if seed is not None and not _is_number(seed):
+            raise ProtocolError("seed must be an integer")
+
+        match = Match(next(self.ids), colors, humans, depth, seed)
+        self.games[match.id] = match
+        owned.add(match.id)
+        async with match.lock:
+            events = await match.advance(self.search)
+            return match.message(events)
+
+    async def _move(self, request: dict, owned: set) -> dict:
+        match = self._game(request, owned)
+        async with match.lock:
+            if not match.waiting_for_human():
+                raise ProtocolError("no move is expected in this game")
+            slot = request.get("slot")
+            if not _is_number(slot) or slot not in match.state.valid_moves():
+                raise ProtocolError(f"illegal move: {slot!r}")
+            events = [match.play(slot)]
+            events += await match.advance(self.search)
+            return match.message(events)
+
+    async def _state(self, request: dict, owned: set) -> dict:
+        return self._game(request, owned).message([])
+
+    async def _close(self, request: dict, owned: set) -> dict:
+        match = self._game(request, owned)
+        del self.games[match.id]
+        owned.discard(match.id)
+        return {"game": match.id}
+
+    async def _stats(self, request: dict, owned: set) -> dict:
+        return {"games": len(self.games), "connections": self.connections,
+                "searches": self.searches, "requests": self.requests}
+
+    HANDLERS = {"new_game": _new_game, "move": _move, "state": _state,
+                "close": _close, "stats": _stats}
+
+
+async def start_server(game_server: GameServer, host: str = "127.0.0.1", port: int = 8765,
+                       unix_path: Optional[str] = None) -> asyncio.AbstractServer:
+    if unix_path is not None:
+        return await asyncio.start_unix_server(game_server.handle_connection, unix_path)
+    return await asyncio.start_server(game_server.handle_connection, host, port)
+
+
+async def serve(host: str, port: int, unix_path: Optional[str], workers: Optional[int]):
+    game_server = GameServer(workers)
+    server = await start_server(game_server, host, port, unix_path)
+    addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"Serving Ludo games on {addresses}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        game_server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host Ludo games over a JSON-lines socket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, default=None, help="search processes")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
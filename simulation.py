@@ -0,0 +1,233 @@
+import argparse
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from color import Color
+from compact_state import CompactState
+from dice import Dice
+from expectiminimax import Expectiminimax
+from mcts import MCTS
+from profiler import SearchProfiler
+from serialization import GameRecordWriter
+
+
+class RandomAgent:
+    def __init__(self, seed=None):
+        self.name = "random"
+        self.rng = random.Random(seed)
+
+    def choose_move(self, state: CompactState) -> int:
+        return self.rng.choice(state.valid_moves())
+
+
+class GreedyAgent:
+    """Plays the move with the best immediate evaluation"""
+
+    def __init__(self):
+        self.name = "greedy"
+
+    def choose_move(self, state: CompactState) -> int:
+        return max(state.valid_moves(),
+                   key=lambda slot: state.apply_move(slot).evaluate(state.turn))
+
+
+class ExpectiminimaxAgent:
+    def __init__(self, depth: int = 2, **options):
+        self.name = f"expectiminimax:{depth}"
+        if options.get("multiplayer", "paranoid") != "paranoid":
+            self.name += f":{options['multiplayer']}"
+        self.engine = Expectiminimax(depth=depth, **options)
+
+    def choose_move(self, state: CompactState) -> int:
+        return self.engine.search(state).best_slot
+
+
+class MCTSAgent:
+    def __init__(self, iterations: int = 1000, rollout: str = "random", seed=None):
+        self.name = f"mcts:{iterations}"
+        if rollout != "random":
+            self.name += f":{rollout}"
+        self.engine = MCTS(iterations=iterations, rollout=rollout, seed=seed)
+
+    def choose_move(self, state: CompactState) -> int:
+        return self.engine.search(state).best_slot
+
+
+def make_agent(spec: str, seed=None):
+    """Build an agent from "random", "greedy", "expectiminimax[:depth[:paranoid|maxn]]"
+    or "mcts[:iterations[:random|greedy]]" """
+    name, *arguments = spec.split(":")
+    if name == "random":
+        return RandomAgent(seed)
+    if name == "greedy":
+        return GreedyAgent()
+    if name == "expectiminimax":
+        depth = int(arguments[0]) if arguments else 2
+        multiplayer = arguments[1] if len(arguments) > 1 else "paranoid"
+        return ExpectiminimaxAgent(depth=depth, multiplayer=multiplayer)
+    if name == "mcts":
+        iterations = int(arguments[0]) if arguments else 1000
+        rollout = arguments[1] if len(arguments) > 1 else "random"
+        return MCTSAgent(iterations=iterations, rollout=rollout, seed=seed)
+    raise ValueError(f"Unknown agent: {spec}")
+
+
+@dataclass
+class GameResult:
+    agents: List[str]
+    winner: Optional[int]
+    moves: int
+    rolls: int
+    move_times: List[List[float]] = field(default_factory=list)
+
+
+def play_game(agents, seed=None, colors=(Color.BLUE, Color.GREEN),
+              max_rolls: int = 5000, recorder=None) -> GameResult:
+    """Play one game between `agents` (one per seat) without any terminal output.
+
+    With a GameRecordWriter as `recorder` every roll is appended to its file.
+    """
+    dice = Dice(seed)
+    state = CompactState.create((-1,) * 4 * len(colors), colors, 0)
+    if recorder is not None:
+        recorder.start_game(state)
+    move_times = [[] for _ in agents]
+    moves = 0
+    rolls = 0
+    while rolls < max_rolls and not state.is_terminal():
+        state = state.apply_dice_roll(dice.roll())
+        rolls += 1
+        valid_moves = state.valid_moves()
+        if not valid_moves:
+            if recorder is not None:
+                recorder.record(state.dice_value, None)
+            state = state.pass_turn()
+            continue
+        if len(valid_moves) == 1:
+            slot = valid_moves[0]
+        else:
+            start = time.perf_counter()
+            slot = agents[state.turn].choose_move(state)
+            move_times[state.turn].append(time.perf_counter() - start)
+        if recorder is not None:
+            recorder.record(state.dice_value, slot)
+        state = state.apply_move(slot)
+        moves += 1
+
+    if recorder is not None:
+        recorder.end_game()
+    winner = next((seat for seat in range(len(colors)) if state.is_winning(seat)), None)
+    return GameResult([agent.name for agent in agents], winner, moves, rolls, move_times)
+
+
+def _play_game_task(agent_specs, game_index: int, seed: int, colors, max_rolls: int,
+                    recorder=None, profiler=None) -> GameResult:
+    # Rotate seats between games so no agent always moves first.
+    shift = game_index % len(agent_specs)
+    seating = agent_specs[shift:] + agent_specs[:shift]
+    game_seed = seed * 1000003 + game_index
+    agents = [make_agent(spec, game_seed + seat) for seat, spec in enumerate(seating)]
+    if profiler is not None:
+        for agent in agents:
+            if hasattr(agent, "engine"):
+                profiler.attach(agent.engine)
+    return play_game(agents, game_seed, colors, max_rolls, recorder)
+
+
+def run_simulation(agent_specs, games: int, seed: int = 0, workers: int = 1,
+                   colors=None, max_rolls: int = 5000,
+                   record: Optional[str] = None, profiler=None) -> List[GameResult]:
+    """Play `games` games; with `record` every game is appended to that game record file.
+
+    A SearchProfiler passed as `profiler` is attached to every agent's engine.
+    """
+    agent_specs = list(agent_specs)
+    colors = tuple(colors or [Color.BLUE, Color.RED, Color.GREEN, Color.YELLOW][:len(agent_specs)])
+    tasks = [(agent_specs, index, seed, colors, max_rolls) for index in range(games)]
+    if (record is not None or profiler is not None) and workers > 1:
+        raise ValueError("recording or profiling games needs workers=1")
+    if record is not None:
+        with GameRecordWriter(record) as recorder:
+            return [_play_game_task(*task, recorder, profiler) for task in tasks]
+    if workers <= 1:
+        return [_play_game_task(*task, profiler=profiler) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_play_game_task, *zip(*tasks), chunksize=max(1, games // (workers * 4))))
+
+
+def summarize(results: List[GameResult]) -> dict:
+    """Win rate and per-move search time per agent, plus game lengths"""
+    summary = {"games": len(results), "draws": 0, "agents": {}}
+    for result in results:
+        if result.winner is None:
+            summary["draws"] += 1
+        for seat, name in enumerate(result.agents):
+            stats = summary["agents"].setdefault(name, {"games": 0, "wins": 0, "move_times": []})
+            stats["games"] += 1
+            stats["wins"] += int(result.winner == seat)
+            stats["move_times"].extend(result.move_times[seat])
+
+    for stats in summary["agents"].values():
+        times = stats.pop("move_times")
+        stats["win_rate"] = stats["wins"] / stats["games"] if stats["games"] else 0.0
+        stats["decisions"] = len(times)
+        stats["mean_move_ms"] = statistics.fmean(times) * 1000 if times else 0.0
+        stats["max_move_ms"] = max(times) * 1000 if times else 0.0
+
+    lengths = [result.moves for result in results]
+    summary["mean_moves"] = statistics.fmean(lengths) if lengths else 0.0
+    summary["min_moves"] = min(lengths, default=0)
+    summary["max_moves"] = max(lengths, default=0)
+    return summary
+
+
+def print_summary(summary: dict):
+    print(f"Games: {summary['games']} (draws: {summary['draws']})")
+    print(f"Game length: mean {summary['mean_moves']:.1f} moves, "
+          f"min {summary['min_moves']}, max {summary['max_moves']}")
+    for name, stats in summary["agents"].items():
+        print(f"{name:>18}: win rate {stats['win_rate']:6.1%}  "
+              f"{stats['decisions']} decisions  "
+              f"mean {stats['mean_move_ms']:.2f} ms/move  max {stats['max_move_ms']:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless AI-vs-AI Ludo games")
+    parser.add_argument("agents", nargs="+",
+                        help='one per seat: "random", "greedy", "expectiminimax:<depth>[:maxn]" '
+                             'or "mcts:<iterations>[:greedy]"')
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--record", help="append every game to this game record file")
+    parser.add_argument("--profile", help="write per-phase search timings to this JSON file")
+    parser.add_argument("--flamegraph", help="write collapsed stacks for flamegraph.pl to this file")
+    args = parser.parse_args()
+
+    profiler = None
+    if args.profile or args.flamegraph:
+        profiler = SearchProfiler()
+        profiler.enable()
+    start = time.perf_counter()
+    try:
+        results = run_simulation(args.agents, args.games, args.seed, args.workers,
+                                 record=args.record, profiler=profiler)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+    print_summary(summarize(results))
+    print(f"Wall time: {time.perf_counter() - start:.1f}s")
+    if profiler is not None:
+        profiler.print_report()
+        if args.profile:
+            profiler.write_json(args.profile)
+        if args.flamegraph:
+            profiler.write_collapsed(args.flamegraph)
+
+
+if __name__ == "__main__":
+    main()
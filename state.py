@@ -1,16 +1,22 @@
 import copy
+from collections import deque
+from compact_state import CompactState
+
+# Three sixes in a row end the turn, so no rule looks further back than this.
+ROLL_HISTORY = 3
 
 class State:
     def __init__(self, board, player, parent=None, dice_value=None):
         self.board = copy.deepcopy(board)
         self.current_player = copy.deepcopy(player)
-        self.players = [
-            copy.deepcopy(self.board.player1),
-            copy.deepcopy(self.board.player2)
-        ]
+        self.players = [copy.deepcopy(p) for p in self.board.players]
         self.dice_value = dice_value
-        self.parent = parent  
-        self.opponent = self.board.player2 if player == self.board.player1 else self.board.player1
+        # Only the last few rolls before this state are kept, not the parent itself,
+        # so copies stay the same size however long the game runs.
+        self.recent_rolls = parent._child_rolls() if parent else ()
+        seat = [p.color for p in self.players].index(player.color)
+        self.opponents = self.players[seat + 1:] + self.players[:seat]
+        self.opponent = self.opponents[0]
         self._sync_pieces_with_board()
     
     def _sync_pieces_with_board(self):
@@ -25,13 +31,13 @@ class State:
     
     def apply_dice_roll(self, value: int) -> 'State':
         new_state = copy.deepcopy(self)
-        new_state.parent = self
+        new_state.recent_rolls = self._child_rolls()
         new_state.dice_value = value
         return new_state
     
     def apply_move(self, move) -> 'State':
         new_state = copy.deepcopy(self)
-        new_state.parent = self
+        new_state.recent_rolls = self._child_rolls()
         captured = False
         
         piece = self._find_piece_in_new_state(new_state, move.piece)
@@ -71,76 +77,12 @@ class State:
         return self.board.get_valid_moves(self.current_player, self.dice_value)
     
     def evaluate(self) -> float:
-        score = 0.0
-        opponent = self.opponent
-        
-        PIECE_VALUE = 25.0           
-        PROGRESS_WEIGHT = 0.8        
-        SAFE_SPOT_BONUS = 15.0       
-        WINNING_BONUS = 500.0        
-        HOME_PENALTY = -10.0         
-        CAPTURE_OPPORTUNITY = 20.0   
-        NEAR_HOME_BONUS = 35.0       
-        RISK_PENALTY = -12.0         
-        
-        if self.current_player.is_winning():
-            return WINNING_BONUS
-        elif opponent.is_winning():
-            return -WINNING_BONUS
-        
-        for piece in self.current_player.pieces:
-            if piece.is_done:
-                score += PIECE_VALUE * 2
-                score += (WINNING_BONUS * 0.2)  
-                continue
-                
-            if piece.is_home:
-                score += HOME_PENALTY
-                continue
-                
-            path = self.board.paths[piece.color]
-            if piece.position >= path["home_start"]:
-                home_progress = (piece.position - path["home_start"]) / 5.0
-                score += NEAR_HOME_BONUS + (home_progress * PIECE_VALUE)
-            else:
-                total_distance = (path["end"] - path["start"]) % 52
-                current_distance = (piece.position - path["start"]) % 52
-                progress = current_distance / total_distance
-                score += progress * PIECE_VALUE * PROGRESS_WEIGHT
-            
-            cell = self.board.get_cell(piece.position)
-            if cell:
-                if cell.is_safe:
-                    score += SAFE_SPOT_BONUS
-                else:
-                    threats = 0
-                    for opp_piece in opponent.pieces:
-                        if not opp_piece.is_home and not opp_piece.is_done:
-                            distance = (opp_piece.position - piece.position) % 52
-                            if 1 <= distance <= 6:
-                                threats += 1
-                                risk = (7 - distance) * RISK_PENALTY / max(threats, 2)
-                                score += risk
-                                
-                                if distance <= 3:
-                                    score += CAPTURE_OPPORTUNITY / 2
-        
-        opponent_weight = 0.7 
-        for piece in opponent.pieces:
-            if piece.is_done:
-                score -= PIECE_VALUE * opponent_weight
-            elif not piece.is_home:
-                for my_piece in self.current_player.pieces:
-                    if not my_piece.is_home and not my_piece.is_done:
-                        distance = (piece.position - my_piece.position) % 52
-                        if 1 <= distance <= 6:
-                            score += CAPTURE_OPPORTUNITY * (7 - distance) / 6
-        
-        return score
+        """Score for the side to move against all opponents, see CompactState.evaluate"""
+        compact = CompactState.from_state(self)
+        return compact.evaluate(compact.turn)
 
     def is_terminal(self) -> bool:
-        return (self.current_player.is_winning() or 
-                (self.board.player1.is_winning() or self.board.player2.is_winning()))
+        return any(player.is_winning() for player in self.players)
     
     def _find_piece_in_new_state(self, new_state, original_piece):
         
@@ -149,43 +91,36 @@ class State:
                 return piece
         return None
 
-    def _should_keep_turn(self) -> bool:
-        if self.dice_value != 6:
-            return False
+    def _child_rolls(self) -> tuple:
+        """`recent_rolls` of a state derived from this one"""
+        if self.dice_value is None:
+            return self.recent_rolls
+        return (self.recent_rolls + (self.dice_value,))[-ROLL_HISTORY:]
 
-        consecutive_sixes = 1
-        current = self
-        while current.parent and consecutive_sixes < 3:
-            if current.parent.dice_value == 6:
-                consecutive_sixes += 1
-            else:
+    def _previous_sixes(self) -> int:
+        count = 0
+        for value in reversed(self.recent_rolls):
+            if value != 6:
                 break
-            current = current.parent
+            count += 1
+        return count
 
-        return consecutive_sixes < 3
+    def _should_keep_turn(self) -> bool:
+        if self.dice_value != 6:
+            return False
+        return 1 + self._previous_sixes() < 3
 
     def get_last_n_dice_values(self, n: int) -> list:
-        values = []
-        current = self
-        current_sequence = []
-        
-        while current and len(current_sequence) < n:
-            if current.dice_value is not None:
-                if not current_sequence or current.dice_value == 6:
-                    current_sequence.append(current.dice_value)
-            current = current.parent
-            
-            if current and current.dice_value is not None and current.dice_value != 6:
-                break
-        
-        return current_sequence
+        """The current roll followed by the sixes rolled just before it, newest first"""
+        current_sequence = [] if self.dice_value is None else [self.dice_value]
+        current_sequence.extend([6] * self._previous_sixes())
+        return current_sequence[:n]
 
     def switch_player(self):
-        self.current_player = (
-            self._find_player_in_state(self.board.player2) 
-            if self.current_player.color == self.board.player1.color 
-            else self._find_player_in_state(self.board.player1)
-        )
+        colors = [player.color for player in self.board.players]
+        index = colors.index(self.current_player.color)
+        next_player = self.board.players[(index + 1) % len(colors)]
+        self.current_player = self._find_player_in_state(next_player)
 
     def _find_player_in_state(self, original_player):
         for player in self.players:
@@ -194,8 +129,10 @@ class State:
         return None
 
 class StateManager:
-    def __init__(self):
-        self.states = []
+    """Keeps the last `max_states` saved states, or all of them when it is None"""
+
+    def __init__(self, max_states=64):
+        self.states = deque(maxlen=max_states)
     
     def save_state(self, state: State):
         self.states.append(state)
@@ -204,4 +141,4 @@ class StateManager:
         return self.states[-1] if self.states else None
     
     def clear_history(self):
-        self.states.clear()
\ No newline at end of file
+        self.states.clear()
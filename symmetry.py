@@ -0,0 +1,119 @@
+import functools
+from typing import NamedTuple, Optional, Tuple
+
+from board import PATHS
+from color import Color
+from compact_state import HOME, PIECES_PER_PLAYER, TRACK_SQUARES, CompactState
+from zobrist import (COLOR_INDEX, DICE_KEYS, PERSPECTIVE_KEYS, PIECE_KEYS, PLAYER_COLORS,
+                     SIXES_KEYS, TURN_KEYS, seating_key)
+
+# Moving every colour one place round the board (BLUE -> RED -> GREEN ->
+# YELLOW) moves track squares 13 forward and home columns to the next colour.
+TRACK_SHIFT = PATHS[PLAYER_COLORS[1]]["start"] - PATHS[PLAYER_COLORS[0]]["start"]
+HOME_COLUMN = PATHS[PLAYER_COLORS[1]]["home_start"] - PATHS[PLAYER_COLORS[0]]["home_start"]
+COLORS = len(PLAYER_COLORS)
+
+
+def _rotate(position: int, shift: int) -> int:
+    if position == HOME:
+        return HOME
+    if position < TRACK_SQUARES:
+        return (position + TRACK_SHIFT * shift) % TRACK_SQUARES
+    column = position - TRACK_SQUARES
+    return TRACK_SQUARES + (column + HOME_COLUMN * shift) % (HOME_COLUMN * COLORS)
+
+
+# ROTATIONS[shift][position + 1]: the square `position` moves to when every colour moves `shift` places
+ROTATIONS = [[_rotate(position, shift) for position in range(HOME, TRACK_SQUARES + HOME_COLUMN * COLORS)]
+             for shift in range(COLORS)]
+
+
+def rotate_color(color: Color, shift: int) -> Color:
+    return PLAYER_COLORS[(COLOR_INDEX[color] + shift) % COLORS]
+
+
+def mover_rotation(state: CompactState) -> list:
+    """The ROTATIONS row canonical_form uses for `state`: the side to move becomes BLUE"""
+    return ROTATIONS[-COLOR_INDEX[state.colors[state.turn]] % COLORS]
+
+
+class CanonicalPosition(NamedTuple):
+    """`state` is the canonical form; its slot i holds the piece in slot `slots[i]` of the original"""
+    state: CompactState
+    slots: Tuple[int, ...]
+    shift: int
+
+
+def canonical_form(state: CompactState) -> CanonicalPosition:
+    """The representative of `state` under colour rotation and piece order.
+
+    Every colour moves round the board until the side to move is BLUE, the
+    seats are listed from the side to move in playing order and each seat's
+    pieces are sorted by square. The rules and CompactState.evaluate are
+    the same for all positions with one canonical form, so their searches
+    and scores are too.
+    """
+    seats = len(state.colors)
+    shift = -COLOR_INDEX[state.colors[state.turn]] % COLORS
+    rotation = ROTATIONS[shift]
+    positions = []
+    colors = []
+    slots = []
+    for offset in range(seats):
+        seat = (state.turn + offset) % seats
+        colors.append(rotate_color(state.colors[seat], shift))
+        pieces = sorted(state.seat_slots(seat), key=lambda slot: rotation[state.positions[slot] + 1])
+        slots.extend(pieces)
+        positions.extend(rotation[state.positions[slot] + 1] for slot in pieces)
+    canonical = CompactState.create(positions, colors, 0, state.sixes, state.dice_value)
+    return CanonicalPosition(canonical, tuple(slots), shift)
+
+
+def _placement_key(state: CompactState, shift: int) -> int:
+    """Piece keys of `state` with every colour moved `shift` places and each seat's pieces sorted"""
+    rotation = ROTATIONS[shift]
+    positions = state.positions
+    key = 0
+    for seat, color in enumerate(state.colors):
+        first = seat * PIECES_PER_PLAYER
+        base = (COLOR_INDEX[color] + shift) % COLORS * PIECES_PER_PLAYER
+        squares = sorted(rotation[position + 1] for position in positions[first:first + PIECES_PER_PLAYER])
+        for number, square in enumerate(squares):
+            key ^= PIECE_KEYS[base + number][square + 1]
+    return key
+
+
+@functools.lru_cache(maxsize=None)
+def _canonical_seating_key(colors: tuple, turn: int) -> int:
+    """seating_key of the rotated colours in the seat order canonical_form lists them"""
+    seats = len(colors)
+    shift = -COLOR_INDEX[colors[turn]] % COLORS
+    return seating_key(tuple(rotate_color(colors[(turn + offset) % seats], shift)
+                             for offset in range(seats)))
+
+
+def canonical_key(state: CompactState, perspective: Optional[int] = None) -> int:
+    """canonical_form(state).state.key without building the state.
+
+    With a `perspective` seat the key also holds that seat's rotated colour,
+    the canonical counterpart of `state.key ^ PERSPECTIVE_KEYS[colour]`.
+    Rotations of one seating can put the other seats in a different
+    playing order, so the rotated seat order is part of the key.
+    """
+    colors = state.colors
+    shift = -COLOR_INDEX[colors[state.turn]] % COLORS
+    key = (_placement_key(state, shift) ^ _canonical_seating_key(colors, state.turn)
+           ^ TURN_KEYS[PLAYER_COLORS[0]]
+           ^ SIXES_KEYS[state.sixes] ^ DICE_KEYS[state.dice_value or 0])
+    if perspective is not None:
+        key ^= PERSPECTIVE_KEYS[rotate_color(colors[perspective], shift)]
+    return key
+
+
+def canonical_placement_key(state: CompactState, seat: int) -> int:
+    """Key of the piece placement seen from `seat`, rotated so that `seat` is BLUE.
+
+    CompactState.evaluate(seat) is the same for every position with this
+    key, whatever the turn, six streak or dice value.
+    """
+    return _placement_key(state, -COLOR_INDEX[state.colors[seat]] % COLORS)
@@ -0,0 +1,19 @@
+import json
+import os
+import sys
+
+import pytest
+
+# The modules live at the top of the repository, not in a package.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from compact_state import CompactState  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def corpus():
+    """benchmark_positions.json as {name: CompactState}"""
+    with open(os.path.join(ROOT, "benchmark_positions.json")) as corpus_file:
+        entries = json.load(corpus_file)
+    return {entry["name"]: CompactState.from_dict(entry["state"]) for entry in entries}
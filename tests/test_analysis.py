@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+from color import Color
+from compact_state import HOME, CompactState
+from expectiminimax import Expectiminimax
+
+BOARD_ORDER = (Color.BLUE, Color.RED, Color.GREEN, Color.YELLOW)
+OTHER_ORDER = (Color.BLUE, Color.GREEN, Color.RED, Color.YELLOW)
+
+
+def _reseat(state, colors):
+    """The same pieces, turn and roll with the seats in another play order"""
+    positions = []
+    for color in colors:
+        seat = state.colors.index(color)
+        positions.extend(state.positions[seat * 4:seat * 4 + 4])
+    turn = colors.index(state.colors[state.turn])
+    return CompactState.create(positions, colors, turn, state.sixes, state.dice_value)
+
+
+def _midgame_positions(count, seed=3):
+    rng = random.Random(seed)
+    state = CompactState.create((HOME,) * 16, BOARD_ORDER, 0)
+    positions = []
+    while len(positions) < count:
+        state = state.apply_dice_roll(rng.randint(1, 6))
+        moves = state.valid_moves()
+        pieces_out = sum(position >= 0 for position in state.positions)
+        if len(moves) > 1 and rng.random() < 0.2 and pieces_out >= 6:
+            positions.append(state)
+        state = state.apply_move(rng.choice(moves)) if moves else state.pass_turn()
+    return positions
+
+
+def test_analyze_mixed_seatings_matches_fresh_searches():
+    # Each position is followed by itself with two seats swapped, which the
+    # shared transposition table must not mistake for the same position.
+    positions = []
+    for state in _midgame_positions(3):
+        positions += [(state, None), (_reseat(state, OTHER_ORDER), None)]
+    engine = Expectiminimax(depth=5)
+    for (state, _), result in zip(positions, engine.analyze(positions, use_book=False)):
+        expected = Expectiminimax(depth=5).search(state, use_book=False).move_scores
+        assert result.move_scores.keys() == expected.keys()
+        for slot, score in expected.items():
+            assert result.move_scores[slot] == pytest.approx(score)
@@ -0,0 +1,53 @@
+import pytest
+
+from expectiminimax import Expectiminimax, NodeType, SearchTimeout
+
+np = pytest.importorskip("numpy")
+from batch_eval import encode_positions, evaluate_batch  # noqa: E402
+
+
+def _leaves(state, depth):
+    """Every position of the full tree `depth` plies below `state`"""
+    if depth == 0 or state.is_terminal():
+        return [state]
+    if state.dice_value is None:
+        children = [state.apply_dice_roll(dice_value) for dice_value in range(1, 7)]
+    else:
+        children = [state.apply_move(slot) for slot in state.valid_moves()] or [state.pass_turn()]
+    return [leaf for child in children for leaf in _leaves(child, depth - 1)]
+
+
+@pytest.mark.parametrize("name", ["opening-2", "midgame-0", "endgame-1", "four-player-2"])
+def test_batch_matches_scalar_evaluation(corpus, name):
+    leaves = _leaves(corpus[name], 3)
+    positions = encode_positions(leaves)
+    for seat in range(len(leaves[0].colors)):
+        values = evaluate_batch(positions, leaves[0].colors, seat)
+        expected = [leaf.evaluate(seat) for leaf in leaves]
+        np.testing.assert_allclose(values, expected, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("name", ["midgame-1", "endgame-0", "six-streak-2", "four-player-1"])
+def test_batched_search_matches_plain_search(corpus, name):
+    expected = Expectiminimax(depth=4).search(corpus[name], use_book=False)
+    result = Expectiminimax(depth=4, leaf_batch_depth=2).search(corpus[name], use_book=False)
+    assert result.best_slot == expected.best_slot
+    for slot, score in expected.move_scores.items():
+        assert result.move_scores[slot] == pytest.approx(score, abs=1e-9)
+
+
+def test_batched_frontier_checks_the_deadline(corpus):
+    engine = Expectiminimax(depth=4, leaf_batch_depth=4)
+    state = corpus["four-player-2"]
+    engine._prepare_root(state)
+    engine.deadline = 0.0   # long passed
+    engine.nodes_visited = engine.DEADLINE_CHECK_INTERVAL - 1   # the next node checks it
+    with pytest.raises(SearchTimeout):
+        engine._batched_value(state.apply_move(state.valid_moves()[0]), 4, NodeType.CHANCE)
+
+
+def test_batched_search_keeps_its_time_budget(corpus):
+    result = Expectiminimax(leaf_batch_depth=3).search(corpus["four-player-2"], time_budget_ms=50,
+                                                       use_book=False)
+    assert result.depth_reached >= 1
+    assert result.elapsed < 2.0
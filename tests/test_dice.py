@@ -0,0 +1,60 @@
+import itertools
+import math
+
+import pytest
+
+from color import Color
+from compact_state import HOME, CompactState
+from dice import FACES, MAX_SIXES, Dice, DiceRules, dice_table
+
+VARIANTS = [DiceRules(forfeit, bonus) for forfeit, bonus in itertools.product((True, False), repeat=2)]
+
+
+@pytest.mark.parametrize("rules", VARIANTS)
+@pytest.mark.parametrize("sixes", range(MAX_SIXES + 1))
+def test_roll_table_rows(rules, sixes):
+    table = dice_table(rules)
+    assert math.fsum(probability for _, probability in table.distribution[sixes]) == pytest.approx(1.0)
+    assert [value for value, _ in table.distribution[sixes]] == list(range(1, FACES + 1))
+    for outcome in table.outcomes[sixes]:
+        six = outcome.value == FACES
+        assert outcome.forfeit == (rules.three_sixes_forfeit and six and sixes == MAX_SIXES)
+        assert outcome.extra_roll == (six and not outcome.forfeit)
+        assert outcome.next_sixes == (min(sixes + 1, MAX_SIXES) if outcome.extra_roll else 0)
+
+
+@pytest.mark.parametrize("rules", VARIANTS)
+@pytest.mark.parametrize("sixes", range(MAX_SIXES + 2))
+def test_table_agrees_with_dice_probabilities(rules, sixes):
+    dice = Dice(seed=0, rules=rules)
+    expected = dict(dice_table(rules).distribution[min(sixes, MAX_SIXES)])
+    for history in ((6,) * sixes, (2,) + (6,) * sixes, (6, 6, 1) + (6,) * sixes):
+        assert dict(dice.get_probabilities(history)) == expected
+    assert dict(dice.get_probabilities(None)) == dict(dice_table(rules).distribution[0])
+
+
+@pytest.mark.parametrize("rules", VARIANTS)
+def test_third_six_and_capture_follow_the_rules(rules):
+    table = dice_table(rules)
+    colors = (Color.BLUE, Color.RED)
+    third_six = CompactState.create((HOME,) * 8, colors, 0, MAX_SIXES, 6)
+    assert (third_six.valid_moves(table) == ()) == rules.three_sixes_forfeit
+    if rules.three_sixes_forfeit:
+        assert third_six.pass_turn(table).turn == 1
+
+    # BLUE enters on a six after a RED piece sits on the square a 1 reaches.
+    blue = CompactState.create((HOME,) * 8, colors, 0, 0, 6).apply_move(0, table)
+    target = blue.apply_dice_roll(1).destination(0)
+    positions = list(blue.positions)
+    positions[4] = target
+    capture = CompactState.create(positions, colors, 0, 0, 1).apply_move(0, table)
+    assert capture.positions[4] == HOME
+    assert (capture.turn == 0) == rules.capture_bonus
+
+
+def test_corpus_has_third_six_positions(corpus):
+    forfeits = {len(state.colors) for state in corpus.values() if state.sixes == MAX_SIXES
+                and state.dice_value == 6 and state.valid_moves() == ()}
+    decisions = {len(state.colors) for state in corpus.values() if state.sixes == MAX_SIXES
+                 and len(state.valid_moves()) >= 2}
+    assert forfeits == decisions == {2, 3, 4}
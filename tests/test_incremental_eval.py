@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from color import Color
+from compact_state import HOME, PIECES_PER_PLAYER, CompactState
+from incremental_eval import IncrementalEvaluator
+
+COLORS = (Color.BLUE, Color.RED, Color.GREEN, Color.YELLOW)
+
+
+def _assert_matches(evaluator, state):
+    evaluator.update(state)
+    for seat in range(len(state.colors)):
+        assert evaluator.evaluate(seat) == pytest.approx(state.evaluate(seat), abs=1e-9)
+
+
+def _search_order_leaves(state, depth, leaves):
+    """Leaves of a full tree in depth-first order, as a search visits them"""
+    if depth == 0 or state.is_terminal():
+        leaves.append(state)
+    elif state.dice_value is None:
+        for dice_value in range(1, 7):
+            _search_order_leaves(state.apply_dice_roll(dice_value), depth - 1, leaves)
+    else:
+        moves = state.valid_moves()
+        for child in [state.apply_move(slot) for slot in moves] or [state.pass_turn()]:
+            _search_order_leaves(child, depth - 1, leaves)
+
+
+@pytest.mark.parametrize("players", [2, 3, 4])
+def test_random_games_match_full_evaluation(players):
+    rng = random.Random(1000 + players)
+    start = CompactState.create((HOME,) * PIECES_PER_PLAYER * players, COLORS[:players], 0)
+    evaluator = IncrementalEvaluator(start)
+    captures = 0
+    for _ in range(8):
+        state = start
+        while not state.is_terminal():
+            _assert_matches(evaluator, state)
+            state = state.apply_dice_roll(rng.randint(1, 6))
+            moves = state.valid_moves()
+            before = sum(position == HOME for position in state.positions)
+            state = state.apply_move(rng.choice(moves)) if moves else state.pass_turn()
+            captures += sum(position == HOME for position in state.positions) > before
+        _assert_matches(evaluator, state)
+    assert captures > 0
+
+
+@pytest.mark.parametrize("players", [2, 4])
+def test_search_order_jumps_match_full_evaluation(players):
+    # The evaluator follows a depth-first search, so it also has to undo
+    # moves and jump between siblings; start from positions of a random game.
+    rng = random.Random(7)
+    state = CompactState.create((HOME,) * PIECES_PER_PLAYER * players, COLORS[:players], 0)
+    evaluator = IncrementalEvaluator(state)
+    for ply in range(120):
+        if state.is_terminal():
+            break
+        if ply % 20 == 19:
+            leaves = []
+            _search_order_leaves(state, 3, leaves)
+            for leaf in leaves:
+                _assert_matches(evaluator, leaf)
+        state = state.apply_dice_roll(rng.randint(1, 6))
+        moves = state.valid_moves()
+        state = state.apply_move(rng.choice(moves)) if moves else state.pass_turn()
@@ -0,0 +1,15 @@
+import asyncio
+
+from load_test import percentile, run_load_test, summary
+from server import MAX_DEPTH
+
+
+def test_report_when_every_game_fails():
+    # the server rejects the depth, so no game starts and no move is timed
+    report = asyncio.run(run_load_test(games=3, concurrency=2, depth=MAX_DEPTH + 1, players=2,
+                                       max_moves=5, seed=0, host="127.0.0.1", port=0,
+                                       unix_path=None, workers=1))
+    assert report["moves"] == 0 and report["failed"] == 3
+    text = summary(report, MAX_DEPTH + 1)
+    assert "0 moves" in text and "no moves completed" in text
+    assert percentile([], 0.5) is None
@@ -0,0 +1,22 @@
+import pytest
+
+from expectiminimax import Expectiminimax
+from profiler import SearchProfiler
+
+
+@pytest.mark.parametrize("chance_pruning", ["none", "star1"])
+def test_default_search_records_expansion(corpus, chance_pruning):
+    engine = Expectiminimax(depth=3, chance_pruning=chance_pruning)
+    with SearchProfiler().attach(engine) as profiler:
+        engine.search(corpus["midgame-0"], use_book=False)
+    phases = profiler.phases()
+    assert phases["expand"]["calls"] > 0
+    assert phases["expand"]["total"] > 0.0
+
+
+@pytest.mark.parametrize("multiplayer", ["paranoid", "maxn"])
+def test_chance_nodes_record_dice_distributions(corpus, multiplayer):
+    engine = Expectiminimax(depth=3, multiplayer=multiplayer)
+    with SearchProfiler().attach(engine) as profiler:
+        result = engine.search(corpus["six-streak-0"], use_book=False)
+    assert profiler.phases()["dice"]["calls"] == result.chance_nodes
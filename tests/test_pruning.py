@@ -0,0 +1,30 @@
+import pytest
+
+from expectiminimax import Expectiminimax
+
+POSITIONS = ["opening-0", "midgame-0", "midgame-1", "endgame-0", "six-streak-1", "four-player-0"]
+
+
+def _search(state, **options):
+    return Expectiminimax(depth=5, **options).search(state, use_book=False)
+
+
+def _assert_same(result, expected):
+    assert result.best_slot == expected.best_slot
+    assert result.move_scores.keys() == expected.move_scores.keys()
+    for slot, score in expected.move_scores.items():
+        assert result.move_scores[slot] == pytest.approx(score, abs=1e-9)
+
+
+@pytest.mark.parametrize("name", POSITIONS)
+def test_chance_pruning_keeps_scores(corpus, name):
+    expected = _search(corpus[name], chance_pruning="none")
+    for chance_pruning in ("star1", "star2"):
+        _assert_same(_search(corpus[name], chance_pruning=chance_pruning), expected)
+
+
+@pytest.mark.parametrize("name", POSITIONS)
+@pytest.mark.parametrize("chance_pruning", Expectiminimax.CHANCE_PRUNING)
+def test_move_ordering_keeps_scores(corpus, name, chance_pruning):
+    expected = _search(corpus[name], chance_pruning=chance_pruning, move_ordering=False)
+    _assert_same(_search(corpus[name], chance_pruning=chance_pruning, move_ordering=True), expected)
@@ -0,0 +1,112 @@
+import itertools
+
+import pytest
+
+from color import Color
+from compact_state import PIECES_PER_PLAYER, CompactState
+from expectiminimax import Expectiminimax
+from race import MAX_RACE_DISTANCE, RaceTable, race_position, solve_races, write_race_table
+
+COLORS = (Color.BLUE, Color.GREEN)
+MAX_DISTANCE = 2
+
+
+@pytest.fixture(scope="module")
+def table(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("race") / "race.bin")
+    _, values = solve_races(MAX_DISTANCE)
+    write_race_table(path, MAX_DISTANCE, values)
+    race_table = RaceTable(path)
+    yield race_table
+    race_table.close()
+
+
+def _sorted(state):
+    """`state` with each seat's pieces in square order, which a race's value does not depend on"""
+    positions = []
+    for seat in range(len(state.colors)):
+        positions += sorted(state.positions[slot] for slot in state.seat_slots(seat))
+    return CompactState.create(positions, state.colors, state.turn, state.sixes, state.dice_value)
+
+
+def _solve(roots):
+    """P(seat 0 wins) before and after every roll of the positions reachable from `roots`.
+
+    Passes and forfeited turns lead back to earlier positions, so this is
+    the fixed point of one roll of expectimax, found by value iteration,
+    rather than a depth-limited search.
+    """
+    index = {}
+    transitions = []   # per position and dice value: the positions each legal move leads to
+    frontier = list(roots)
+    while frontier:
+        state = frontier.pop()
+        if state in index:
+            continue
+        index[state] = len(transitions)
+        rows = None
+        if not state.is_terminal():
+            rows = []
+            for dice_value in range(1, 7):
+                rolled = state.apply_dice_roll(dice_value)
+                children = [rolled.apply_move(slot) for slot in rolled.valid_moves()] or [rolled.pass_turn()]
+                rows.append((rolled.turn, [_sorted(child) for child in children]))
+                frontier += rows[-1][1]
+        transitions.append((state, rows))
+    values = [float(state.is_winning(0)) for state, _ in transitions]
+    choices = [None if rows is None else
+               [(turn, [index[child] for child in children]) for turn, children in rows]
+               for _, rows in transitions]
+
+    def rolled_value(choice):
+        turn, children = choice
+        options = [values[child] for child in children]
+        return max(options) if turn == 0 else min(options)
+
+    change = 1.0
+    while change > 1e-12:
+        change = 0.0
+        for number, rows in enumerate(choices):
+            if rows is not None:
+                new = sum(rolled_value(choice) for choice in rows) / 6
+                change = max(change, abs(new - values[number]))
+                values[number] = new
+    return {state: (values[number], None if choices[number] is None else
+                    [rolled_value(choice) for choice in choices[number]])
+            for state, number in index.items()}
+
+
+def test_table_matches_direct_solve(table):
+    configurations = itertools.combinations_with_replacement(range(MAX_DISTANCE + 1), 4)
+    races = [_sorted(race_position(COLORS, first + second, turn, sixes))
+             for first, second in itertools.product(configurations, repeat=2) if any(first + second)
+             for turn in (0, 1) for sixes in (0, 1, 2)]
+    solved = _solve(races)
+    for state in races:
+        # the table stores floats, hence the tolerance
+        value, after_roll = solved[state]
+        assert table.win_probability(state, 0) == pytest.approx(value, abs=1e-6)
+        assert table.win_probability(state, 1) == pytest.approx(1.0 - value, abs=1e-6)
+        if after_roll is not None:
+            for dice_value, expected in zip(range(1, 7), after_roll):
+                rolled = state.apply_dice_roll(dice_value)
+                assert table.win_probability(rolled, 0) == pytest.approx(expected, abs=1e-6)
+
+
+def test_positions_outside_the_table_fall_through(table, corpus):
+    far = race_position(COLORS, (MAX_RACE_DISTANCE + 1, 1, 1, 0, 2, 2, 1, 1), 0, 0, 3)
+    assert table.configuration(far, 0) is None
+    assert table.win_probability(far, 0) is None
+    four_players = corpus["four-player-1"]
+    assert table.win_probability(four_players, 0) is None
+    near = race_position(COLORS + (Color.RED,), (1,) * 3 * PIECES_PER_PLAYER, 0, 0, 1)
+    assert table.win_probability(near, 0) is None
+    with pytest.raises(ValueError):
+        solve_races(MAX_RACE_DISTANCE + 1)
+
+    lookups = table.lookups
+    for state in (far, four_players, near):
+        expected = Expectiminimax(depth=3).search(state, use_book=False)
+        result = Expectiminimax(depth=3, race_table=table).search(state, use_book=False)
+        assert result.move_scores == expected.move_scores
+    assert table.lookups == lookups
@@ -0,0 +1,83 @@
+import json
+import random
+
+import pytest
+
+from color import Color
+from compact_state import HOME, CompactState
+from serialization import (GameRecordReader, GameRecordWriter, decode_position, decode_state,
+                           encode_position, encode_state)
+
+SEATINGS = [(Color.BLUE, Color.GREEN), (Color.YELLOW, Color.RED, Color.BLUE),
+            (Color.BLUE, Color.GREEN, Color.RED, Color.YELLOW)]
+
+
+def _random_states(colors, seed, count=60):
+    """States of a random game, before and after each roll"""
+    rng = random.Random(seed)
+    state = CompactState.create((HOME,) * 4 * len(colors), colors, 0)
+    states = []
+    while len(states) < count and not state.is_terminal():
+        states.append(state)
+        state = state.apply_dice_roll(rng.randint(1, 6))
+        states.append(state)
+        moves = state.valid_moves()
+        state = state.apply_move(rng.choice(moves)) if moves else state.pass_turn()
+    return states
+
+
+def _mid_turn_states(corpus):
+    # a six streak waiting for its next roll, and a third six that forfeits the turn
+    streak = corpus["six-streak-1"]
+    return [streak, CompactState.create(streak.positions, streak.colors, streak.turn, 1, None),
+            CompactState.create(streak.positions, streak.colors, streak.turn, 2, None),
+            CompactState.create(streak.positions, streak.colors, streak.turn, 2, 6)]
+
+
+@pytest.mark.parametrize("colors", SEATINGS)
+def test_dict_round_trip(colors, corpus):
+    for state in _random_states(colors, seed=len(colors)) + _mid_turn_states(corpus):
+        data = json.loads(json.dumps(state.to_dict()))
+        assert CompactState.from_dict(data) == state
+
+
+@pytest.mark.parametrize("colors", SEATINGS)
+def test_binary_round_trip(colors, corpus):
+    for state in _random_states(colors, seed=10 + len(colors)) + _mid_turn_states(corpus):
+        data = encode_position(state)
+        assert decode_position(data) == state
+        assert encode_state(decode_state(data)) == data
+
+
+def test_record_replay(tmp_path, corpus):
+    path = str(tmp_path / "games.rec")
+    starts = [CompactState.create((HOME,) * 4 * len(colors), colors, 0) for colors in SEATINGS]
+    streak = corpus["six-streak-1"]
+    starts.append(CompactState.create(streak.positions, streak.colors, streak.turn, 2))
+    played = []
+    rng = random.Random(5)
+    with GameRecordWriter(path) as writer:
+        for start in starts:
+            writer.start_game(start)
+            state, decisions = start, []
+            for _ in range(200):
+                if state.is_terminal():
+                    break
+                state = state.apply_dice_roll(rng.randint(1, 6))
+                decisions.append(state)
+                moves = state.valid_moves()
+                slot = rng.choice(moves) if moves else None
+                writer.record(state.dice_value, slot)
+                state = state.pass_turn() if slot is None else state.apply_move(slot)
+            writer.end_game()
+            played.append((start, decisions + [state]))
+
+    reader = GameRecordReader(path)
+    try:
+        records = list(reader)
+        assert len(records) == len(played)
+        for record, (start, states) in zip(records, played):
+            assert record.start == start
+            assert list(record.replay()) == states
+    finally:
+        reader.close()
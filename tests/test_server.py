@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+from server import GameServer, start_server
+
+
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, message: dict) -> dict:
+        self.writer.write(json.dumps(message).encode() + b"\n")
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+
+async def _connect(server) -> _Connection:
+    host, port = server.sockets[0].getsockname()[:2]
+    return _Connection(*await asyncio.open_connection(host, port))
+
+
+def _run(scenario):
+    async def main():
+        game_server = GameServer(workers=1)
+        server = await start_server(game_server, port=0)
+        try:
+            async with server:
+                await scenario(server)
+        finally:
+            game_server.close()
+    asyncio.run(main())
+
+
+def test_malformed_requests_keep_the_connection():
+    async def scenario(server):
+        client = await _connect(server)
+        for request in ({"op": "state", "game": [1]}, {"op": "state", "game": True},
+                        {"op": ["state"]}, {"op": {"name": "state"}}, [1, 2]):
+            response = await client.request(request)
+            assert response["ok"] is False
+        response = await client.request({"op": "new_game", "humans": [0, 1], "seed": 1, "id": 7})
+        assert response["ok"] is True and response["id"] == 7
+        client.writer.close()
+    _run(scenario)
+
+
+def test_games_belong_to_their_connection():
+    async def scenario(server):
+        owner = await _connect(server)
+        other = await _connect(server)
+        game = (await owner.request({"op": "new_game", "humans": [0, 1], "seed": 1}))["game"]
+        for op in ("state", "move", "close"):
+            response = await other.request({"op": op, "game": game, "slot": 0})
+            assert response == {"id": None, "ok": False, "error": f"no such game: {game}"}
+        assert (await owner.request({"op": "state", "game": game}))["ok"] is True
+        assert (await owner.request({"op": "close", "game": game}))["ok"] is True
+        owner.writer.close()
+        other.writer.close()
+    _run(scenario)
+
+
+def test_new_game_keeps_the_requested_seat_order():
+    async def scenario(server):
+        client = await _connect(server)
+        response = await client.request({"op": "new_game", "colors": ["green", "blue"],
+                                         "humans": [0], "seed": 3})
+        assert response["state"]["colors"] == ["green", "blue"]
+        # the human is green, so every move the server waits for is green's
+        assert not response["moves"] or response["state"]["turn"] == 0
+        for request in ({"colors": ["blue", "blue", "green"]}, {"colors": "blue"},
+                        {"colors": ["blue", "green"], "humans": [True]},
+                        {"colors": ["blue", "green"], "depth": True}):
+            response = await client.request({"op": "new_game", **request})
+            assert response["ok"] is False
+        client.writer.close()
+    _run(scenario)
@@ -0,0 +1,40 @@
+import pytest
+
+from board import PATHS
+from color import Color
+from compact_state import HOME, CompactState
+from expectiminimax import Expectiminimax
+from symmetry import canonical_form, canonical_key
+
+# Not in board order: rotating it can change who plays after whom.
+SEATING = (Color.BLUE, Color.GREEN, Color.RED, Color.YELLOW)
+
+
+def _one_piece_out(seat, steps, turn, dice_value=None):
+    positions = [HOME] * 16
+    positions[seat * 4] = (PATHS[SEATING[seat]]["start"] + steps) % 52
+    return CompactState.create(positions, SEATING, turn, 0, dice_value)
+
+
+def test_rotations_with_another_play_order_have_different_keys():
+    # BLUE's piece with GREEN to roll rotates onto GREEN's piece with BLUE to roll,
+    # but GREEN plays after BLUE in the seating and RED after GREEN.
+    first = _one_piece_out(0, 3, 1)
+    second = _one_piece_out(1, 3, 0)
+    assert canonical_key(first, 0) != canonical_key(second, 1)
+    assert canonical_form(first).state.key == canonical_key(first)
+
+
+@pytest.mark.parametrize("steps", [1, 4, 9])
+def test_symmetric_search_matches_plain_search(steps):
+    # After BLUE's move GREEN rolls. After GREEN's move RED and YELLOW can
+    # pass, leaving the rotation of that position with BLUE to roll four
+    # plies further down, so the deeper search meets it at the same depth.
+    symmetric = Expectiminimax(symmetry=True)
+    for seat, depth in ((0, 5), (1, 9)):
+        root = _one_piece_out(seat, steps - 1, seat, 1)
+        expected = Expectiminimax(depth=depth).search(root, use_book=False).move_scores
+        scores = symmetric.search(root, depth=depth, use_book=False).move_scores
+        assert scores.keys() == expected.keys()
+        for slot, score in expected.items():
+            assert scores[slot] == pytest.approx(score)
@@ -0,0 +1,88 @@
+from enum import Enum
+from typing import NamedTuple, Optional
+
+
+class Bound(Enum):
+    EXACT = 1
+    LOWER = 2
+    UPPER = 3
+
+
+class TTEntry(NamedTuple):
+    key: int
+    depth: int
+    bound: Bound
+    value: float
+    move: Optional[int] = None
+
+
+class TranspositionTable:
+    """Fixed-size table of search results indexed by the low bits of a Zobrist key.
+
+    Entries are only reused at the depth they were searched at, so a node's
+    value stays a function of (position, depth) no matter which move order
+    or dice branch reached it first.
+
+    replacement is "depth" (keep the deeper entry of the two competing for a
+    slot) or "always" (the newest entry wins).
+
+    An entry can also keep the best move found at its node, which
+    `probe_move` returns whatever depth the entry was searched at.
+    """
+
+    REPLACEMENT_POLICIES = ("depth", "always")
+
+    def __init__(self, size: int = 1 << 16, replacement: str = "depth"):
+        if replacement not in self.REPLACEMENT_POLICIES:
+            raise ValueError(f"Unknown replacement policy: {replacement}")
+        capacity = 1
+        while capacity < size:
+            capacity <<= 1
+        self.capacity = capacity
+        self.mask = capacity - 1
+        self.replacement = replacement
+        self.entries = [None] * capacity
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def clear(self):
+        self.entries = [None] * self.capacity
+        self.reset_stats()
+
+    def probe(self, key: int, depth: int) -> Optional[TTEntry]:
+        entry = self.entries[key & self.mask]
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.key != key:
+            self.collisions += 1
+            self.misses += 1
+            return None
+        if entry.depth != depth:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def probe_move(self, key: int) -> Optional[int]:
+        entry = self.entries[key & self.mask]
+        if entry is None or entry.key != key:
+            return None
+        return entry.move
+
+    def store(self, key: int, depth: int, bound: Bound, value: float, move: Optional[int] = None):
+        index = key & self.mask
+        current = self.entries[index]
+        if (self.replacement == "depth" and current is not None
+                and current.key != key and current.depth > depth):
+            return
+        self.entries[index] = TTEntry(key, depth, bound, value, move)
+        self.stores += 1
+
+    def __len__(self) -> int:
+        return sum(1 for entry in self.entries if entry is not None)
@@ -0,0 +1,39 @@
+import functools
+import random
+from color import Color
+
+PLAYER_COLORS = (Color.BLUE, Color.RED, Color.GREEN, Color.YELLOW)
+COLOR_INDEX = {color: index for index, color in enumerate(PLAYER_COLORS)}
+
+_rng = random.Random(0x1D0)
+
+# One key per (colour, piece number) and board position; position -1 (home yard) is index 0.
+PIECE_KEYS = [[_rng.getrandbits(64) for _ in range(77)] for _ in range(16)]
+TURN_KEYS = {color: _rng.getrandbits(64) for color in PLAYER_COLORS}
+PERSPECTIVE_KEYS = {color: _rng.getrandbits(64) for color in PLAYER_COLORS}
+SIXES_KEYS = [0] + [_rng.getrandbits(64) for _ in range(2)]
+DICE_KEYS = [0] + [_rng.getrandbits(64) for _ in range(6)]
+# One key per seat and colour, so the same pieces with a different play order hash differently.
+SEAT_KEYS = [{color: _rng.getrandbits(64) for color in PLAYER_COLORS} for _ in range(4)]
+
+
+def piece_key(color: Color, number: int, position: int) -> int:
+    return PIECE_KEYS[COLOR_INDEX[color] * 4 + number][position + 1]
+
+
+@functools.lru_cache(maxsize=None)
+def seating_key(colors) -> int:
+    """Key of the seat order, constant for a game; colours are listed seat by seat"""
+    key = 0
+    for seat, color in enumerate(colors):
+        key ^= SEAT_KEYS[seat][color]
+    return key
+
+
+def hash_position(positions, colors, turn: int, sixes: int = 0, dice_value=None) -> int:
+    """Full Zobrist hash; CompactState keeps it up to date incrementally"""
+    key = (seating_key(tuple(colors)) ^ TURN_KEYS[colors[turn]] ^ SIXES_KEYS[sixes]
+           ^ DICE_KEYS[dice_value or 0])
+    for slot, position in enumerate(positions):
+        key ^= piece_key(colors[slot // 4], slot % 4, position)
+    return key